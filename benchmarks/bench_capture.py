@@ -0,0 +1,54 @@
+"""
+Compare screen capture backends on this machine.
+
+Usage:
+    python benchmarks/bench_capture.py
+
+Each available backend grabs every screen GRABS times; we report the mean
+time per grab and the frame pool's allocations per frame. The "file" backend
+replays the committed debug frames, so it also runs on headless CI.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.infra.capture import BACKENDS, create_backend  # noqa: E402
+
+GRABS = 10
+DEBUG_FRAMES = [os.path.join(ROOT, "debug_screen_0.png"), os.path.join(ROOT, "debug_screen_1.png")]
+
+
+def bench(name):
+    kwargs = {"files": DEBUG_FRAMES} if name == "file" else {}
+    backend = create_backend(name, **kwargs)
+    sources = backend.screen_sources()
+    start = time.perf_counter()
+    for _ in range(GRABS):
+        for source in sources:
+            source.grab()
+    elapsed = time.perf_counter() - start
+    grabs = GRABS * len(sources)
+    stats = backend.pool.stats()
+    print(f"{name:<5} {len(sources)} screen(s)  {elapsed / grabs * 1000:7.2f}ms/grab  "
+          f"allocations/frame {stats['allocations_per_frame']:.2f}")
+
+
+def main():
+    if "qt" in BACKENDS:
+        try:
+            from PySide6.QtWidgets import QApplication
+            app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+        except Exception as e:
+            print(f"qt    unavailable: {e}")
+    for name in BACKENDS:
+        try:
+            bench(name)
+        except Exception as e:
+            print(f"{name:<5} unavailable: {e}")
+
+
+if __name__ == "__main__":
+    main()
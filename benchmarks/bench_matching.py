@@ -0,0 +1,231 @@
+"""
+Benchmark IMAGE_MATCH strategies on the committed debug frames.
+
+Usage:
+    python benchmarks/bench_matching.py
+
+Templates are cropped from `debug_screen_*.png` at fixed positions so each
+one has a known ground-truth location. For every strategy we report the best-of-3
+time per match and whether it agrees with the exhaustive search.
+
+The incremental section replays mostly-static polls (a spinner changing
+between grabs) and compares a full re-match with the dirty-tile matcher.
+
+The gray-first section compares today's color pass over the whole frame with
+a grayscale search whose top candidates are confirmed in color.
+
+The feature section compares the pyramid with ORB matching on large crops,
+as captured and with a quarter covered by another window.
+
+The tiled section matches on a 6K frame with 1..N workers; every run must
+be bit-identical to the blockwise single-thread response.
+
+The find-all section times non-maximum suppression for 400 hits on a
+synthetic 4K frame.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.infra import matcher  # noqa: E402
+from src.infra.image_finder import ImageFinder, ScreenFrame  # noqa: E402
+from src.infra.incremental import IncrementalMatcher  # noqa: E402
+from src.infra.tiled import TiledMatcher  # noqa: E402
+
+FRAMES = ["debug_screen_0.png", "debug_screen_1.png"]
+# (x, y, w, h) crops in physical pixels, sized like the captures in assets/
+CROPS = [(200, 150, 182, 78), (1200, 900, 314, 150), (2400, 40, 484, 68), (600, 1600, 138, 136)]
+REPEAT = 3
+POLLS = 5
+SPINNER = (40, 1200, 48, 48)  # (x, y, w, h) area redrawn on every poll
+LARGE_CROPS = [(1200, 500, 576, 408), (200, 150, 576, 408), (100, 700, 400, 300)]
+
+
+def load_cases():
+    cases = []
+    for name in FRAMES:
+        frame = cv2.imread(os.path.join(ROOT, name))
+        if frame is None:
+            continue
+        f_h, f_w = frame.shape[:2]
+        for x, y, w, h in CROPS:
+            if x + w > f_w or y + h > f_h:
+                continue
+            cases.append((name, frame, frame[y:y + h, x:x + w].copy(), (x, y)))
+    return cases
+
+
+def timed(fn, *args):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def bench_strategies(cases):
+    print("== Strategy comparison (color frames) ==")
+    totals = {}
+    for name, frame, template, truth in cases:
+        ref, ref_t = timed(matcher.match_exhaustive, frame, template)
+        line = [f"{name} {template.shape[1]}x{template.shape[0]}@{truth}:",
+                f"exhaustive {ref_t * 1000:7.1f}ms"]
+        totals.setdefault("exhaustive", 0.0)
+        totals["exhaustive"] += ref_t
+        for mode, fn in matcher.MATCHERS.items():
+            if mode == "exhaustive":
+                continue
+            (val, loc), t = timed(fn, frame, template)
+            same = loc == ref[1] and abs(val - ref[0]) <= matcher.PYRAMID_SCORE_TOLERANCE
+            totals.setdefault(mode, 0.0)
+            totals[mode] += t
+            line.append(f"{mode} {t * 1000:7.1f}ms {'OK' if same else 'MISMATCH'}")
+        print("  ".join(line))
+    for mode, total in totals.items():
+        print(f"  total {mode:<12} {total * 1000:8.1f}ms  speedup x{totals['exhaustive'] / total:.1f}")
+
+
+def bench_locality(cases):
+    print("== Last-hit locality (ImageFinder, repeated polls) ==")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (name, frame, template, truth) in enumerate(cases):
+            path = os.path.join(tmp, f"t{i}.png")
+            cv2.imwrite(path, template)
+            finder = ImageFinder()
+            frames = [ScreenFrame(index=0, bgr=frame)]
+            start = time.perf_counter()
+            finder.find(path, frames)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            finder.find(path, frames)
+            warm = time.perf_counter() - start
+            print(f"{name} {template.shape[1]}x{template.shape[0]}: first poll {cold * 1000:7.1f}ms  "
+                  f"next poll {warm * 1000:6.1f}ms  x{cold / warm:.0f}")
+
+
+def bench_incremental(cases):
+    print("== Incremental matching (mostly-static polls) ==")
+    sx, sy, sw, sh = SPINNER
+    for name, frame, template, truth in cases:
+        frame = frame.copy()
+        inc = IncrementalMatcher()
+        inc(frame, template)
+        full_t = inc_t = 0.0
+        same = True
+        for poll in range(POLLS):
+            frame[sy:sy + sh, sx:sx + sw] = (poll * 25) % 256
+            start = time.perf_counter()
+            ref_val, ref_loc = matcher.match_exhaustive(frame, template)
+            full_t += time.perf_counter() - start
+            start = time.perf_counter()
+            val, loc = inc(frame, template)
+            inc_t += time.perf_counter() - start
+            same = same and loc == ref_loc and abs(val - ref_val) <= matcher.PYRAMID_SCORE_TOLERANCE
+        exact = (inc.response(frame, template) == inc.full_response(frame, template)).all()
+        print(f"{name} {template.shape[1]}x{template.shape[0]}: full {full_t / POLLS * 1000:7.1f}ms  "
+              f"incremental {inc_t / POLLS * 1000:6.1f}ms  x{full_t / inc_t:.1f}  "
+              f"{'OK' if same and exact else 'MISMATCH'}")
+
+
+def bench_gray_first(cases):
+    print("== Gray-first search with color check (pyramid) ==")
+    for name, frame, template, truth in cases:
+        gray, t_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        (ref_val, ref_loc), color_t = timed(matcher.match_pyramid, frame, template)
+
+        def gray_first():
+            return matcher.verify_color(frame, template, matcher.candidates_pyramid(gray, t_gray))
+        (val, loc), gray_t = timed(gray_first)
+        same_score = abs(val - ref_val) <= matcher.PYRAMID_SCORE_TOLERANCE
+        # TIE: an identical copy of the crop elsewhere on screen, found first
+        verdict = "MISMATCH" if not same_score else ("OK" if loc == ref_loc else "TIE")
+        print(f"{name} {template.shape[1]}x{template.shape[0]}: color {color_t * 1000:7.1f}ms  "
+              f"gray-first {gray_t * 1000:6.1f}ms  x{color_t / gray_t:.1f} {verdict}")
+
+
+def bench_features():
+    print("== Feature matching on large templates (full ImageFinder.find) ==")
+    tmp = tempfile.mkdtemp()
+    for name in FRAMES:
+        frame = cv2.imread(os.path.join(ROOT, name))
+        if frame is None:
+            continue
+        for x, y, w, h in LARGE_CROPS:
+            path = os.path.join(tmp, f"{os.path.splitext(name)[0]}_{x}_{y}.png")
+            cv2.imwrite(path, frame[y:y + h, x:x + w])
+            covered = frame.copy()
+            covered[y:y + h // 2, x:x + w // 2] = (40, 40, 40)
+            truth = (x + w // 2, y + h // 2)
+            for label, screen in (("clean", frame), ("covered", covered)):
+                line = f"{name} {w}x{h} {label:7}:"
+                for mode in ("pyramid", "feature"):
+                    # A fresh finder per run: no result cache, last hit or frame features to reuse
+                    finder = ImageFinder()
+                    start = time.perf_counter()
+                    pos = finder.find(path, [ScreenFrame(index=0, bgr=screen)], mode=mode, near_last=False)
+                    elapsed = time.perf_counter() - start
+                    verdict = "OK" if pos == truth else "MISS" if pos is None else "WRONG"
+                    line += f"  {mode} {elapsed * 1000:6.1f}ms {verdict:5}"
+                print(line)
+
+
+def bench_tiled():
+    cores = os.cpu_count() or 1
+    print(f"== Tiled exhaustive search on a 6K frame ({cores} core(s)) ==")
+    frame = cv2.imread(os.path.join(ROOT, FRAMES[0]))
+    if frame is None:
+        return
+    gray = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (6144, 3456), interpolation=cv2.INTER_LINEAR)
+    template = gray[1000:1156, 2400:2764].copy()
+    reference = IncrementalMatcher().full_response(gray, template)
+    _, single_t = timed(matcher.match_template, gray, template)
+    print(f"single call {single_t * 1000:7.1f}ms")
+    for workers in sorted({1, 2, 4, cores}):
+        tiled = TiledMatcher(max_workers=workers, min_pixels=0)
+        res, tiled_t = timed(tiled.response, gray, template)
+        tiled.shutdown()
+        exact = "OK" if np.array_equal(res, reference) else "MISMATCH"
+        print(f"{workers:2d} worker(s) {tiled_t * 1000:7.1f}ms  x{single_t / tiled_t:.2f} vs single call  {exact}")
+
+
+def bench_find_all():
+    print("== Find all (4K frame, 20x20 grid of checkboxes) ==")
+    rng = np.random.default_rng(0)
+    frame = cv2.resize(rng.integers(0, 255, size=(270, 480, 3), dtype=np.uint8), (3840, 2160),
+                       interpolation=cv2.INTER_CUBIC)
+    box = np.full((24, 24, 3), 255, dtype=np.uint8)
+    box[2:-2, 2:-2] = 30
+    box[8:16, 8:16] = 200
+    for r in range(20):
+        for c in range(20):
+            frame[60 + r * 100:84 + r * 100, 100 + c * 180:124 + c * 180] = box
+    res, match_t = timed(cv2.matchTemplate, frame, box, matcher.MATCH_METHOD)
+    hits, nms_t = timed(matcher.non_max_suppression, res, 0.9, box.shape)
+    print(f"matchTemplate {match_t * 1000:7.1f}ms  nms {nms_t * 1000:6.1f}ms  hits {len(hits)}")
+
+
+def main():
+    cases = load_cases()
+    if not cases:
+        print("No debug frames found.")
+        return
+    bench_strategies(cases)
+    bench_locality(cases)
+    bench_incremental(cases)
+    bench_gray_first(cases)
+    bench_features()
+    bench_tiled()
+    bench_find_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare OCR backends, in-process and in the persistent worker.
+
+Usage:
+    python benchmarks/bench_ocr.py
+
+Every available backend reads REGIONS text-sized crops of the committed debug
+frames; we report the first call (engine load, worker start) separately from
+the mean of the rest. The "stub" backend runs everywhere, so the worker's
+transfer overhead can be measured on headless CI.
+"""
+import os
+import sys
+import time
+
+import cv2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.infra.ocr import BACKENDS, create_ocr_backend  # noqa: E402
+
+REGIONS = 20
+REGION_SIZE = (240, 40)  # Logical px, a line or two of UI text
+DEBUG_FRAME = os.path.join(ROOT, "debug_screen_0.png")
+
+
+def regions():
+    frame = cv2.imread(DEBUG_FRAME)
+    h, w = frame.shape[:2]
+    r_w, r_h = REGION_SIZE
+    return [frame[(i * 97) % (h - r_h):][:r_h, (i * 131) % (w - r_w):][:, :r_w] for i in range(REGIONS)]
+
+
+def bench(name, worker, crops):
+    backend = create_ocr_backend(name, worker=worker)
+    try:
+        start = time.perf_counter()
+        backend.recognize(crops[0])
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for crop in crops[1:]:
+            backend.recognize(crop)
+        rest = (time.perf_counter() - start) / (len(crops) - 1)
+    finally:
+        backend.close()
+    where = "worker" if worker else "inline"
+    print(f"{name:<9} {where:<6}  first {first * 1000:8.2f}ms  then {rest * 1000:8.2f}ms/region")
+
+
+def main():
+    crops = regions()
+    for name in BACKENDS:
+        for worker in (False, True):
+            try:
+                bench(name, worker, crops)
+            except Exception as e:
+                print(f"{name:<9} unavailable: {e}")
+                break
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import uuid
 
 class ActionType(Enum):
@@ -8,6 +8,7 @@ class ActionType(Enum):
     KEYBOARD_INPUT = "KEYBOARD_INPUT"
     WAIT = "WAIT"
     IMAGE_MATCH = "IMAGE_MATCH"
+    TEXT_MATCH = "TEXT_MATCH"
     MOUSE_MOVE = "MOUSE_MOVE"
     SCROLL = "SCROLL"
     DRAG = "DRAG"
@@ -17,6 +18,40 @@ class ActionType(Enum):
     LOOP = "LOOP"
     VARIABLE_SET = "VARIABLE_SET"
     OCR_READ = "OCR_READ"
+    OCR_READ_MANY = "OCR_READ_MANY"
+    IMAGE_SWITCH = "IMAGE_SWITCH"
+    FOR_EACH_IMAGE = "FOR_EACH_IMAGE"
+
+# IMAGE_SWITCH: one output port per template (params image_path_0..N-1) plus the timeout port
+MAX_SWITCH_CASES = 8
+
+def switch_case_count(params: Dict[str, Any]) -> int:
+    try:
+        count = int(params.get("case_count", 2))
+    except (TypeError, ValueError):
+        count = 2
+    return max(1, min(count, MAX_SWITCH_CASES))
+
+# OCR_READ_MANY: regions variable_name_i, x_i, y_i, w_i, h_i for i < region_count, read from one capture
+MAX_OCR_REGIONS = 8
+
+def ocr_region_count(params: Dict[str, Any]) -> int:
+    try:
+        count = int(params.get("region_count", 2))
+    except (TypeError, ValueError):
+        count = 2
+    return max(1, min(count, MAX_OCR_REGIONS))
+
+# FOR_EACH_IMAGE: the body port runs once per hit, the default port when all hits are done
+FOR_EACH_BODY_PORT = 0
+
+def output_ports(node_type: ActionType, params: Dict[str, Any]) -> List[Optional[int]]:
+    """Output ports of a node: ints index into case_node_ids, None is the default (next) port."""
+    if node_type == ActionType.IMAGE_SWITCH:
+        return list(range(switch_case_count(params))) + [None]
+    if node_type == ActionType.FOR_EACH_IMAGE:
+        return [FOR_EACH_BODY_PORT, None]
+    return [None]
 
 @dataclass
 class ActionNode:
@@ -38,6 +73,7 @@ class ActionNode:
     next_node_id: Optional[str] = None # Default flow
     true_node_id: Optional[str] = None # For IF (Success/True)
     false_node_id: Optional[str] = None # For IF (Failure/False)
+    case_node_ids: List[Optional[str]] = field(default_factory=list) # Extra output ports (IMAGE_SWITCH, FOR_EACH_IMAGE)
     
     def to_dict(self):
         return {
@@ -49,7 +85,8 @@ class ActionNode:
             "params": self.params,
             "next_node_id": self.next_node_id,
             "true_node_id": self.true_node_id,
-            "false_node_id": self.false_node_id
+            "false_node_id": self.false_node_id,
+            "case_node_ids": self.case_node_ids
         }
 
     @staticmethod
@@ -63,6 +100,7 @@ class ActionNode:
             params=data.get("params", {}),
             next_node_id=data.get("next_node_id"),
             true_node_id=data.get("true_node_id"),
-            false_node_id=data.get("false_node_id")
+            false_node_id=data.get("false_node_id"),
+            case_node_ids=list(data.get("case_node_ids", []))
         )
         return node
@@ -0,0 +1,41 @@
+"""
+Compiled execution plan for WorkflowRunner.
+
+`WorkflowRunner.compile()` turns the nodes reachable from the start node into
+a Plan before a run:
+- params are parsed and validated once (a bad number fails the compile and
+  names the node, instead of stopping the run midway)
+- successors are resolved to step indexes, so routing is a list access
+- every step carries a handler closure built for its node type, with
+  expressions compiled to code objects and constant texts left unformatted
+
+The plan only holds copies of what it read, so editing the graph in the UI
+while a workflow runs does not change the running workflow.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+from src.domain.actions import ActionType
+
+
+class PlanError(ValueError):
+    """A node's params can not be compiled."""
+    def __init__(self, label: str, message: str):
+        super().__init__(f"{label}: {message}")
+        self.label = label
+
+
+@dataclass(frozen=True)
+class Step:
+    node_id: str
+    label: str
+    type: ActionType
+    run: Callable[[], Any]                        # Executes the node, returns its result
+    route: Callable[[Any], Optional[int]]         # Result -> index of the next step (None ends the run)
+    banner: str = ""                              # Printed before the step runs
+
+
+@dataclass(frozen=True)
+class Plan:
+    steps: Tuple[Step, ...]
+    start: Optional[int]                          # Index of the first step (None: nothing to run)
@@ -1,167 +1,532 @@
+import copy
 import time
 from src.state.store import Store
-from src.domain.actions import ActionType
+from src.domain.actions import ActionType, FOR_EACH_BODY_PORT, ocr_region_count, switch_case_count
+from src.domain.plan import Plan, PlanError, Step
 from src.infra.input_driver import InputDriver
+from src.infra.image_finder import Anchor, MatchRequest
 import threading
 
+# Image nodes that can run right after the current one are matched on the same grab;
+# their results are only trusted if the node runs within this many seconds
+BATCH_WINDOW = 0.5
+BATCH_MAX = 8
+
+# Node types whose result picks the true or false successor (each falls back to the next node);
+# a LOOP is True while iterations remain
+BRANCH_TYPES = (ActionType.IF_CONDITION, ActionType.IMAGE_MATCH, ActionType.TEXT_MATCH, ActionType.LOOP)
+
+# Node types the image look-ahead walks through (no clicks or keys: IF reads variables,
+# IMAGE_MATCH only moves the pointer)
+LOOKAHEAD_TYPES = (ActionType.IMAGE_MATCH, ActionType.IF_CONDITION)
+
 class WorkflowRunner:
     def __init__(self, store: Store, driver: InputDriver = None):
         self.store = store
         self.driver = driver if driver else InputDriver()
         self._stop_flag = False
         self.variables = {} # Memory for automation variables
-        
-    def run(self, start_node_id=None):
+        self._prefetched = {} # node id -> (timestamp, match position) from a batched grab
+        self._ocr_reads = 0
+        # Node type -> builder of the step's handler closure (see compile)
+        self._compilers = {
+            ActionType.CLICK: self._compile_click,
+            ActionType.KEYBOARD_INPUT: self._compile_keyboard_input,
+            ActionType.MOUSE_MOVE: self._compile_mouse_move,
+            ActionType.SCROLL: self._compile_scroll,
+            ActionType.DRAG: self._compile_drag,
+            ActionType.WAIT: self._compile_wait,
+            ActionType.IMAGE_MATCH: self._compile_image_match,
+            ActionType.TEXT_MATCH: self._compile_text_match,
+            ActionType.IMAGE_SWITCH: self._compile_image_switch,
+            ActionType.FOR_EACH_IMAGE: self._compile_for_each_image,
+            ActionType.VARIABLE_SET: self._compile_variable_set,
+            ActionType.IF_CONDITION: self._compile_if_condition,
+            ActionType.LOOP: self._compile_loop,
+            ActionType.OCR_READ: self._compile_ocr_read,
+            ActionType.OCR_READ_MANY: self._compile_ocr_read_many,
+        }
+
+    def run(self, start_node_id=None, plan: Plan = None):
+        """Run from `start_node_id` (default: the first node), or a plan compiled beforehand."""
         self.variables = {} # Reset variables on each run
-        self._run_loop(start_node_id)
+        self._prefetched = {}
+        self._ocr_reads = 0
+        if plan is None:
+            try:
+                plan = self.compile(start_node_id)
+            except PlanError as e:
+                print(f"[Runner] Plan Error at {e}")
+                return
+        self._run_plan(plan)
 
-    def _run_loop(self, start_node_id=None):
+    def compile(self, start_node_id=None) -> Plan:
+        """
+        Snapshot the nodes reachable from the start node into an immutable Plan
+        (see src.domain.plan). Raises PlanError naming the first node with invalid params.
+        """
+        nodes = {node.id: copy.deepcopy(node) for node in self.store.get_all_nodes()}
         if not start_node_id:
-            nodes = self.store.get_all_nodes()
-            if not nodes:
-                print("No nodes to execute.")
-                return
-            current_id = nodes[0].id
-        else:
-            current_id = start_node_id
-            
+            start_node_id = next(iter(nodes), None)
+        if start_node_id not in nodes:
+            return Plan((), None)
+
+        # Reachable nodes in visiting order; their position is the step index
+        order, index = [], {}
+        queue = [start_node_id]
+        while queue:
+            node_id = queue.pop(0)
+            if node_id in index or node_id not in nodes:
+                continue
+            index[node_id] = len(order)
+            node = nodes[node_id]
+            order.append(node)
+            successors = (node.next_node_id, node.true_node_id, node.false_node_id, *node.case_node_ids)
+            queue.extend(i for i in successors if i)
+
+        steps = tuple(
+            Step(node.id, node.label, node.type, self._compile_node(node, nodes.get), self._route(node, index),
+                 banner=f"Executing: {node.label} ({node.type.name})")
+            for node in order
+        )
+        return Plan(steps, 0)
+
+    def _run_plan(self, plan: Plan):
+        if plan.start is None:
+            print("No nodes to execute.")
+            return
+
         print("--- Workflow Started ---")
-        
-        while current_id and not self._stop_flag:
-            node = self.store.get_node(current_id)
-            if not node: break
-                
-            print(f"Executing: {node.label} ({node.type.name})")
-            
+
+        steps = plan.steps
+        index = plan.start
+        while index is not None and not self._stop_flag:
+            step = steps[index]
+            print(step.banner)
+
             try:
-                # Execution now returns a boolean (for branching) or None
-                result = self._execute_node(node)
-                
-                # Logic Branching
-                if node.type == ActionType.IF_CONDITION or node.type == ActionType.IMAGE_MATCH:
-                    # IF and IMAGE_MATCH can branch based on result
-                    if result:
-                        current_id = node.true_node_id if node.true_node_id else node.next_node_id
-                    else:
-                        current_id = node.false_node_id if node.false_node_id else node.next_node_id
-                else:
-                    # Normal flow
-                    current_id = node.next_node_id
-                    
+                # The step's result (branch flag, switch case, ...) picks the next step
+                index = step.route(step.run())
             except Exception as e:
-                print(f"Execution Error at {node.label}: {e}")
+                print(f"Execution Error at {step.label}: {e}")
                 import traceback
                 traceback.print_exc()
                 break
-                
+
+        if self._ocr_reads:
+            print(f"[Runner] OCR cache: {self.ocr_stats()}")
         print("--- Workflow Finished ---")
 
+    def ocr_stats(self) -> dict:
+        """Hits/misses of the driver's OCR cache (unchanged regions skip recognition)."""
+        return self.driver.ocr_cache.stats()
+
     def _execute_node(self, node):
+        """Run one node as it is now, outside a plan (Test Action)."""
+        # No successor lookup: an image node matches only its own template, nothing is prefetched
+        return self._compile_node(node, lambda node_id: None)()
+
+    def _route(self, node, index):
+        """Result -> index of the next step; references to missing nodes end the run."""
+        next_step = index.get(node.next_node_id)
+
+        if node.type in BRANCH_TYPES:
+            true_step = index.get(node.true_node_id) if node.true_node_id else next_step
+            false_step = index.get(node.false_node_id) if node.false_node_id else next_step
+            return lambda result: true_step if result else false_step
+
+        if node.type == ActionType.IMAGE_SWITCH:
+            # Result is the index of the template that appeared (None on timeout, the only use of the default port)
+            case_ids = tuple(node.case_node_ids)
+            cases = tuple(index.get(case_id) for case_id in case_ids)
+            label = node.label
+
+            def route(result):
+                if result is None:
+                    return next_step
+                if result < len(case_ids) and case_ids[result]:
+                    return cases[result]
+                print(f"[Runner] {label}: case {result + 1} matched but its port is not connected, branch ends")
+                return None
+            return route
+
+        if node.type == ActionType.FOR_EACH_IMAGE:
+            # Body port while hits remain, default port once all were visited
+            body_id = node.case_node_ids[FOR_EACH_BODY_PORT] if FOR_EACH_BODY_PORT < len(node.case_node_ids) else None
+            body_step = index.get(body_id)
+            return lambda result: body_step if result and body_id else next_step
+
+        return lambda result: next_step
+
+    def _compile_node(self, node, lookup):
+        """Handler closure of a node: params parsed now, executed later without re-reading them."""
+        compiler = self._compilers.get(node.type)
+        if compiler is None:
+            return lambda: None
+        try:
+            return compiler(node, lookup)
+        except PlanError:
+            raise
+        except (TypeError, ValueError) as e:
+            raise PlanError(node.label, f"invalid parameter ({e})") from e
+
+    # --- Node compilers: each returns a closure executing the node ---
+
+    def _compile_click(self, node, lookup):
         params = node.params
-        
-        if node.type == ActionType.CLICK:
-            click_type = params.get("click_type", "single")
-            self.driver.click(
-                x=int(params.get("x", 0)), 
-                y=int(params.get("y", 0)),
-                double=(click_type == "double"),
-                button=params.get("button", "left")
-            )
+        x, y = int(params.get("x", 0)), int(params.get("y", 0))
+        double = params.get("click_type", "single") == "double"
+        button = params.get("button", "left")
+        return lambda: self.driver.click(x=x, y=y, double=double, button=button)
 
-        elif node.type == ActionType.KEYBOARD_INPUT:
-            mode = params.get("mode", "text")
-            if mode == "text":
-                # Support variable interpolation in text: {my_var}
-                raw_text = params.get("text", "")
-                try:
-                    interpolated_text = raw_text.format(**self.variables)
-                except:
-                    interpolated_text = raw_text
-                self.driver.type_text(
-                    interpolated_text,
-                    float(params.get("interval", 0.05))
-                )
-            else: # shortcut
-                self.driver.press_key(params.get("keys", ""))
-
-        elif node.type == ActionType.MOUSE_MOVE:
-            self.driver.move(int(params.get("x", 0)), int(params.get("y", 0)))
-
-        elif node.type == ActionType.SCROLL:
-            self.driver.scroll(
-                int(params.get("dx", 0)), 
-                int(params.get("dy", 0)),
-                x=int(params.get("x", 0)),
-                y=int(params.get("y", 0))
-            )
-            
-        elif node.type == ActionType.DRAG:
-            self.driver.drag(
-                (int(params.get("x1", 0)), int(params.get("y1", 0))),
-                (int(params.get("x2", 0)), int(params.get("y2", 0)))
-            )
+    def _compile_keyboard_input(self, node, lookup):
+        params = node.params
+        if params.get("mode", "text") != "text": # shortcut
+            keys = params.get("keys", "")
+            return lambda: self.driver.press_key(keys)
+        # Support variable interpolation in text: {my_var}
+        text = self._text(params.get("text", ""))
+        interval = float(params.get("interval", 0.05))
+        return lambda: self.driver.type_text(text(), interval)
+
+    def _compile_mouse_move(self, node, lookup):
+        x, y = int(node.params.get("x", 0)), int(node.params.get("y", 0))
+        return lambda: self.driver.move(x, y)
+
+    def _compile_scroll(self, node, lookup):
+        params = node.params
+        dx, dy = int(params.get("dx", 0)), int(params.get("dy", 0))
+        x, y = int(params.get("x", 0)), int(params.get("y", 0))
+        return lambda: self.driver.scroll(dx, dy, x=x, y=y)
+
+    def _compile_drag(self, node, lookup):
+        params = node.params
+        start = (int(params.get("x1", 0)), int(params.get("y1", 0)))
+        end = (int(params.get("x2", 0)), int(params.get("y2", 0)))
+        return lambda: self.driver.drag(start, end)
+
+    def _compile_wait(self, node, lookup):
+        seconds = float(node.params.get("seconds", 1.0))
+        return lambda: self.driver.wait(seconds)
 
-        elif node.type == ActionType.WAIT:
-            self.driver.wait(float(params.get("seconds", 1.0)))
-            
-        elif node.type == ActionType.IMAGE_MATCH:
-            image_path = params.get("image_path", "")
-            confidence = float(params.get("confidence", 0.9))
-            
+    def _compile_image_match(self, node, lookup):
+        request = self._image_request(node.params)
+        parallel = bool(node.params.get("parallel_screens", False))
+        # Templates of the image nodes that follow, matched on the same grab as this one
+        upcoming = []
+        for nxt in self._upcoming_image_nodes(node, lookup):
+            try:
+                nxt_request = self._image_request(nxt.params)
+            except (TypeError, ValueError) as e:
+                # The broken node is the one to fix, not the node batching it
+                raise PlanError(nxt.label, f"invalid parameter ({e})") from e
+            # Results are keyed by path, so each template joins the batch once
+            if nxt_request.image_path != request.image_path and all(
+                    r.image_path != nxt_request.image_path for _, r in upcoming):
+                upcoming.append((nxt.id, nxt_request))
+
+        def run():
             start_time = time.time()
-            match_pos = None
+            # First attempt may be shared with the image nodes that follow
+            match_pos = self._first_image_match(node.id, node.label, request, parallel, upcoming)
             # Retry loop for 5 seconds
-            while time.time() - start_time < 5.0:
-                match_pos = self.driver.find_image(image_path, confidence)
-                if match_pos: break
+            while not match_pos and time.time() - start_time < 5.0:
                 time.sleep(0.5)
-            
+                match_pos = self.driver.find_image(
+                    request.image_path, request.confidence, mode=request.mode, region=request.region,
+                    near_last=request.near_last, parallel=parallel, exclude=request.exclude,
+                    anchor=request.anchor
+                )
+
             if match_pos:
                 self.driver.move(match_pos[0], match_pos[1])
                 return True
+            self.driver.report_match_failure(request.image_path)
             return False
+        return run
+
+    def _compile_text_match(self, node, lookup):
+        # Visible label instead of a template; the screen's text index is reused while it is unchanged
+        params = node.params
+        text = self._text(params.get("text", ""))
+        region = self._region(params)
+        min_score = float(params.get("min_score", 0.8))
+        timeout = float(params.get("timeout", 5.0))
 
-        elif node.type == ActionType.VARIABLE_SET:
-            var_name = params.get("variable_name", "var")
-            var_value = params.get("value", "")
+        def run():
+            target = text()
+            if not target:
+                return False
+            start_time = time.time()
+            match_pos = self.driver.find_text(target, region=region, min_score=min_score)
+            while not match_pos and time.time() - start_time < timeout and not self._stop_flag:
+                time.sleep(0.5)
+                match_pos = self.driver.find_text(target, region=region, min_score=min_score)
+
+            if match_pos:
+                self.driver.move(match_pos[0], match_pos[1])
+                return True
+            return False
+        return run
+
+    def _compile_image_switch(self, node, lookup):
+        # All templates are checked against one grab per tick; the first listed match wins
+        cases = self._switch_requests(node.params)
+        requests = [req for _, req in cases]
+        timeout = float(node.params.get("timeout", 5.0))
+
+        def run():
+            start_time = time.time()
+            while cases and not self._stop_flag:
+                results = self.driver.find_images(requests)
+                for index, req in cases:
+                    match_pos = results.get(req.image_path)
+                    if match_pos:
+                        print(f"[Runner] Switch case {index + 1} matched: {req.image_path}")
+                        self.driver.move(match_pos[0], match_pos[1])
+                        return index
+                if time.time() - start_time >= timeout:
+                    break
+                time.sleep(0.5)
+            print("[Runner] Switch timed out")
+            return None
+        return run
+
+    def _compile_for_each_image(self, node, lookup):
+        params = node.params
+        var_name = params.get("variable_name", "hit")
+        hits_var = f"_foreach_hits_{node.id}"
+        count_var, x_var, y_var, index_var = (f"{var_name}_{s}" for s in ("count", "x", "y", "index"))
+        request = self._image_request(params)
+        sort = params.get("sort", "position")
+        max_hits = int(params.get("max_hits", 0)) or None
+
+        def run():
+            variables = self.variables
+            if hits_var not in variables:
+                # First visit: find every occurrence once, then hand out one per visit
+                hits = self.driver.find_all_images(
+                    request.image_path, request.confidence, region=request.region,
+                    sort=sort, max_hits=max_hits, exclude=request.exclude
+                )
+                variables[hits_var] = list(hits)
+                variables[count_var] = len(hits)
+
+            remaining = variables[hits_var]
+            if remaining:
+                x, y = remaining.pop(0)
+                index = variables[count_var] - len(remaining) - 1
+                variables[x_var] = x
+                variables[y_var] = y
+                variables[index_var] = index
+                print(f"[Runner] For each {index + 1}/{variables[count_var]}: ({x}, {y})")
+                self.driver.move(x, y)
+                return True
+
+            # All hits visited: the next visit searches again
+            del variables[hits_var]
+            return False
+        return run
+
+    def _compile_variable_set(self, node, lookup):
+        var_name = node.params.get("variable_name", "var")
+        var_value = node.params.get("value", "")
+        # Basic calculation support; values that are not expressions are stored as text
+        code = self._expression(var_value, node.label)
+        namespace = {}
+
+        def run():
             try:
-                # Basic calculation support
-                self.variables[var_name] = eval(str(var_value), {}, self.variables)
-            except:
-                self.variables[var_name] = var_value
-            print(f"[Runner] Set {var_name} = {self.variables[var_name]}")
-
-        elif node.type == ActionType.IF_CONDITION:
-            cond = params.get("condition", "True")
+                value = eval(code, namespace, self.variables) if code else var_value
+            except Exception:
+                value = var_value
+            self.variables[var_name] = value
+            print(f"[Runner] Set {var_name} = {value}")
+        return run
+
+    def _compile_if_condition(self, node, lookup):
+        cond = node.params.get("condition", "True")
+        try:
+            code = compile(str(cond), f"<{node.label}>", "eval")
+        except SyntaxError as e:
+            error = e
+            code = None
+        namespace = {}
+
+        def run():
+            if code is None:
+                print(f"[Runner] Condition Error: {error}")
+                return False
             try:
-                return bool(eval(cond, {}, self.variables))
+                return bool(eval(code, namespace, self.variables))
             except Exception as e:
                 print(f"[Runner] Condition Error: {e}")
                 return False
+        return run
+
+    def _compile_loop(self, node, lookup):
+        times = int(node.params.get("times", 5))
+        loop_var = f"_loop_cnt_{node.id}"
 
-        elif node.type == ActionType.LOOP:
-            times = int(params.get("times", 5))
-            loop_var = f"_loop_cnt_{node.id}"
-            
+        def run():
             curr = self.variables.get(loop_var, 0)
             if curr < times:
                 self.variables[loop_var] = curr + 1
                 print(f"[Runner] Loop {curr + 1}/{times}")
                 return True # Continue loop
-            else:
-                # Loop finished, reset counter for next time if needed
-                self.variables[loop_var] = 0
-                return False # Exit loop
-
-        elif node.type == ActionType.OCR_READ:
-            var_name = params.get("variable_name", "ocr_result")
-            text = self.driver.read_text_at(
-                int(params.get("x", 0)), 
-                int(params.get("y", 0)),
-                int(params.get("w", 100)),
-                int(params.get("h", 50))
-            )
-            self.variables[var_name] = text
+            # Loop finished, reset counter for next time if needed
+            self.variables[loop_var] = 0
+            return False # Exit loop
+        return run
+
+    def _compile_ocr_read(self, node, lookup):
+        params = node.params
+        var_name = params.get("variable_name", "ocr_result")
+        x, y = int(params.get("x", 0)), int(params.get("y", 0))
+        w, h = int(params.get("w", 100)), int(params.get("h", 50))
+
+        def run():
+            self.variables[var_name] = self.driver.read_text_at(x, y, w, h)
+            self._ocr_reads += 1
+            return True
+        return run
+
+    def _compile_ocr_read_many(self, node, lookup):
+        # One capture for all regions; each region's text goes to its own variable
+        regions = self._ocr_regions(node.params)
+
+        def run():
+            texts = self.driver.read_texts_at(regions)
+            self.variables.update(texts)
+            self._ocr_reads += len(texts)
             return True
-            
+        return run
+
+    # --- Param helpers ---
+
+    def _text(self, raw):
+        """Text with {variable} interpolation; text without braces is returned as is."""
+        raw = str(raw)
+        if "{" not in raw and "}" not in raw:
+            return lambda: raw
+
+        def text():
+            try:
+                return raw.format_map(self.variables)
+            except Exception:
+                return raw
+        return text
+
+    @staticmethod
+    def _expression(source, label):
+        """Code object of an expression, or None when `source` is not one."""
+        try:
+            return compile(str(source), f"<{label}>", "eval")
+        except SyntaxError:
+            return None
+
+    def _region(self, params):
+        """Optional search region (logical coordinates, disabled when w/h is 0)."""
+        region_w, region_h = int(params.get("region_w", 0)), int(params.get("region_h", 0))
+        if region_w > 0 and region_h > 0:
+            return (int(params.get("region_x", 0)), int(params.get("region_y", 0)), region_w, region_h)
         return None
+
+    def _image_request(self, params) -> MatchRequest:
+        region = self._region(params)
+        # Optional rect of the capture ignored while matching (template pixels)
+        exclude = None
+        mask_w, mask_h = int(params.get("mask_w", 0)), int(params.get("mask_h", 0))
+        if mask_w > 0 and mask_h > 0:
+            exclude = (int(params.get("mask_x", 0)), int(params.get("mask_y", 0)), mask_w, mask_h)
+        # Optional anchor: the target is only searched in a window offset from the anchor's center
+        anchor = None
+        anchor_w, anchor_h = int(params.get("anchor_w", 0)), int(params.get("anchor_h", 0))
+        if params.get("anchor_path") and anchor_w > 0 and anchor_h > 0:
+            anchor = Anchor(
+                image_path=params["anchor_path"],
+                offset=(int(params.get("anchor_x", 0)), int(params.get("anchor_y", 0)), anchor_w, anchor_h),
+                confidence=float(params.get("confidence", 0.9)),
+            )
+        return MatchRequest(
+            image_path=params.get("image_path", ""),
+            confidence=float(params.get("confidence", 0.9)),
+            mode=params.get("match_mode", "pyramid"),
+            region=region,
+            near_last=bool(params.get("search_near_last", True)),
+            exclude=exclude,
+            anchor=anchor,
+        )
+
+    def _switch_requests(self, params):
+        """(case index, MatchRequest) for every IMAGE_SWITCH template that is set."""
+        cases = []
+        for index in range(switch_case_count(params)):
+            image_path = params.get(f"image_path_{index}", "")
+            if image_path:
+                # Node-level region, mask and anchor params belong to no case in particular
+                cases.append((index, MatchRequest(image_path, confidence=float(params.get("confidence", 0.9)))))
+        return cases
+
+    def _ocr_regions(self, params):
+        """variable name -> logical (x, y, w, h) for every OCR_READ_MANY region with a size."""
+        regions = {}
+        for index in range(ocr_region_count(params)):
+            w, h = int(params.get(f"w_{index}", 100)), int(params.get(f"h_{index}", 50))
+            if w > 0 and h > 0:
+                name = params.get(f"variable_name_{index}") or f"ocr_result_{index + 1}"
+                regions[name] = (int(params.get(f"x_{index}", 0)), int(params.get(f"y_{index}", 0)), w, h)
+        return regions
+
+    def _upcoming_image_nodes(self, node, lookup):
+        """
+        IMAGE_MATCH nodes that can run right after `node` with no input in between.
+
+        Successors are followed through image nodes and IF_CONDITION nodes (which
+        only read variables), so IF chains on IMAGE_MATCH are batched. A branch is
+        only followed when every arm leads to such a node: templates are never
+        matched for a path where a click or key press comes first.
+        """
+        found, seen = [], {node.id}
+        queue = [node]
+        while queue and len(found) < BATCH_MAX:
+            current = queue.pop(0)
+            nexts = [lookup(next_id) for next_id in self._successor_ids(current)]
+            if any(nxt is None or nxt.type not in LOOKAHEAD_TYPES for nxt in nexts):
+                continue
+            for nxt in nexts:
+                if nxt.id in seen:
+                    continue
+                seen.add(nxt.id)
+                if nxt.type == ActionType.IMAGE_MATCH:
+                    found.append(nxt)
+                queue.append(nxt)
+        return found[:BATCH_MAX]
+
+    @staticmethod
+    def _successor_ids(node):
+        """Nodes a branch node can continue with (missing ports fall back to the next node)."""
+        if node.type in BRANCH_TYPES and (node.true_node_id or node.false_node_id):
+            ids = (node.true_node_id or node.next_node_id, node.false_node_id or node.next_node_id)
+        else:
+            ids = (node.next_node_id,)
+        return list(dict.fromkeys(i for i in ids if i))
+
+    def _first_image_match(self, node_id, label, request, parallel, upcoming):
+        prefetched = self._prefetched.pop(node_id, None)
+        if prefetched and time.time() - prefetched[0] <= BATCH_WINDOW:
+            print(f"[Runner] Using batched match result for {label}")
+            return prefetched[1]
+
+        if not upcoming:
+            return self.driver.find_image(
+                request.image_path, request.confidence, mode=request.mode, region=request.region,
+                near_last=request.near_last, parallel=parallel, exclude=request.exclude,
+                anchor=request.anchor
+            )
+
+        results = self.driver.find_images([request] + [r for _, r in upcoming], parallel=parallel)
+        grabbed_at = time.time()
+        for nxt_id, nxt_request in upcoming:
+            self._prefetched[nxt_id] = (grabbed_at, results.get(nxt_request.image_path))
+        return results.get(request.image_path)
@@ -0,0 +1,153 @@
+"""
+Content-addressed storage for captured templates.
+
+Captures are named after a hash of their pixels, so capturing the same thing
+twice reuses the existing file instead of adding a duplicate. Every saved PNG
+gets a sidecar (see template_cache.write_sidecar) so TemplateCache skips the
+decode and pyramid work when the template is first used.
+
+Assets no workflow refers to any more can be listed or removed with:
+
+    python -m src.infra.asset_store gc workflow.json [more.json ...] [--delete]
+
+Workflow files are JSON exports of nodes (ActionNode.to_dict, a list of them,
+or any JSON wrapping those); every string in them that names an asset counts
+as a reference.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Iterable, List, Set
+
+import cv2
+import numpy as np
+
+from src.infra.template_cache import SIDECAR_EXT, load_template, scale_suffix, sidecar_path, write_sidecar
+
+ASSET_DIR = "assets"
+HASH_LENGTH = 16  # Hex digits of the sha256 kept in file names
+
+
+def content_hash(img: np.ndarray) -> str:
+    """Hash of an image's pixels (shape included, so a reshaped buffer differs)."""
+    digest = hashlib.sha256(str(img.shape).encode())
+    digest.update(np.ascontiguousarray(img).data)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def workflow_references(obj) -> Set[str]:
+    """File names of every string in a decoded workflow JSON value."""
+    if isinstance(obj, str):
+        return {os.path.basename(obj)} if obj else set()
+    items = obj.values() if isinstance(obj, dict) else obj if isinstance(obj, list) else []
+    names = set()
+    for item in items:
+        names |= workflow_references(item)
+    return names
+
+
+class AssetStore:
+    """
+    Captured templates under `root`, named capture_<hash>@<scale>x.png.
+
+    The capture scale stays in the name (see template_cache.scale_suffix):
+    the same pixels captured at another scale are a different template.
+    """
+    def __init__(self, root: str = ASSET_DIR):
+        self.root = root
+
+    def save(self, bgr: np.ndarray, scale: float = 1.0) -> str:
+        """Store a capture and return its absolute path (an existing identical file is reused)."""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.root, f"capture_{content_hash(bgr)}{scale_suffix(scale)}.png"))
+        if os.path.exists(path):
+            print(f"[Assets] Reusing identical capture {os.path.basename(path)}")
+            if not os.path.exists(sidecar_path(path)):
+                write_sidecar(path, bgr)
+            return path
+
+        # Written under a temporary name first so a half-written PNG is never picked up
+        tmp = path + ".tmp.png"
+        if not cv2.imwrite(tmp, bgr):
+            raise OSError(f"Could not write {tmp}")
+        os.replace(tmp, path)
+        write_sidecar(path, bgr)
+        return path
+
+    def assets(self) -> List[str]:
+        """Absolute paths of every PNG in the store."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.path.abspath(os.path.join(self.root, name))
+                      for name in os.listdir(self.root) if name.lower().endswith(".png"))
+
+    def write_missing_sidecars(self) -> int:
+        """Create sidecars for assets that have none (e.g. captures made before the store). Returns the count."""
+        written = 0
+        for path in self.assets():
+            side = sidecar_path(path)
+            if os.path.exists(side) and os.stat(side).st_mtime_ns >= os.stat(path).st_mtime_ns:
+                continue
+            bgr, alpha = load_template(path)
+            if bgr is not None:
+                write_sidecar(path, bgr, alpha)
+                written += 1
+        return written
+
+    def orphans(self, referenced: Set[str]) -> List[str]:
+        """Assets (and stray sidecars) whose file name is not in `referenced`."""
+        found = [path for path in self.assets() if os.path.basename(path) not in referenced]
+        if os.path.isdir(self.root):
+            pngs = {os.path.splitext(path)[0] for path in self.assets()}
+            for name in sorted(os.listdir(self.root)):
+                stem, ext = os.path.splitext(name)
+                if ext == SIDECAR_EXT and os.path.abspath(os.path.join(self.root, stem)) not in pngs:
+                    found.append(os.path.abspath(os.path.join(self.root, name)))
+        return found
+
+    def collect_garbage(self, workflow_paths: Iterable[str], delete: bool = False) -> List[str]:
+        """
+        Assets none of the workflow files refer to. They are only removed
+        (with their sidecars) when `delete` is set.
+        """
+        referenced = set()
+        for path in workflow_paths:
+            with open(path, encoding="utf-8") as f:
+                referenced |= workflow_references(json.load(f))
+
+        garbage = self.orphans(referenced)
+        if delete:
+            for path in garbage:
+                for target in (path, sidecar_path(path)):
+                    if os.path.exists(target):
+                        os.remove(target)
+        return garbage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.infra.asset_store")
+    parser.add_argument("--root", default=ASSET_DIR, help="asset directory (default: assets)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    gc = commands.add_parser("gc", help="list (or delete) assets no workflow refers to")
+    gc.add_argument("workflows", nargs="+", help="workflow JSON files whose assets are kept")
+    gc.add_argument("--delete", action="store_true", help="remove the unreferenced assets")
+    commands.add_parser("sidecars", help="write missing sidecars for existing assets")
+    args = parser.parse_args(argv)
+
+    store = AssetStore(args.root)
+    if args.command == "sidecars":
+        print(f"[Assets] Wrote {store.write_missing_sidecars()} sidecar(s)")
+        return 0
+
+    garbage = store.collect_garbage(args.workflows, delete=args.delete)
+    for path in garbage:
+        print(os.path.relpath(path))
+    verb = "Removed" if args.delete else "Unreferenced (use --delete to remove)"
+    print(f"[Assets] {verb}: {len(garbage)} file(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Screen capture backends.
+
+A backend knows the logical geometry of every screen and can grab one screen
+as a ScreenFrame. ImageFinder consumes the lazy `ScreenSource`s returned by
+`screen_sources()`, so screens are only grabbed when actually searched.
+
+Backends:
+- "qt"   QScreen.grabWindow (default, needs a running QApplication)
+- "mss"  python-mss (optional dependency)
+- "file" static images / image sequences from disk, for headless runs and benchmarks
+
+Pick one with `create_backend()`; by default it reads AUTOFLOW_CAPTURE
+("qt" | "mss" | "file") and, for the file backend, AUTOFLOW_CAPTURE_FILES:
+one entry per screen separated by os.pathsep, each a file, directory or glob
+(AUTOFLOW_CAPTURE_SCALE sets the recorded frames' devicePixelRatio).
+"""
+import glob
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from src.infra.frames import FramePool, Rect, ScreenFrame, wrap_bits
+
+
+class ScreenSource:
+    """One screen of a backend, grabbed on demand."""
+    def __init__(self, backend: "CaptureBackend", index: int, logical_rect: Rect):
+        self.backend = backend
+        self.index = index
+        self.logical_rect = logical_rect
+
+    def grab(self) -> Optional[ScreenFrame]:
+        return self.backend.grab(self.index)
+
+
+class CaptureBackend:
+    name = "base"
+
+    def __init__(self, pool: FramePool = None):
+        self.pool = pool if pool else FramePool()
+
+    def screen_rects(self) -> List[Rect]:
+        """Logical (x, y, w, h) of every screen, in screen index order."""
+        raise NotImplementedError
+
+    def grab(self, index: int) -> Optional[ScreenFrame]:
+        raise NotImplementedError
+
+    def screen_sources(self, region: Optional[Rect] = None) -> List[ScreenSource]:
+        """Lazy sources for all screens (only those touching `region`, when given)."""
+        sources = []
+        for idx, rect in enumerate(self.screen_rects()):
+            if region and not _overlaps(rect, region):
+                continue
+            sources.append(ScreenSource(self, idx, rect))
+        return sources
+
+    def _convert(self, index: int, view: np.ndarray, code: int, origin, scale: float,
+                 timestamp: float) -> ScreenFrame:
+        # Single conversion from the capture's native layout into pooled buffers.
+        # `timestamp` is taken before the grab started: input sent while a grab
+        # was running may or may not be on it, so such a frame is never "newer".
+        height, width = view.shape[:2]
+        bgr, gray = self.pool.acquire(index, height, width)
+        cv2.cvtColor(view, code, dst=bgr)
+        return ScreenFrame(index=index, bgr=bgr, origin=origin, scale=scale, gray_buffer=gray,
+                           timestamp=timestamp)
+
+
+class QtCaptureBackend(CaptureBackend):
+    """
+    QScreen.grabWindow(0). Pixels are read through a view over the QImage
+    bits (no intermediate numpy copy) and converted straight into pooled buffers.
+    """
+    name = "qt"
+
+    def _screens(self):
+        from PySide6.QtWidgets import QApplication
+        return QApplication.screens()
+
+    def screen_rects(self) -> List[Rect]:
+        rects = []
+        for screen in self._screens():
+            geo = screen.geometry()
+            rects.append((geo.x(), geo.y(), geo.width(), geo.height()))
+        return rects
+
+    def grab(self, index: int) -> Optional[ScreenFrame]:
+        from PySide6.QtGui import QImage
+
+        screens = self._screens()
+        if index >= len(screens):
+            return None
+        screen = screens[index]
+        started = time.monotonic()
+        qimage = screen.grabWindow(0).toImage()
+
+        # 32-bit formats are BGRA in memory (little-endian); anything else is converted once
+        fmt = qimage.format()
+        if fmt == QImage.Format_RGB888:
+            channels, code = 3, cv2.COLOR_RGB2BGR
+        else:
+            if fmt not in (QImage.Format_RGB32, QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied):
+                qimage = qimage.convertToFormat(QImage.Format_RGB32)
+            channels, code = 4, cv2.COLOR_BGRA2BGR
+
+        view = wrap_bits(qimage.constBits(), qimage.width(), qimage.height(), qimage.bytesPerLine(), channels)
+        geo = screen.geometry().topLeft()
+        return self._convert(index, view, code, (geo.x(), geo.y()), screen.devicePixelRatio(), started)
+
+
+class MssCaptureBackend(CaptureBackend):
+    """python-mss grabber. mss handles are not thread-safe, so one is kept per thread."""
+    name = "mss"
+
+    def __init__(self, pool: FramePool = None):
+        super().__init__(pool)
+        import mss  # noqa: F401  (fail early if the optional dependency is missing)
+        self._local = threading.local()
+
+    def _sct(self):
+        if not hasattr(self._local, "sct"):
+            import mss
+            self._local.sct = mss.mss()
+        return self._local.sct
+
+    def screen_rects(self) -> List[Rect]:
+        # monitors[0] is the union of all screens
+        return [(m["left"], m["top"], m["width"], m["height"]) for m in self._sct().monitors[1:]]
+
+    def grab(self, index: int) -> Optional[ScreenFrame]:
+        monitors = self._sct().monitors[1:]
+        if index >= len(monitors):
+            return None
+        mon = monitors[index]
+        started = time.monotonic()
+        shot = self._sct().grab(mon)
+        view = wrap_bits(shot.raw, shot.width, shot.height, shot.width * 4, 4)
+        # mss monitors are logical on macOS while shots are physical pixels
+        scale = shot.width / mon["width"] if mon["width"] else 1.0
+        return self._convert(index, view, cv2.COLOR_BGRA2BGR, (mon["left"], mon["top"]), scale, started)
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def expand_frame_paths(spec: str) -> List[str]:
+    """A file, a directory of images, or a glob pattern -> sorted image paths."""
+    if os.path.isdir(spec):
+        paths = [os.path.join(spec, n) for n in os.listdir(spec) if n.lower().endswith(IMAGE_EXTENSIONS)]
+    elif os.path.isfile(spec):
+        paths = [spec]
+    else:
+        paths = glob.glob(spec)
+    return sorted(paths)
+
+
+class FileCaptureBackend(CaptureBackend):
+    """
+    Replays recorded frames from disk.
+
+    Each entry of `screens` is one screen (file, directory or glob). A screen
+    with several frames advances to the next one on every grab and loops.
+    Screens are laid out left to right in logical coordinates.
+    """
+    name = "file"
+
+    def __init__(self, screens: List[str], scale: float = 1.0, pool: FramePool = None):
+        super().__init__(pool)
+        self.scale = scale
+        self.sequences: List[List[str]] = []
+        for spec in screens:
+            paths = expand_frame_paths(spec)
+            if not paths:
+                raise FileNotFoundError(f"No frames found for capture source: {spec}")
+            self.sequences.append(paths)
+        self._positions = [0] * len(self.sequences)
+        self._decoded: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, path: str) -> np.ndarray:
+        img = self._decoded.get(path)
+        if img is None:
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError(f"Failed to decode frame: {path}")
+            self._decoded[path] = img
+        return img
+
+    def screen_rects(self) -> List[Rect]:
+        rects = []
+        x = 0
+        for seq in self.sequences:
+            h, w = self._load(seq[0]).shape[:2]
+            lw, lh = int(w / self.scale), int(h / self.scale)
+            rects.append((x, 0, lw, lh))
+            x += lw
+        return rects
+
+    def grab(self, index: int) -> Optional[ScreenFrame]:
+        if index >= len(self.sequences):
+            return None
+        started = time.monotonic()
+        with self._lock:
+            seq = self.sequences[index]
+            path = seq[self._positions[index] % len(seq)]
+            self._positions[index] += 1
+            bgr = self._load(path)
+        origin = self.screen_rects()[index][:2]
+        # Decoded frames are shared and never written to; only gray needs a buffer
+        _, gray = self.pool.acquire(index, bgr.shape[0], bgr.shape[1])
+        return ScreenFrame(index=index, bgr=bgr, origin=origin, scale=self.scale, gray_buffer=gray,
+                           timestamp=started)
+
+
+BACKENDS = {
+    "qt": QtCaptureBackend,
+    "mss": MssCaptureBackend,
+    "file": FileCaptureBackend,
+}
+
+
+def create_backend(name: str = None, files: List[str] = None, pool: FramePool = None) -> CaptureBackend:
+    """Build the configured capture backend (see module docstring for the environment variables)."""
+    name = (name or os.environ.get("AUTOFLOW_CAPTURE", "qt")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name == "file":
+        if files is None:
+            files = [f for f in os.environ.get("AUTOFLOW_CAPTURE_FILES", "").split(os.pathsep) if f]
+        scale = float(os.environ.get("AUTOFLOW_CAPTURE_SCALE", 1.0))
+        return FileCaptureBackend(files, scale=scale, pool=pool)
+    return BACKENDS[name](pool=pool)
+
+
+def _overlaps(a: Rect, b: Rect) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
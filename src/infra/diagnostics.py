@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class MatchRecord:
+    """One matching attempt against one screen, kept in memory for post-mortems."""
+    timestamp: float
+    template_path: str
+    screen_index: int
+    rect: Tuple[int, int, int, int]  # Searched area in screen pixels
+    score: float
+    loc: Tuple[int, int]
+    frame: np.ndarray = field(repr=False)     # Copy of the searched area (BGR)
+    template: np.ndarray = field(repr=False)  # Grayscale template (shared with the cache)
+
+
+class MatchDiagnostics:
+    """
+    Opt-in diagnostics for IMAGE_MATCH.
+
+    While enabled, every match attempt is appended to a bounded in-memory ring
+    buffer. Nothing touches the disk until `dump()` is called for a failed
+    node; the dump (frames, heatmaps, scores) is then written on a background
+    thread and only the newest `max_dumps` dump folders are kept.
+
+    Configure through the constructor or the environment (see `from_env`).
+    """
+    def __init__(self, enabled: bool = False, capacity: int = 16,
+                 directory: str = "diagnostics", max_dumps: int = 20):
+        self.enabled = enabled
+        self.directory = directory
+        self.max_dumps = max_dumps
+        self._records: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def from_env() -> "MatchDiagnostics":
+        """
+        AUTOFLOW_DIAGNOSTICS=1            enable
+        AUTOFLOW_DIAGNOSTICS_DIR=path     dump directory (default: diagnostics)
+        AUTOFLOW_DIAGNOSTICS_FRAMES=n     ring buffer size (default: 16)
+        AUTOFLOW_DIAGNOSTICS_KEEP=n       dump folders to keep (default: 20)
+        """
+        env = os.environ
+        return MatchDiagnostics(
+            enabled=env.get("AUTOFLOW_DIAGNOSTICS", "0").lower() in ("1", "true", "yes", "on"),
+            capacity=int(env.get("AUTOFLOW_DIAGNOSTICS_FRAMES", 16)),
+            directory=env.get("AUTOFLOW_DIAGNOSTICS_DIR", "diagnostics"),
+            max_dumps=int(env.get("AUTOFLOW_DIAGNOSTICS_KEEP", 20)),
+        )
+
+    def record(self, template_path: str, screen_index: int, frame_bgr: np.ndarray,
+               rect: Tuple[int, int, int, int], score: float, loc: Tuple[int, int],
+               template_gray: np.ndarray):
+        if not self.enabled:
+            return
+        x, y, w, h = rect
+        rec = MatchRecord(
+            timestamp=time.time(),
+            template_path=template_path,
+            screen_index=screen_index,
+            rect=rect,
+            score=float(score),
+            loc=loc,
+            # Frame buffers may be reused by the next grab, keep our own copy
+            frame=frame_bgr[y:y + h, x:x + w].copy(),
+            template=template_gray,
+        )
+        with self._lock:
+            self._records.append(rec)
+
+    def records(self, template_path: Optional[str] = None) -> List[MatchRecord]:
+        with self._lock:
+            recs = list(self._records)
+        if template_path is not None:
+            key = os.path.abspath(template_path)
+            recs = [r for r in recs if r.template_path == key]
+        return recs
+
+    def dump(self, template_path: Optional[str] = None) -> Optional[Future]:
+        """
+        Write buffered attempts (for one template, or all) to a new dump folder
+        in the background. Returns the writer Future, or None if there is nothing to dump.
+        """
+        if not self.enabled:
+            return None
+        recs = self.records(template_path)
+        if not recs:
+            return None
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="match-diagnostics")
+        return self._writer.submit(self._write, recs, template_path)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def _write(self, recs: List[MatchRecord], template_path: Optional[str]) -> str:
+        stem = os.path.splitext(os.path.basename(template_path))[0] if template_path else "all"
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(recs[-1].timestamp))
+        out_dir = os.path.join(self.directory, f"{stamp}_{int(recs[-1].timestamp * 1000) % 1000:03d}_{stem}")
+        os.makedirs(out_dir, exist_ok=True)
+
+        summary = []
+        for n, rec in enumerate(recs):
+            base = f"{n:02d}_screen{rec.screen_index}"
+            cv2.imwrite(os.path.join(out_dir, f"{base}_frame.png"), rec.frame)
+            heatmap = self._heatmap(rec)
+            if heatmap is not None:
+                cv2.imwrite(os.path.join(out_dir, f"{base}_heatmap.png"), heatmap)
+            summary.append({
+                "file": base,
+                "timestamp": rec.timestamp,
+                "template": rec.template_path,
+                "screen": rec.screen_index,
+                "rect": list(rec.rect),
+                "score": rec.score,
+                "loc": list(rec.loc),
+            })
+        with open(os.path.join(out_dir, "scores.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        self._enforce_retention()
+        print(f"[Diagnostics] Dumped {len(recs)} attempts to {out_dir}")
+        return out_dir
+
+    @staticmethod
+    def _heatmap(rec: MatchRecord) -> Optional[np.ndarray]:
+        # Computed here, off the hot path: the finder only stores the frame
+        gray = cv2.cvtColor(rec.frame, cv2.COLOR_BGR2GRAY)
+        t_h, t_w = rec.template.shape[:2]
+        if t_h > gray.shape[0] or t_w > gray.shape[1]:
+            return None
+        res = cv2.matchTemplate(gray, rec.template, cv2.TM_CCOEFF_NORMED)
+        norm = cv2.normalize(res, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+        return cv2.applyColorMap(norm, cv2.COLORMAP_JET)
+
+    def _enforce_retention(self):
+        dumps = sorted(
+            d for d in os.listdir(self.directory) if os.path.isdir(os.path.join(self.directory, d))
+        )
+        for old in dumps[:max(0, len(dumps) - self.max_dumps)]:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
@@ -0,0 +1,226 @@
+"""
+Feature (ORB) matching for large or partially occluded templates.
+
+Instead of correlating every pixel, keypoints of the template are matched
+against keypoints of the frame. A changed or covered part of the template
+only removes some keypoints, so the match survives where TM_CCOEFF_NORMED
+over the whole window would drop below the confidence.
+
+Frame keypoints are detected tile by tile so every part of the screen gets its
+share (a single detector keeps only the strongest corners globally and starves
+quieter regions), and are indexed once per grab (FLANN LSH) so any number of
+templates can be matched against them.
+
+Screen content is never rotated or warped, and ImageFinder already resizes the
+template to the screen's scale, so the geometric model is a translation: every
+descriptor match votes for the template's top-left offset and the largest
+clusters of agreeing votes are the candidate placements. A RANSAC homography
+was tried first and latched onto repeated rows of tables and onto duplicated
+panels; voting keeps the right placement in both cases.
+
+Score: the template is cut into a VERIFY_GRID x VERIFY_GRID grid and each
+textured cell is correlated (TM_CCOEFF_NORMED) with the frame at the
+candidate placement; the score is the median cell. A covered or changed part
+of up to half the template does not move the median, so the node's usual
+confidence keeps its meaning.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.infra.matcher import Match
+
+FEATURE_MODE = "feature"  # ImageFinder match mode backed by FeatureMatcher
+
+TEMPLATE_FEATURES = 1000       # ORB keypoints kept per template
+FRAME_FEATURES_PER_MPX = 2500  # Frame keypoint budget, spread evenly over tiles
+FRAME_TILE = 512               # px
+TILE_MARGIN = 32               # ORB ignores ~31 px at image borders: tiles overlap by that much
+MAX_DISTANCE = 64              # Hamming distance (of 256 bits) for a descriptor match to vote
+VOTE_RADIUS = 3.0              # px: votes this close agree on a placement
+VOTE_CANDIDATES = 5            # Placements verified per template
+MIN_INLIERS = 12
+VERIFY_GRID = 8                # Cells per side for the score
+FLAT_CELL_STD = 4.0            # Cells with less gray-level spread carry no evidence
+
+# FLANN locality-sensitive hashing for binary (ORB) descriptors
+_LSH_INDEX = dict(algorithm=6, table_number=6, key_size=12, multi_probe_level=1)
+_LSH_SEARCH = dict(checks=50)
+
+
+@dataclass
+class Features:
+    points: np.ndarray               # (N, 2) float32 keypoint positions
+    descriptors: Optional[np.ndarray]
+    index: Optional[cv2.FlannBasedMatcher] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __len__(self):
+        return len(self.points)
+
+
+def _features(keypoints, descriptors) -> Features:
+    points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+    return Features(points, descriptors if len(points) else None)
+
+
+def detect(gray: np.ndarray, n_features: int = TEMPLATE_FEATURES, mask: np.ndarray = None) -> Features:
+    """ORB keypoints and descriptors of a gray image."""
+    # ORB instances are cheap and not shared between threads
+    orb = cv2.ORB_create(nfeatures=n_features)
+    return _features(*orb.detectAndCompute(gray, mask))
+
+
+def detect_tiled(gray: np.ndarray, per_mpx: int = FRAME_FEATURES_PER_MPX, tile: int = FRAME_TILE) -> Features:
+    """ORB keypoints with an equal budget per tile, indexed for matching."""
+    h, w = gray.shape[:2]
+    orb = cv2.ORB_create(nfeatures=max(50, int(tile * tile / 1e6 * per_mpx)))
+    points, descriptors = [], []
+    for y in range(0, h, tile):
+        for x in range(0, w, tile):
+            x0, y0 = max(0, x - TILE_MARGIN), max(0, y - TILE_MARGIN)
+            keypoints, des = orb.detectAndCompute(gray[y0:y + tile + TILE_MARGIN, x0:x + tile + TILE_MARGIN], None)
+            if des is None:
+                continue
+            pts = np.float32([kp.pt for kp in keypoints]) + (x0, y0)
+            # Keypoints in the overlap belong to the neighbouring tile
+            own = (pts[:, 0] >= x) & (pts[:, 0] < x + tile) & (pts[:, 1] >= y) & (pts[:, 1] < y + tile)
+            points.append(pts[own])
+            descriptors.append(des[own])
+    if not points or not sum(len(p) for p in points):
+        return Features(np.empty((0, 2), np.float32), None)
+
+    features = Features(np.vstack(points), np.vstack(descriptors))
+    features.index = cv2.FlannBasedMatcher(_LSH_INDEX, _LSH_SEARCH)
+    features.index.add([features.descriptors])
+    features.index.train()
+    return features
+
+
+def cell_score(template: np.ndarray, warped: np.ndarray, mask: np.ndarray = None,
+               grid: int = VERIFY_GRID) -> float:
+    """Median TM_CCOEFF_NORMED over the textured cells of a grid (0.0 if none is textured)."""
+    t_h, t_w = template.shape[:2]
+    c_h, c_w = t_h // grid, t_w // grid
+    if c_h < 2 or c_w < 2:
+        grid, c_h, c_w = 1, t_h, t_w
+
+    def cells(img):
+        img = img[:grid * c_h, :grid * c_w].astype(np.float32)
+        return img.reshape(grid, c_h, grid, c_w).transpose(0, 2, 1, 3).reshape(grid * grid, c_h * c_w)
+
+    a, b = cells(template), cells(warped)
+    a -= a.mean(axis=1, keepdims=True)
+    b -= b.mean(axis=1, keepdims=True)
+    a_var, b_var = (a * a).sum(axis=1), (b * b).sum(axis=1)
+    valid = a_var > (FLAT_CELL_STD ** 2) * a.shape[1]
+    if mask is not None:
+        # Cells mostly outside the mask are ignored like flat ones
+        valid &= cells(mask).mean(axis=1) >= 128
+    if not valid.any():
+        return 0.0
+    denom = np.sqrt(a_var[valid] * b_var[valid])
+    scores = np.where(denom > 0, (a[valid] * b[valid]).sum(axis=1) / np.maximum(denom, 1e-6), 0.0)
+    return float(np.median(scores))
+
+
+def offset_clusters(src: np.ndarray, dst: np.ndarray, radius: float = VOTE_RADIUS,
+                    top: int = VOTE_CANDIDATES) -> List[Tuple[int, Tuple[float, float]]]:
+    """
+    Most voted translations `dst - src`, best first, as (votes, (dx, dy)).
+    Votes are binned by `radius`; each of the `top` fullest bins collects the
+    votes within 1.5 bins of it and is placed at their median.
+    """
+    offsets = dst - src
+    bins, counts = np.unique(np.round(offsets / radius).astype(np.int64), axis=0, return_counts=True)
+    clusters = []
+    for center in bins[np.argsort(-counts, kind="stable")[:top]] * radius:
+        near = np.abs(offsets - center).max(axis=1) <= radius * 1.5
+        dx, dy = np.median(offsets[near], axis=0)
+        clusters.append((int(near.sum()), (float(dx), float(dy))))
+    clusters.sort(key=lambda c: -c[0])
+    return clusters
+
+
+class FeatureMatcher:
+    """
+    `matcher(frame_gray, cached, key)` returns `(score, (x, y))` like the other
+    matchers: the best verified placement of the template's top-left.
+
+    Template features are computed once per template variant and kept in a
+    small LRU; frame features (with their search index) are kept per `key`
+    (screen + fingerprint + rect), so templates matched on the same grab share
+    one detection.
+    """
+    def __init__(self, max_templates: int = 32, max_frames: int = 4):
+        self.max_templates = max_templates
+        self.max_frames = max_frames
+        self._templates: "OrderedDict[Hashable, Features]" = OrderedDict()
+        self._frames: "OrderedDict[Hashable, Features]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, frame: np.ndarray, cached, key: Hashable = None) -> Match:
+        tmpl = self.template_features(cached)
+        scene = self.frame_features(frame, key)
+        if tmpl.descriptors is None or scene.index is None or len(tmpl) < MIN_INLIERS:
+            return 0.0, (0, 0)
+
+        # The FLANN index is not safe to query from several threads at once
+        with scene.lock:
+            pairs = scene.index.knnMatch(tmpl.descriptors, k=2)
+        # Both neighbours may vote: with a duplicated panel the second is as right as the first
+        votes = [m for pair in pairs for m in pair if m.distance <= MAX_DISTANCE]
+        if len(votes) < MIN_INLIERS:
+            return 0.0, (0, 0)
+
+        src = tmpl.points[[m.queryIdx for m in votes]]
+        dst = scene.points[[m.trainIdx for m in votes]]
+        t_h, t_w = cached.gray.shape[:2]
+        f_h, f_w = frame.shape[:2]
+        best_val, best_loc = 0.0, (0, 0)
+        for count, (dx, dy) in offset_clusters(src, dst):
+            x, y = int(round(dx)), int(round(dy))
+            if count < MIN_INLIERS or x < 0 or y < 0 or x + t_w > f_w or y + t_h > f_h:
+                continue
+            score = cell_score(cached.gray, frame[y:y + t_h, x:x + t_w], cached.mask)
+            if score > best_val:
+                best_val, best_loc = score, (x, y)
+        return best_val, best_loc
+
+    def template_features(self, cached) -> Features:
+        key = (cached.path, cached.mtime_ns, cached.ratio, cached.exclude)
+        with self._lock:
+            features = self._templates.get(key)
+            if features is not None:
+                self._templates.move_to_end(key)
+                return features
+        features = detect(cached.gray, TEMPLATE_FEATURES, cached.mask)
+        with self._lock:
+            self._templates[key] = features
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        return features
+
+    def frame_features(self, frame: np.ndarray, key: Hashable = None) -> Features:
+        if key is None:
+            return detect_tiled(frame)
+        with self._lock:
+            features = self._frames.get(key)
+            if features is not None:
+                self._frames.move_to_end(key)
+                return features
+        features = detect_tiled(frame)
+        with self._lock:
+            self._frames[key] = features
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+        return features
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._frames.clear()
@@ -0,0 +1,135 @@
+"""
+Frame acquisition helpers: zero-copy views over captured pixels and a pool
+of reusable BGR/gray buffers so steady-state polling does not allocate.
+"""
+import threading
+import zlib
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# (x, y, w, h)
+Rect = Tuple[int, int, int, int]
+
+
+@dataclass
+class ScreenFrame:
+    """
+    One grabbed screen in physical pixels plus what is needed to map
+    pixels back to global logical coordinates.
+    """
+    index: int
+    bgr: np.ndarray
+    origin: Tuple[int, int] = (0, 0) # Logical top-left of the screen
+    scale: float = 1.0               # devicePixelRatio
+    gray_buffer: Optional[np.ndarray] = None # Pooled destination for `gray`
+    timestamp: float = 0.0           # time.monotonic() of the grab
+
+    @property
+    def width(self) -> int:
+        return self.bgr.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.bgr.shape[0]
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY, dst=self.gray_buffer)
+
+    @cached_property
+    def fingerprint(self) -> int:
+        """Content hash of the frame, computed once per grab."""
+        return fingerprint(self.bgr)
+
+    def grab(self) -> "ScreenFrame":
+        # An already grabbed frame is its own screen source
+        return self
+
+    def to_logical(self, px: float, py: float) -> Tuple[int, int]:
+        # grabWindow returns physical pixels (Retina), pynput takes logical points
+        return (int(px / self.scale + self.origin[0]), int(py / self.scale + self.origin[1]))
+
+    def logical_to_pixel_rect(self, region: Rect) -> Optional[Rect]:
+        """Clip a global logical rect to this screen and convert it to local pixels."""
+        rx, ry, rw, rh = region
+        x0 = max(0, int((rx - self.origin[0]) * self.scale))
+        y0 = max(0, int((ry - self.origin[1]) * self.scale))
+        x1 = min(self.width, int((rx + rw - self.origin[0]) * self.scale))
+        y1 = min(self.height, int((ry + rh - self.origin[1]) * self.scale))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+
+def fingerprint(arr: np.ndarray) -> int:
+    """
+    Cheap exact fingerprint (CRC32 of the pixels and shape) used to detect
+    unchanged frames. Works on non-contiguous views row by row.
+    """
+    crc = zlib.crc32(repr(arr.shape).encode())
+    if arr.flags.c_contiguous:
+        return zlib.crc32(arr, crc)
+    for row in arr:
+        crc = zlib.crc32(np.ascontiguousarray(row), crc)
+    return crc
+
+
+def wrap_bits(bits, width: int, height: int, bytes_per_line: int, channels: int) -> np.ndarray:
+    """
+    Read-only (height, width, channels) view over a raw pixel buffer, without copying.
+    Rows may be padded: `bytes_per_line` is the stride between rows.
+    """
+    buf = np.frombuffer(bits, dtype=np.uint8, count=bytes_per_line * height)
+    return np.lib.stride_tricks.as_strided(
+        buf, shape=(height, width, channels), strides=(bytes_per_line, channels, 1), writeable=False
+    )
+
+
+class FramePool:
+    """
+    Per-screen BGR/gray destination buffers reused across polls.
+
+    Each screen has `slots` buffer pairs used round-robin, so a frame stays
+    valid until `slots` more frames of the same screen have been acquired
+    (the default of 2 keeps the previous poll alive for frame-to-frame diffs).
+    Buffers are only reallocated when a screen changes resolution.
+    """
+    def __init__(self, slots: int = 2):
+        self.slots = slots
+        self._buffers: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._next: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.allocations = 0
+
+    def acquire(self, screen_index: int, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (bgr, gray) buffers of the given size for the next frame of a screen."""
+        with self._lock:
+            ring = self._buffers.setdefault(screen_index, [])
+            slot = self._next.get(screen_index, 0)
+            self._next[screen_index] = (slot + 1) % self.slots
+            self.frames += 1
+
+            if slot < len(ring) and ring[slot][0].shape[:2] == (height, width):
+                return ring[slot]
+
+            pair = (np.empty((height, width, 3), dtype=np.uint8), np.empty((height, width), dtype=np.uint8))
+            self.allocations += 2
+            if slot < len(ring):
+                ring[slot] = pair
+            else:
+                ring.append(pair)
+            return pair
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "allocations": self.allocations,
+                "allocations_per_frame": self.allocations / self.frames if self.frames else 0.0,
+                "pooled_bytes": sum(b.nbytes + g.nbytes for ring in self._buffers.values() for b, g in ring),
+            }
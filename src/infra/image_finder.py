@@ -0,0 +1,445 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.infra.diagnostics import MatchDiagnostics
+from src.infra.features import FEATURE_MODE, FeatureMatcher
+from src.infra.frames import Rect, ScreenFrame
+from src.infra.incremental import INCREMENTAL_MODE, IncrementalMatcher
+from src.infra.match_cache import MatchResultCache
+from src.infra.matcher import candidates_pyramid, get_candidate_matcher, match_all, pyramid_factor, verify_color
+from src.infra.template_cache import CachedTemplate, TemplateCache
+from src.infra.tiled import TILED_MODE, TiledMatcher
+
+
+@dataclass
+class FrameMatch:
+    score: float
+    screen_index: int
+    loc: Tuple[int, int] # Top-left in screen pixels
+    size: Tuple[int, int] = (0, 0) # Matched template (w, h) in screen pixels
+    ratio: float = 1.0 # Resize applied to the template file
+
+
+@dataclass(frozen=True)
+class Anchor:
+    """
+    A unique template the target is searched next to, e.g. the label in front
+    of one of many identical buttons.
+
+    offset: (dx, dy, w, h) in logical pixels from the anchor's center; the
+            target is only searched inside that window.
+    anchor: the anchor may itself be found relative to another anchor.
+    """
+    image_path: str
+    offset: Rect
+    confidence: float = 0.9
+    mode: Optional[str] = None
+    exclude: Optional[Rect] = None
+    anchor: Optional["Anchor"] = None
+
+
+@dataclass
+class MatchRequest:
+    """One template of a batch search (same options as ImageFinder.find)."""
+    image_path: str
+    confidence: float = 0.9
+    mode: Optional[str] = None
+    region: Optional[Rect] = None
+    near_last: bool = True
+    exclude: Optional[Rect] = None
+    anchor: Optional[Anchor] = None
+
+
+class _GrabOnce:
+    """Screen source that grabs once, so an anchor and its target are matched on the same frame."""
+    def __init__(self, source):
+        self.index = source.index
+        self._source = source
+        self._grabbed = False
+        self._frame = None
+
+    def grab(self) -> Optional[ScreenFrame]:
+        if not self._grabbed:
+            self._frame = self._source.grab()
+            self._grabbed = True
+        return self._frame
+
+
+def intersect(a: Rect, b: Rect) -> Optional[Rect]:
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1 = min(a[0] + a[2], b[0] + b[2])
+    y1 = min(a[1] + a[3], b[1] + b[3])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class ImageFinder:
+    """
+    Screen-agnostic part of IMAGE_MATCH: given screen sources, find a template.
+
+    `screens` passed to `find` are objects with an `index` attribute and a
+    `grab()` method returning a ScreenFrame (a ScreenFrame is its own source).
+    Screens are grabbed lazily, so an early hit skips grabbing the rest.
+
+    Keeps per-template state between polls:
+    - the last hit, so the next poll first checks a padded window around it
+    - the screen the template was last found on, which is searched first
+    - the template resize that matched on each screen (for unknown capture scales)
+    - with mode "incremental", the response maps of the previous poll
+    - with mode "feature", the ORB keypoints of each template
+
+    Mode "tiled" is the exhaustive search spread over all cores, for very large frames.
+    """
+    def __init__(self, template_cache: TemplateCache = None, max_workers: int = None,
+                 diagnostics: MatchDiagnostics = None, result_cache: MatchResultCache = None):
+        self.template_cache = template_cache if template_cache else TemplateCache()
+        # Results per (template, frame fingerprint, rect): unchanged screens are not re-matched
+        self.result_cache = result_cache if result_cache else MatchResultCache()
+        # Disabled unless explicitly configured
+        self.diagnostics = diagnostics if diagnostics else MatchDiagnostics()
+        # Dirty-tile matcher, stateful across polls
+        self.incremental = IncrementalMatcher()
+        # ORB keypoint matcher with per-template and per-grab feature caches
+        self.features = FeatureMatcher()
+        # Exhaustive search split into blocks on its own thread pool
+        self.tiled = TiledMatcher()
+        # template path -> last FrameMatch (cleared on a miss)
+        self.last_hits: Dict[str, FrameMatch] = {}
+        # template path -> screen index it was last found on (kept across misses)
+        self.last_screens: Dict[str, int] = {}
+        # (template path, screen index) -> template resize ratio that last matched there
+        self.last_ratios: Dict[Tuple[str, int], float] = {}
+        # Scale factors of every screen seen so far: the candidate capture scales
+        # of templates whose file name does not record one
+        self.screen_scales = set()
+        # Guards the last_* dicts and screen_scales: find_many runs `find` on several threads
+        self._state_lock = threading.Lock()
+        self.max_workers = max_workers if max_workers else min(4, os.cpu_count() or 1)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._batch_pool: Optional[ThreadPoolExecutor] = None
+
+    def find(self, image_path: str, screens: list, confidence: float = 0.9,
+             mode: str = None, region: Optional[Rect] = None, near_last: bool = True,
+             parallel: bool = False, exclude: Optional[Rect] = None,
+             anchor: Optional[Anchor] = None) -> Optional[Tuple[int, int]]:
+        """
+        Return the logical center of the first match that clears `confidence`, or None.
+
+        Templates are resized to each screen's scale (see `template_variants`).
+        region: optional (x, y, w, h) in global logical coordinates to restrict the search.
+        near_last: search a padded window around the previous hit before scanning everything.
+        parallel: when the preferred screen misses, match the remaining screens
+                  concurrently in a thread pool (OpenCV releases the GIL).
+        exclude: optional (x, y, w, h) rect of the template's pixels to ignore, on top
+                 of its PNG transparency (see TemplateCache.get).
+        anchor: find this template first and search only the window it defines
+                (see `anchored_region`); `region` then limits the anchor search.
+        """
+        cached = self.template_cache.get(image_path, exclude=exclude)
+        if cached is None:
+            print("[Finder] Failed to load template image.")
+            return None
+        if anchor is not None:
+            screens = [_GrabOnce(s) for s in screens]
+            region = self.anchored_region(anchor, screens, region)
+            if region is None:
+                return None
+
+        match_fn = self.match_fn(mode)
+        key = cached.path
+
+        grabbed: Dict[int, Optional[ScreenFrame]] = {}
+
+        def frame_of(source) -> Optional[ScreenFrame]:
+            if source.index not in grabbed:
+                grabbed[source.index] = source.grab()
+            return grabbed[source.index]
+
+        def scan(frame: ScreenFrame) -> Optional[FrameMatch]:
+            search = self._clip(frame, (0, 0, frame.width, frame.height), region)
+            if not search:
+                return None
+            best_hit = None
+            for variant in self.template_variants(cached, frame):
+                hit = self._match_in(frame, search, variant, confidence, match_fn)
+                if hit is None:
+                    continue
+                if best_hit is None or hit.score > best_hit.score:
+                    best_hit = hit
+                if hit.score >= confidence:
+                    break
+            if best_hit is not None:
+                print(f"[Finder] Screen {frame.index} Match: {best_hit.score:.4f} (x{best_hit.ratio:g})")
+            return best_hit
+
+        # 1. Locality: re-check around the previous hit
+        with self._state_lock:
+            last = self.last_hits.get(key)
+            preferred = self.last_screens.get(key)
+        if near_last and last is not None:
+            source = next((s for s in screens if s.index == last.screen_index), None)
+            frame = frame_of(source) if source is not None else None
+            variant = cached if last.ratio == 1.0 else self.template_cache.get(key, last.ratio, cached.exclude)
+            if frame is not None and variant is not None:
+                pad_w, pad_h = variant.width, variant.height
+                window = (last.loc[0] - pad_w, last.loc[1] - pad_h,
+                          variant.width + 2 * pad_w, variant.height + 2 * pad_h)
+                window = self._clip(frame, window, region)
+                if window:
+                    hit = self._match_in(frame, window, variant, confidence, match_fn)
+                    if hit and hit.score >= confidence:
+                        print(f"[Finder] Hit near last location: {hit.score:.4f}")
+                        return self._accept(key, frame, hit)
+
+        # 2. Full scan, screen the template was last seen on first, stop at the first hit
+        ordered = sorted(screens, key=lambda s: s.index != preferred)
+        sequential = ordered[:1] if parallel else ordered
+
+        best: Optional[FrameMatch] = None
+        for source in sequential:
+            frame = frame_of(source)
+            hit = scan(frame) if frame is not None else None
+            if hit is None:
+                continue
+            if hit.score >= confidence:
+                return self._accept(key, frame, hit)
+            if best is None or hit.score > best.score:
+                best = hit
+
+        if parallel and len(ordered) > 1:
+            # Grabbing stays on the calling thread; only matching is fanned out
+            frames = [f for f in (frame_of(s) for s in ordered[1:]) if f is not None]
+            futures = {self._executor().submit(scan, f): f for f in frames}
+            for future in as_completed(futures):
+                hit = future.result()
+                if hit is None:
+                    continue
+                if hit.score >= confidence:
+                    return self._accept(key, futures[future], hit)
+                if best is None or hit.score > best.score:
+                    best = hit
+
+        print(f"[Finder] Final Best Match: {best.score if best else -1} (Required: {confidence})")
+        with self._state_lock:
+            self.last_hits.pop(key, None)
+        return None
+
+    def find_all(self, image_path: str, screens: list, confidence: float = 0.9,
+                 region: Optional[Rect] = None, sort: str = "position",
+                 max_hits: int = None, exclude: Optional[Rect] = None) -> List[Tuple[int, int]]:
+        """
+        Logical centers of every occurrence scoring >= `confidence` on all screens.
+
+        sort: "position" (top-to-bottom, then left-to-right) or "score" (best first).
+        max_hits: keep only the best-scoring hits (before sorting by position).
+        Color matching only; overlapping windows are collapsed by non-maximum suppression.
+        Per screen, the first template scale (see `template_variants`) with any hit is used.
+        """
+        cached = self.template_cache.get(image_path, exclude=exclude)
+        if cached is None:
+            print("[Finder] Failed to load template image.")
+            return []
+
+        hits = []
+        for source in screens:
+            frame = source.grab()
+            if frame is None:
+                continue
+            rect = self._clip(frame, (0, 0, frame.width, frame.height), region)
+            if not rect:
+                continue
+            x, y, w, h = rect
+            for variant in self.template_variants(cached, frame):
+                if variant.width > w or variant.height > h:
+                    continue
+                found = match_all(frame.bgr[y:y + h, x:x + w], variant.bgr, confidence,
+                                  max_hits=max_hits, mask=variant.mask)
+                for score, (lx, ly) in found:
+                    center = frame.to_logical(x + lx + variant.width // 2, y + ly + variant.height // 2)
+                    hits.append((score, center))
+                if found:
+                    break
+
+        # The best `max_hits` are kept whatever the order they are returned in
+        hits.sort(key=lambda hit: -hit[0])
+        if max_hits:
+            hits = hits[:max_hits]
+        if sort != "score":
+            hits.sort(key=lambda hit: (hit[1][1], hit[1][0]))
+        print(f"[Finder] Found {len(hits)} match(es) >= {confidence}")
+        return [center for _, center in hits]
+
+    def find_many(self, requests: List[MatchRequest], screens: list,
+                  parallel: bool = False) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        Match several templates against one shared grab of every screen.
+
+        Each screen is grabbed (and converted to gray) once, then the templates
+        are matched concurrently in their own thread pool (`parallel` screen
+        scans of `find` go to the shared one, so a batch can not wait on itself).
+        Returns image_path -> logical center or None.
+        """
+        frames = [f for f in (s.grab() for s in screens) if f is not None]
+        for frame in frames:
+            # Derived buffers are filled before fan-out so workers only read them
+            frame.gray
+            frame.fingerprint
+
+        def run(req: MatchRequest):
+            return self.find(req.image_path, frames, req.confidence, mode=req.mode,
+                             region=req.region, near_last=req.near_last, parallel=parallel,
+                             exclude=req.exclude, anchor=req.anchor)
+
+        if len(requests) == 1:
+            return {requests[0].image_path: run(requests[0])}
+        futures = {req.image_path: self._batch_executor().submit(run, req) for req in requests}
+        return {path: future.result() for path, future in futures.items()}
+
+    def anchored_region(self, anchor: Anchor, screens: list,
+                        region: Optional[Rect] = None) -> Optional[Rect]:
+        """
+        Logical search window defined by `anchor`, or None if the anchor is not on screen.
+
+        The anchor goes through `find` like any template, so its matches land in
+        the result cache: targets sharing an anchor (or a chain of anchors) on
+        an unchanged screen reuse them instead of searching again.
+        """
+        pos = self.find(anchor.image_path, screens, anchor.confidence, mode=anchor.mode, region=region,
+                        exclude=anchor.exclude, anchor=anchor.anchor)
+        if pos is None:
+            print(f"[Finder] Anchor not found: {os.path.basename(anchor.image_path)}")
+            return None
+        dx, dy, w, h = anchor.offset
+        return (pos[0] + dx, pos[1] + dy, w, h)
+
+    def shutdown(self):
+        for pool in (self._pool, self._batch_pool):
+            if pool is not None:
+                pool.shutdown(wait=False)
+        self._pool = self._batch_pool = None
+        self.tiled.shutdown()
+
+    def match_fn(self, mode: Optional[str]):
+        """Matcher for a `match_mode` node param (see src.infra.matcher.MATCHERS)."""
+        if mode == INCREMENTAL_MODE:
+            return self.incremental
+        if mode == FEATURE_MODE:
+            return self.features
+        if mode == TILED_MODE:
+            return self.tiled
+        return get_candidate_matcher(mode)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image-finder")
+        return self._pool
+
+    def _batch_executor(self) -> ThreadPoolExecutor:
+        if self._batch_pool is None:
+            self._batch_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image-batch")
+        return self._batch_pool
+
+    def template_variants(self, cached: CachedTemplate, frame: ScreenFrame) -> List[CachedTemplate]:
+        """
+        Template resized for this screen, in the order to try.
+
+        When the capture scale is recorded in the file name the ratio is picked
+        directly (frame scale / capture scale). Otherwise the template was
+        captured on one of the user's screens, so only the scales of the screens
+        seen so far are swept: this screen's own first (ratio 1.0), preceded by
+        the ratio that last matched here. Resized templates are kept in the
+        TemplateCache.
+        """
+        with self._state_lock:
+            self.screen_scales.add(frame.scale)
+            scales = sorted(self.screen_scales)
+            learned = self.last_ratios.get((cached.path, frame.index))
+        if cached.scale is not None:
+            ratios = [frame.scale / cached.scale]
+        else:
+            ratios = [1.0] + [frame.scale / scale for scale in scales if scale != frame.scale]
+            if learned is not None:
+                ratios.insert(0, learned)
+
+        variants, seen = [], set()
+        for ratio in ratios:
+            ratio = round(ratio, 3)
+            if ratio in seen:
+                continue
+            seen.add(ratio)
+            variant = cached if ratio == cached.ratio else self.template_cache.get(cached.path, ratio, cached.exclude)
+            if variant is not None:
+                variants.append(variant)
+        return variants
+
+    def _clip(self, frame: ScreenFrame, rect: Rect, region: Optional[Rect]) -> Optional[Rect]:
+        rect = intersect(rect, (0, 0, frame.width, frame.height))
+        if rect and region:
+            pixel_region = frame.logical_to_pixel_rect(region)
+            rect = intersect(rect, pixel_region) if pixel_region else None
+        return rect
+
+    def _match_in(self, frame: ScreenFrame, rect: Rect, cached: CachedTemplate,
+                  confidence: float, match_fn) -> Optional[FrameMatch]:
+        x, y, w, h = rect
+        # Skip if template too big
+        if cached.height > h or cached.width > w:
+            return None
+
+        cache_key = (cached.path, cached.mtime_ns, cached.ratio, cached.exclude, frame.index, frame.fingerprint,
+                     rect, match_fn, confidence)
+        hit = self.result_cache.get(cache_key)
+        if hit is not None:
+            return hit
+
+        if match_fn is self.features:
+            # Keypoints instead of correlation: survives covered or changed parts of the template
+            max_val, max_loc = match_fn(frame.gray[y:y + h, x:x + w], cached,
+                                        key=(frame.index, frame.fingerprint, rect))
+        else:
+            # 1. Grayscale search: one channel, about a third of the color cost
+            candidates = self._run(match_fn, frame.gray[y:y + h, x:x + w], cached, cached.gray,
+                                   (cached.path, cached.ratio, cached.exclude, frame.index, rect, "gray"))
+            if not candidates:
+                return None
+
+            # 2. Color check on the template-sized patch of each candidate only
+            max_val, max_loc = verify_color(frame.bgr[y:y + h, x:x + w], cached.bgr, candidates, cached.mask)
+
+            # 3. Grayscale Fallback (lighting differences sometimes favour gray)
+            if max_val < confidence and candidates[0][0] > max_val:
+                max_val, max_loc = candidates[0]
+
+        hit = FrameMatch(score=max_val, screen_index=frame.index, loc=(x + max_loc[0], y + max_loc[1]),
+                         size=cached.size, ratio=cached.ratio)
+        self.diagnostics.record(cached.path, frame.index, frame.bgr, rect, hit.score, hit.loc, cached.gray)
+        self.result_cache.put(cache_key, hit)
+        return hit
+
+    @staticmethod
+    def _run(match_fn, img, cached: CachedTemplate, template, state_key):
+        # Only the incremental matcher needs to know which search it is continuing
+        if isinstance(match_fn, IncrementalMatcher):
+            return match_fn.candidates(img, template, key=state_key, mask=cached.mask)
+        if isinstance(match_fn, TiledMatcher):
+            return match_fn.candidates(img, template, mask=cached.mask)
+        if match_fn is candidates_pyramid:
+            # Coarse gray level precomputed at load time (or read from the sidecar)
+            coarse = cached.pyramid.get(pyramid_factor(template.shape)) if template is cached.gray else None
+            return match_fn(img, template, mask=cached.mask, coarse_template=coarse)
+        return match_fn(img, template, mask=cached.mask)
+
+    def _accept(self, key: str, frame: ScreenFrame, hit: FrameMatch) -> Tuple[int, int]:
+        with self._state_lock:
+            self.last_hits[key] = hit
+            self.last_screens[key] = hit.screen_index
+            self.last_ratios[(key, hit.screen_index)] = hit.ratio
+        center_x = hit.loc[0] + hit.size[0] // 2
+        center_y = hit.loc[1] + hit.size[1] // 2
+        logical = frame.to_logical(center_x, center_y)
+        print(f"[Finder] Found at Physical({center_x}, {center_y}) -> Logical{logical}")
+        return logical
@@ -0,0 +1,166 @@
+"""
+Incremental (dirty-tile) template matching between consecutive polls.
+
+The TM_CCOEFF_NORMED response at a location only depends on the frame patch
+under the template. The response map is therefore computed in blocks, and
+on the next poll only blocks whose input window (block + template size - 1)
+touches a changed tile are recomputed; the rest is reused from the previous
+poll.
+
+Exactness: every block is always computed from the same input window, so the
+incremental response is bit-identical to recomputing all blocks from scratch
+(`IncrementalMatcher.full_response`). Against a single full-frame
+matchTemplate call the scores differ only by OpenCV's float accumulation
+(~1e-5), well inside matcher.PYRAMID_SCORE_TOLERANCE.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.infra.matcher import VERIFY_TOP_K, Match, match_template, top_candidates
+
+INCREMENTAL_MODE = "incremental"  # ImageFinder match mode backed by IncrementalMatcher
+
+DIRTY_TILE = 64         # Change detection granularity (px)
+MIN_BLOCK = 256         # Smallest response block (px), larger for large templates
+
+
+def dirty_tiles(prev: np.ndarray, cur: np.ndarray, tile: int = DIRTY_TILE,
+                diff_buf: np.ndarray = None) -> np.ndarray:
+    """
+    Boolean (rows, cols) map of `tile`-sized tiles whose pixels differ.
+    Fully vectorized: one absdiff and two max-reductions.
+    """
+    diff = cv2.absdiff(prev, cur, dst=diff_buf)
+    h, w = diff.shape[:2]
+    channels = diff.shape[2] if diff.ndim == 3 else 1
+    # Channels are folded into the row, so a tile is `tile * channels` bytes wide
+    flat = diff.reshape(h, w * channels)
+    rows = np.maximum.reduceat(flat, np.arange(0, h, tile), axis=0)
+    tiles = np.maximum.reduceat(rows, np.arange(0, w * channels, tile * channels), axis=1)
+    return tiles > 0
+
+
+def block_size(template_shape, tile: int = DIRTY_TILE) -> int:
+    """Response block edge: big enough that the template margin stays a small overhead."""
+    t_h, t_w = template_shape[:2]
+    size = max(MIN_BLOCK, 2 * max(t_h, t_w))
+    return -(-size // tile) * tile
+
+
+def response_blocks(res_shape, block: int) -> List[Tuple[int, int, int, int]]:
+    """(y0, y1, x0, x1) blocks covering a response map."""
+    r_h, r_w = res_shape
+    return [(y, min(y + block, r_h), x, min(x + block, r_w))
+            for y in range(0, r_h, block) for x in range(0, r_w, block)]
+
+
+@dataclass
+class _State:
+    template: np.ndarray
+    mask: Optional[np.ndarray]
+    prev: np.ndarray
+    response: np.ndarray
+    diff_buf: np.ndarray
+
+
+class IncrementalMatcher:
+    """
+    Stateful matcher: `matcher(frame, template, key)` behaves like
+    `match_exhaustive` but reuses the previous poll's response map for the
+    same `key` (e.g. screen + searched rect + channel) wherever the frame did
+    not change. Keys only affect reuse, never correctness: the diff is always
+    taken against the pixels the stored response was computed from.
+    """
+    def __init__(self, tile: int = DIRTY_TILE, max_states: int = 8):
+        self.tile = tile
+        self.max_states = max_states
+        self._states: "OrderedDict[Hashable, _State]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.full_updates = 0
+        self.incremental_updates = 0
+        self.blocks_recomputed = 0
+
+    def __call__(self, frame: np.ndarray, template: np.ndarray, key: Hashable = None,
+                 mask: np.ndarray = None) -> Match:
+        res = self.response(frame, template, key, mask)
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        return max_val, max_loc
+
+    def candidates(self, frame: np.ndarray, template: np.ndarray, k: int = VERIFY_TOP_K,
+                   key: Hashable = None, mask: np.ndarray = None) -> List[Match]:
+        """The `k` best distinct windows, best first (see matcher.candidates_exhaustive)."""
+        # The stored response is reused by the next poll: suppress on a copy
+        res = self.response(frame, template, key, mask).copy()
+        t_h, t_w = template.shape[:2]
+        return top_candidates(res, k, (max(1, t_w // 2), max(1, t_h // 2)))
+
+    def response(self, frame: np.ndarray, template: np.ndarray, key: Hashable = None,
+                 mask: np.ndarray = None) -> np.ndarray:
+        t_h, t_w = template.shape[:2]
+        res_shape = (frame.shape[0] - t_h + 1, frame.shape[1] - t_w + 1)
+        block = block_size(template.shape, self.tile)
+        key = (key, frame.shape, template.shape)
+
+        with self._lock:
+            state = self._states.pop(key, None)
+
+        if state is None or state.template is not template or state.mask is not mask:
+            state = _State(
+                template=template,
+                mask=mask,
+                prev=np.ascontiguousarray(frame).copy(),
+                response=self.full_response(frame, template, block, mask),
+                diff_buf=np.empty_like(frame),
+            )
+            self.full_updates += 1
+        else:
+            dirty = dirty_tiles(state.prev, frame, self.tile, state.diff_buf)
+            if dirty.any():
+                tile = self.tile
+                for y0, y1, x0, x1 in response_blocks(res_shape, block):
+                    # Tiles covered by this block's input window
+                    ty0, ty1 = y0 // tile, (y1 + t_h - 2) // tile + 1
+                    tx0, tx1 = x0 // tile, (x1 + t_w - 2) // tile + 1
+                    if dirty[ty0:ty1, tx0:tx1].any():
+                        self._match_block(frame, template, mask, state.response, y0, y1, x0, x1)
+                        self.blocks_recomputed += 1
+                np.copyto(state.prev, frame)
+            self.incremental_updates += 1
+
+        with self._lock:
+            self._states[key] = state
+            while len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+        return state.response
+
+    def full_response(self, frame: np.ndarray, template: np.ndarray, block: Optional[int] = None,
+                      mask: np.ndarray = None) -> np.ndarray:
+        """Blockwise response from scratch (the reference the incremental path reproduces bit for bit)."""
+        t_h, t_w = template.shape[:2]
+        block = block if block else block_size(template.shape, self.tile)
+        res = np.empty((frame.shape[0] - t_h + 1, frame.shape[1] - t_w + 1), dtype=np.float32)
+        for y0, y1, x0, x1 in response_blocks(res.shape, block):
+            self._match_block(frame, template, mask, res, y0, y1, x0, x1)
+        return res
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def stats(self) -> dict:
+        return {
+            "full_updates": self.full_updates,
+            "incremental_updates": self.incremental_updates,
+            "blocks_recomputed": self.blocks_recomputed,
+        }
+
+    @staticmethod
+    def _match_block(frame, template, mask, res, y0, y1, x0, x1):
+        t_h, t_w = template.shape[:2]
+        window = frame[y0:y1 + t_h - 1, x0:x1 + t_w - 1]
+        res[y0:y1, x0:x1] = match_template(window, template, mask)
@@ -1,12 +1,43 @@
 import time
+from contextlib import nullcontext
 from pynput.mouse import Button, Controller as MouseController
 from pynput.keyboard import Controller as KeyboardController
-from src.infra.screen import MacScreenManager
+from src.infra.template_cache import TemplateCache
+from src.infra.image_finder import ImageFinder
+from src.infra.diagnostics import MatchDiagnostics
+from src.infra.frames import FramePool, fingerprint
+from src.infra.match_cache import MatchResultCache
+from src.infra.capture import CaptureBackend, create_backend
+from src.infra.watcher import ScreenWatcher
+from src.infra.ocr import OcrBackend, shared_ocr_backend
+from src.infra.text_index import MIN_TEXT_SCORE, TextIndexer, find_text
+
+OCR_CACHE_SIZE = 64
 
 class InputDriver:
-    def __init__(self):
+    def __init__(self, capture: CaptureBackend = None, watcher: ScreenWatcher = None, ocr: OcrBackend = None):
         self.mouse = MouseController()
         self.keyboard = KeyboardController()
+        # Decoded templates and last-hit locations survive across IMAGE_MATCH retries
+        self.template_cache = TemplateCache()
+        self.image_finder = ImageFinder(self.template_cache, diagnostics=MatchDiagnostics.from_env())
+        # Screen grabs reuse the same BGR/gray buffers poll after poll
+        self.frame_pool = FramePool()
+        # Qt by default; mss or recorded frames from disk via AUTOFLOW_CAPTURE
+        self.capture = capture if capture else create_backend(pool=self.frame_pool)
+        # Optional background capture (AUTOFLOW_WATCH_FPS): image nodes then share its freshest frames
+        if watcher is None and capture is None:
+            watcher = ScreenWatcher.from_env(create_backend)
+        self.watcher = watcher
+        # time.monotonic() of the last mouse/keyboard action: frames grabbed before it are stale
+        self.last_input = 0.0
+        # Recognized text per (OCR settings, region pixel fingerprint): unchanged regions skip recognition
+        self.ocr_cache = MatchResultCache(max_entries=OCR_CACHE_SIZE)
+        # Vision on macOS, Tesseract elsewhere, in a persistent worker process (AUTOFLOW_OCR, AUTOFLOW_OCR_WORKER),
+        # shared by every driver of the process
+        self.ocr = ocr if ocr else shared_ocr_backend()
+        # Word boxes per screen frame for find_text; only changed tiles are OCR'd again
+        self.text_indexer = TextIndexer(self.ocr)
         # Cache screen info for coordinate conversion if needed
         # In a real app, we might check this dynamicall
         
@@ -22,10 +53,12 @@ class InputDriver:
         if button == "middle": btn = Button.middle
         
         self.mouse.click(btn, 2 if double else 1)
+        self.last_input = time.monotonic()
         print(f"[Driver] Clicked {button}")
 
     def move(self, x: int, y: int):
         self.mouse.position = (x, y)
+        self.last_input = time.monotonic()
         print(f"[Driver] Moved to ({x}, {y})")
 
     def scroll(self, dx: int, dy: int, x: int = 0, y: int = 0):
@@ -65,7 +98,8 @@ class InputDriver:
                 time.sleep(0.005)
             if abs_dx % 5 != 0:
                 self.mouse.scroll(total_dx % 5 if total_dx > 0 else -(abs_dx % 5), 0)
-            
+
+        self.last_input = time.monotonic()
         print(f"[Driver] Scrolled DX={dx}, DY={dy} (Scaled x{multiplier})")
 
     def drag(self, start: tuple, end: tuple):
@@ -76,12 +110,14 @@ class InputDriver:
         self.mouse.position = end
         time.sleep(0.1)
         self.mouse.release(Button.left)
+        self.last_input = time.monotonic()
         print(f"[Driver] Dragged {start} -> {end}")
 
     def type_text(self, text: str, interval: float = 0.05):
         for char in text:
             self.keyboard.type(char)
             time.sleep(interval)
+        self.last_input = time.monotonic()
         print(f"[Driver] Typed: {text}")
         
     def press_key(self, keys: str):
@@ -131,156 +167,211 @@ class InputDriver:
         
         try:
             _press_recursive(0)
+            self.last_input = time.monotonic()
             print(f"[Driver] Executed Hotkey: {keys}")
         except Exception as e:
             print(f"[Driver] Hotkey Failed ({keys}): {e}")
 
     def read_text_at(self, x: int, y: int, w: int, h: int) -> str:
-        """Read text from a specific screen region (Cross-platform)."""
-        import sys
-        
-        if sys.platform == "darwin":
-            try:
-                from PySide6.QtWidgets import QApplication
-                import Quartz
-                import Vision
-                screen = QApplication.primaryScreen()
-                ratio = screen.devicePixelRatio()
-                rect = Quartz.CGRectMake(x * ratio, y * ratio, w * ratio, h * ratio)
-                image_ref = Quartz.CGWindowListCreateImage(
-                    rect, Quartz.kCGWindowListOptionOnScreenOnly, Quartz.kCGNullWindowID, Quartz.kCGWindowImageDefault
-                )
-                if not image_ref: return ""
-                text_results = []
-                def completion_handler(request, error):
-                    if not error:
-                        for obs in request.results():
-                            if obs.topCandidates_(1): text_results.append(obs.topCandidates_(1)[0].string())
-                request = Vision.VNRecognizeTextRequest.alloc().initWithCompletionHandler_(completion_handler)
-                request.setRecognitionLevel_(Vision.VNRequestRecognitionLevelAccurate)
-                request.setRecognitionLanguages_(["ko-KR", "en-US"])
-                handler = Vision.VNImageRequestHandler.alloc().initWithCGImage_options_(image_ref, None)
-                handler.performRequests_error_([request], None)
-                return " ".join(text_results)
-            except: return ""
-
-        elif sys.platform == "win32":
-            try:
-                import pytesseract
-                from PIL import ImageGrab
-                # On Windows, we need to handle DPI Scaling
-                # ImageGrab.grab takes screen coordinates. 
-                # Some setups need scaling adjustment.
-                bbox = (x, y, x + w, y + h)
-                screenshot = ImageGrab.grab(bbox=bbox)
-                # Ensure tesseract is installed or path is set
-                # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-                text = pytesseract.image_to_string(screenshot, lang='kor+eng')
-                return text.strip()
-            except Exception as e:
-                print(f"[Driver] Windows OCR Error: {e}. Ensure 'pytesseract' and Tesseract-OCR are installed.")
+        """
+        Read text from a logical screen region with the configured OCR backend (see src.infra.ocr).
+        A region whose pixels and OCR settings match an earlier call is answered from `ocr_cache`.
+        """
+        try:
+            pixels = self._region_pixels(x, y, w, h)
+            if pixels is None:
+                print(f"[Driver] OCR region ({x}, {y}, {w}, {h}) is off screen")
                 return ""
-        
-        return ""
+            return self._cached_ocr(self.ocr.settings, pixels, lambda: self.ocr.recognize(pixels))
+        except Exception as e:
+            print(f"[Driver] OCR Error ({self.ocr.name}): {e}")
+            return ""
+
+    def _cached_ocr(self, settings: tuple, pixels, recognize) -> str:
+        """Text of `pixels`, recognized by `recognize()` only if these pixels and settings were not seen before."""
+        key = (settings, fingerprint(pixels))
+        text = self.ocr_cache.get(key)
+        if text is not None:
+            print("[Driver] OCR region unchanged, reusing text")
+            return text
+        text = recognize()
+        self.ocr_cache.put(key, text)
+        return text
+
+    def read_texts_at(self, regions: dict) -> dict:
+        """
+        Batch version of read_text_at: `regions` maps names to logical (x, y, w, h).
+        Every screen is grabbed once, the regions are cropped from the shared
+        frame without copying and recognized concurrently; returns name -> text
+        ("" for regions off screen). Unchanged regions are answered from `ocr_cache`.
+        """
+        texts = {name: "" for name in regions}
+        if not regions:
+            return texts
+        x0 = min(r[0] for r in regions.values())
+        y0 = min(r[1] for r in regions.values())
+        x1 = max(r[0] + r[2] for r in regions.values())
+        y1 = max(r[1] + r[3] for r in regions.values())
+        settings = self.ocr.settings
+        try:
+            # Views into the grabbed frames: valid until the block exits
+            with self._screens((x0, y0, x1 - x0, y1 - y0)) as sources:
+                views = self._region_views(regions, sources)
+                for name in regions.keys() - views.keys():
+                    print(f"[Driver] OCR region {name} {regions[name]} is off screen")
+                keys = {name: (settings, fingerprint(view)) for name, view in views.items()}
+                pending = []
+                for name, key in keys.items():
+                    text = self.ocr_cache.get(key)
+                    if text is None:
+                        pending.append(name)
+                    else:
+                        texts[name] = text
+                if len(pending) < len(keys):
+                    print(f"[Driver] OCR reusing text of {len(keys) - len(pending)} unchanged region(s)")
+                for name, text in zip(pending, self.ocr.recognize_many([views[name] for name in pending])):
+                    self.ocr_cache.put(keys[name], text)
+                    texts[name] = text
+        except Exception as e:
+            print(f"[Driver] OCR Error ({self.ocr.name}): {e}")
+        return texts
+
+    def find_text(self, text: str, region: tuple = None, min_score: float = MIN_TEXT_SCORE):
+        """
+        Logical center of the visible text most similar to `text` (see src.infra.text_index), or None.
+        `region` optionally limits the search to a logical (x, y, w, h) rect.
+        """
+        best = None
+        with self._screens(region) as sources:
+            for source in sources:
+                frame = source.grab()
+                if frame is None:
+                    continue
+                pixel_rect = frame.logical_to_pixel_rect(region) if region else None
+                if region and not pixel_rect:
+                    continue
+                hit = find_text(self.text_indexer, frame, text, min_score, pixel_rect)
+                if hit and (best is None or hit.score > best[0]):
+                    best = (hit.score, frame.to_logical(*hit.center), hit.text)
+        if best is None:
+            print(f"[Driver] Text not found: {text}")
+            return None
+        print(f"[Driver] Found text '{best[2]}' ({best[0]:.2f}) at {best[1]}")
+        return best[1]
 
     def wait(self, seconds: float):
         print(f"[Driver] Waiting {seconds}s...")
         time.sleep(seconds)
 
-    def find_image(self, image_path: str, confidence: float = 0.9):
-        import cv2
-        import numpy as np
-        from PySide6.QtWidgets import QApplication
-        from PySide6.QtGui import QImage
+    def find_image(self, image_path: str, confidence: float = 0.9, mode: str = None,
+                   region: tuple = None, near_last: bool = True, parallel: bool = False,
+                   exclude: tuple = None, anchor=None):
+        """
+        Locate a template on any screen and return its logical center, or None.
+        `mode` selects the matching strategy (see src.infra.matcher.MATCHERS),
+        `region` optionally limits the search to a logical (x, y, w, h) rect,
+        `parallel` matches the other screens concurrently after a miss on the preferred one,
+        `exclude` is an (x, y, w, h) rect of template pixels ignored while matching,
+        `anchor` (src.infra.image_finder.Anchor) limits the search to a window next to another template.
+        """
         import os
 
         if not os.path.exists(image_path):
             print(f"[Driver] Image not found: {image_path}")
             return None
 
-        # Load Template
-        template = cv2.imread(image_path)
-        if template is None:
-             print("[Driver] Failed to load template image.")
-             return None
-             
-        t_h, t_w = template.shape[:2]
-        
-        # Search all screens
-        screens = QApplication.screens()
-        
-        # Global best match
-        best_val = -1
-        best_loc = None
-        best_screen_origin = (0, 0)
-        scale_factor = 1.0
-        
-        # Helper for matching
-        def try_match(img, tmpl, method=cv2.TM_CCOEFF_NORMED):
-            res = cv2.matchTemplate(img, tmpl, method)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-            return max_val, max_loc
+        # Screens are only grabbed when the finder actually needs them,
+        # and screens the search region does not touch are skipped entirely
+        with self._screens(region) as sources:
+            return self.image_finder.find(
+                image_path, sources, confidence, mode=mode, region=region, near_last=near_last, parallel=parallel,
+                exclude=exclude, anchor=anchor
+            )
 
-        for screen in screens:
-            # ... (Screen Grab logic same as before, assuming already in loop)
-            # Grab from the specific target screen
-            pixmap = screen.grabWindow(0) 
-            
-            # DEBUG SAVE
-            debug_path = f"debug_screen_{screens.index(screen)}.png"
-            pixmap.save(debug_path)
-            
-            # Conversion
-            qimage = pixmap.toImage().convertToFormat(QImage.Format_RGB888)
-            width, height = qimage.width(), qimage.height()
-            ptr = qimage.bits()
-            arr = np.array(ptr).reshape(height, width, 3)
-            screen_bgr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
-            
-            # Skip if template too big
-            if t_h > height or t_w > width:
+    def find_all_images(self, image_path: str, confidence: float = 0.9, region: tuple = None,
+                        sort: str = "position", max_hits: int = None, exclude: tuple = None) -> list:
+        """Logical centers of every occurrence of a template (see ImageFinder.find_all)."""
+        import os
+
+        if not os.path.exists(image_path):
+            print(f"[Driver] Image not found: {image_path}")
+            return []
+        with self._screens(region) as sources:
+            return self.image_finder.find_all(image_path, sources, confidence, region=region, sort=sort,
+                                              max_hits=max_hits, exclude=exclude)
+
+    def find_images(self, requests: list, parallel: bool = False) -> dict:
+        """
+        Batch version of find_image: every screen is grabbed once and all
+        templates are matched against the shared frame in parallel.
+        `requests` are MatchRequest objects; returns image_path -> logical center or None.
+        `parallel` is find_image's: other screens are matched concurrently after a miss.
+        """
+        import os
+
+        results = {}
+        pending = []
+        for req in requests:
+            if os.path.exists(req.image_path):
+                pending.append(req)
+            else:
+                print(f"[Driver] Image not found: {req.image_path}")
+                results[req.image_path] = None
+        if not pending:
+            return results
+
+        # Only screens some request can see are grabbed
+        with self._screens() as sources:
+            if all(req.region for req in pending):
+                visible = {s.index for req in pending for s in self.capture.screen_sources(req.region)}
+                sources = [s for s in sources if s.index in visible]
+            results.update(self.image_finder.find_many(pending, sources, parallel=parallel))
+        return results
+
+    def _screens(self, region: tuple = None):
+        """
+        Screen sources as a context manager: the watcher's freshest frames
+        (captured after the last input) when it is enabled, lazy grabs otherwise.
+        """
+        if self.watcher is None:
+            return nullcontext(self.capture.screen_sources(region))
+        return self.watcher.snapshot(region, newer_than=self.last_input)
+
+    def _region_pixels(self, x: int, y: int, w: int, h: int):
+        """BGR pixels of a logical rect from the first screen it touches (None if off screen)."""
+        with self._screens((x, y, w, h)) as sources:
+            view = self._region_views({None: (x, y, w, h)}, sources).get(None)
+            # Frame buffers are reused by the next grab (or once the watcher lease ends)
+            return view.copy() if view is not None else None
+
+    @staticmethod
+    def _region_views(regions: dict, sources) -> dict:
+        """name -> BGR view of each logical rect in the first screen it touches; each screen is grabbed once."""
+        views = {}
+        for source in sources:
+            pending = {name: rect for name, rect in regions.items() if name not in views}
+            if not pending:
+                break
+            frame = source.grab()
+            if frame is None:
                 continue
+            for name, rect in pending.items():
+                pixel_rect = frame.logical_to_pixel_rect(rect)
+                if pixel_rect:
+                    rx, ry, rw, rh = pixel_rect
+                    views[name] = frame.bgr[ry:ry + rh, rx:rx + rw]
+        return views
 
-            # 1. Color Match
-            max_val, max_loc = try_match(screen_bgr, template)
-            print(f"[Driver] Screen {screens.index(screen)} Color Match: {max_val:.4f}")
-            
-            # 2. Grayscale Fallback (if Color failed to meet strict confidence but might be close)
-            # Actually, sometimes Color is 0.85, Gray is 0.95 (lighting diffs).
-            # Let's try both and take best? 
-            # Or only try Gray if Color < Confidence.
-            
-            if max_val < confidence:
-                screen_gray = cv2.cvtColor(screen_bgr, cv2.COLOR_BGR2GRAY)
-                template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-                g_val, g_loc = try_match(screen_gray, template_gray)
-                print(f"[Driver] Screen {screens.index(screen)} Gray Match: {g_val:.4f}")
-                
-                if g_val > max_val:
-                    max_val = g_val
-                    max_loc = g_loc
-            
-            if max_val > best_val:
-                best_val = max_val
-                best_loc = max_loc
-                best_screen_origin = screen.geometry().topLeft()
-                scale_factor = screen.devicePixelRatio()
-        
-        print(f"[Driver] Final Best Match: {best_val} (Required: {confidence})")
-        
-        if best_val >= confidence:
-            # Calculate Center
-            center_x = best_loc[0] + t_w // 2
-            center_y = best_loc[1] + t_h // 2
-            
-            # Convert Physical (from grabWindow) to Logical (for pynput)
-            # This assumes grabWindow returns physical pixels (Retina).
-            # And pynput takes logical.
-            
-            logical_x = (center_x / scale_factor) + best_screen_origin.x()
-            logical_y = (center_y / scale_factor) + best_screen_origin.y()
-            
-            print(f"[Driver] Found at Physical({center_x}, {center_y}) -> Logical({logical_x}, {logical_y})")
-            return (int(logical_x), int(logical_y))
-            
-        return None
+    def report_match_failure(self, image_path: str):
+        """Dump buffered match diagnostics for a template that was never found (no-op unless enabled)."""
+        self.image_finder.diagnostics.dump(image_path)
+
+    def close(self):
+        """
+        Stop the screen watcher and the matching thread pools of a discarded driver.
+        The OCR backend stays open: the default one is shared by the process
+        (closed at exit) and one passed in belongs to the caller.
+        """
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.image_finder.shutdown()
@@ -0,0 +1,270 @@
+"""
+Template matching strategies used by IMAGE_MATCH.
+
+Every matcher takes a frame and a template with the same channel layout and
+returns `(score, (x, y))`: the best TM_CCOEFF_NORMED score and the top-left
+pixel of the matching window in frame coordinates. The `candidates_*`
+variants return the best few distinct windows instead, so ImageFinder can
+search the grayscale frame and confirm color only at those windows.
+
+All of them accept an optional single-channel `mask` (255 = compared,
+0 = ignored) so background pixels of a capture do not lower the score.
+"""
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+MATCH_METHOD = cv2.TM_CCOEFF_NORMED
+
+# Pyramid tuning
+PYRAMID_MAX_FACTOR = 4     # Coarsest downscale (frame and template)
+PYRAMID_MIN_SIDE = 10      # Template must keep at least this many px per side when downscaled
+PYRAMID_TOP_K = 5          # Coarse candidates refined at full resolution
+
+# Documented tolerance of the pyramid matcher against `match_exhaustive`:
+# whenever the exhaustive peak is among the top-k coarse candidates the
+# location is identical and the score differs only by float accumulation.
+PYRAMID_SCORE_TOLERANCE = 1e-3
+
+# Find-all: hits whose windows overlap a better hit by more than this (IoU) are dropped
+NMS_OVERLAP = 0.3
+
+# Gray-first search: grayscale candidates confirmed with a color correlation
+VERIFY_TOP_K = 3
+
+Match = Tuple[float, Tuple[int, int]]
+
+
+def match_template(frame: np.ndarray, template: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+    """TM_CCOEFF_NORMED response map, comparing only the pixels `mask` keeps."""
+    if mask is None:
+        return cv2.matchTemplate(frame, template, MATCH_METHOD)
+    res = cv2.matchTemplate(frame, template, MATCH_METHOD, mask=mask)
+    # Windows that are flat under the mask have no defined correlation
+    res[~np.isfinite(res)] = -1.0
+    return res
+
+
+def match_exhaustive(frame: np.ndarray, template: np.ndarray, mask: np.ndarray = None) -> Match:
+    """Full-resolution matchTemplate over the whole frame."""
+    res = match_template(frame, template, mask)
+    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    return max_val, max_loc
+
+
+def pyramid_factor(template_shape, max_factor: int = PYRAMID_MAX_FACTOR) -> int:
+    """Largest power-of-two downscale that keeps the template recognisable."""
+    t_h, t_w = template_shape[:2]
+    factor = 1
+    while factor * 2 <= max_factor and min(t_w, t_h) // (factor * 2) >= PYRAMID_MIN_SIDE:
+        factor *= 2
+    return factor
+
+
+def downscale(img: np.ndarray, factor: int) -> np.ndarray:
+    if factor == 1:
+        return img
+    return cv2.resize(img, (img.shape[1] // factor, img.shape[0] // factor), interpolation=cv2.INTER_AREA)
+
+
+def downscale_mask(mask: np.ndarray, factor: int) -> np.ndarray:
+    """Coarse mask: a coarse pixel is compared only if every pixel it covers is."""
+    small = downscale(mask, factor)
+    return np.where(small == 255, 255, 0).astype(np.uint8)
+
+
+def top_candidates(res: np.ndarray, k: int, suppress: Tuple[int, int]) -> List[Match]:
+    """
+    Pick up to `k` peaks of a response map, best first, suppressing a
+    `suppress`-sized neighbourhood around each one so candidates are
+    spatially distinct.
+    Note: modifies `res` in place.
+    """
+    s_w, s_h = suppress
+    peaks = []
+    for _ in range(k):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(res)
+        if not np.isfinite(max_val):
+            break
+        peaks.append((max_val, (x, y)))
+        res[max(0, y - s_h):y + s_h + 1, max(0, x - s_w):x + s_w + 1] = -np.inf
+    return peaks
+
+
+def _half(template_shape) -> Tuple[int, int]:
+    # Suppress roughly half a template around each peak
+    return max(1, template_shape[1] // 2), max(1, template_shape[0] // 2)
+
+
+def candidates_exhaustive(frame: np.ndarray, template: np.ndarray, k: int = VERIFY_TOP_K,
+                          mask: np.ndarray = None) -> List[Match]:
+    """The `k` best distinct windows of a full-resolution matchTemplate, best first."""
+    res = match_template(frame, template, mask)
+    return top_candidates(res, k, _half(template.shape))
+
+
+def candidates_pyramid(frame: np.ndarray, template: np.ndarray, k: int = VERIFY_TOP_K,
+                       top_k: int = PYRAMID_TOP_K, max_factor: int = PYRAMID_MAX_FACTOR,
+                       coarse_template: np.ndarray = None, mask: np.ndarray = None) -> List[Match]:
+    """
+    Coarse-to-fine search.
+
+    1. Match a downscaled template against a downscaled frame.
+    2. Refine the `top_k` coarse peaks at full resolution inside a small
+       window around each one.
+
+    Returns the `k` best refined windows, best first. Falls back to
+    `candidates_exhaustive` when the template is too small to shrink.
+    `coarse_template` may be passed in to reuse an already downscaled template.
+    """
+    t_h, t_w = template.shape[:2]
+    f_h, f_w = frame.shape[:2]
+    factor = pyramid_factor(template.shape, max_factor)
+    if factor == 1:
+        return candidates_exhaustive(frame, template, k, mask)
+
+    small_tmpl = coarse_template if coarse_template is not None else downscale(template, factor)
+    small_frame = downscale(frame, factor)
+    small_mask = downscale_mask(mask, factor) if mask is not None else None
+    if small_tmpl.shape[0] > small_frame.shape[0] or small_tmpl.shape[1] > small_frame.shape[1]:
+        return candidates_exhaustive(frame, template, k, mask)
+    if small_mask is not None and not small_mask.any():
+        # The kept pixels are too thin to survive downscaling
+        return candidates_exhaustive(frame, template, k, mask)
+
+    res = match_template(small_frame, small_tmpl, small_mask)
+    coarse = top_candidates(res, top_k, _half(small_tmpl.shape))
+
+    # Rounding during downscale shifts the true peak by up to `factor` px
+    pad = factor * 2
+    refined: Dict[Tuple[int, int], float] = {}
+    for _, (cx, cy) in coarse:
+        x0 = max(0, cx * factor - pad)
+        y0 = max(0, cy * factor - pad)
+        x1 = min(f_w, cx * factor + t_w + pad)
+        y1 = min(f_h, cy * factor + t_h + pad)
+        if x1 - x0 < t_w or y1 - y0 < t_h:
+            continue
+        val, (lx, ly) = match_exhaustive(frame[y0:y1, x0:x1], template, mask)
+        # Neighbouring coarse peaks often refine to the same window
+        refined.setdefault((x0 + lx, y0 + ly), val)
+    ranked = sorted(((val, loc) for loc, val in refined.items()), key=lambda m: -m[0])
+    return ranked[:k]
+
+
+def match_pyramid(frame: np.ndarray, template: np.ndarray,
+                  top_k: int = PYRAMID_TOP_K, max_factor: int = PYRAMID_MAX_FACTOR,
+                  coarse_template: np.ndarray = None, mask: np.ndarray = None) -> Match:
+    """Best window of `candidates_pyramid`."""
+    ranked = candidates_pyramid(frame, template, 1, top_k, max_factor, coarse_template, mask)
+    return ranked[0] if ranked else (-1.0, (0, 0))
+
+
+def verify_color(frame: np.ndarray, template: np.ndarray, candidates: List[Match],
+                 mask: np.ndarray = None) -> Match:
+    """
+    Best color score among grayscale candidates.
+
+    The correlation at a location only depends on the frame patch under the
+    template, so each candidate costs one template-sized matchTemplate instead
+    of a 3-channel pass over the whole frame.
+    """
+    t_h, t_w = template.shape[:2]
+    best_val, best_loc = -1.0, (0, 0)
+    for _, (x, y) in candidates:
+        patch = frame[y:y + t_h, x:x + t_w]
+        val = float(match_template(patch, template, mask)[0, 0])
+        if val > best_val:
+            best_val, best_loc = val, (x, y)
+    return best_val, best_loc
+
+
+def _peaks_above(res: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """(ys, xs) of the 3x3 local maxima scoring >= threshold."""
+    mask = res >= threshold
+    # Responses are sparse above a real confidence: only scan rows that have candidates
+    rows = np.flatnonzero(mask.any(axis=1))
+    sub_y, xs = np.nonzero(mask[rows])
+    ys = rows[sub_y]
+    if len(ys) == 0:
+        return ys, xs
+
+    r_h, r_w = res.shape
+    scores = res[ys, xs]
+    is_peak = np.ones(len(ys), dtype=bool)
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dy == 0 and dx == 0:
+                continue
+            ny, nx = ys + dy, xs + dx
+            inside = (ny >= 0) & (ny < r_h) & (nx >= 0) & (nx < r_w)
+            neighbour = np.full(len(ys), -np.inf, dtype=res.dtype)
+            neighbour[inside] = res[ny[inside], nx[inside]]
+            is_peak &= scores >= neighbour
+    return ys[is_peak], xs[is_peak]
+
+
+def non_max_suppression(res: np.ndarray, threshold: float, template_shape,
+                        overlap: float = NMS_OVERLAP, max_hits: int = None) -> List[Match]:
+    """
+    Every location of a response map scoring >= `threshold`, best first, keeping
+    only one window per object.
+
+    Candidates are the 3x3 local maxima above the threshold (one vectorized
+    threshold pass over the map, then neighbour checks on candidates only).
+    Greedy suppression then drops, for each kept hit, all weaker candidates
+    whose template-sized window overlaps it by more than `overlap`, in one
+    numpy operation per kept hit.
+    """
+    t_h, t_w = template_shape[:2]
+    ys, xs = _peaks_above(res, threshold)
+    scores = res[ys, xs]
+    order = np.argsort(-scores, kind="stable")
+    xs, ys, scores = xs[order], ys[order], scores[order]
+
+    area = t_w * t_h
+    alive = np.ones(len(xs), dtype=bool)
+    hits: List[Match] = []
+    for i in range(len(xs)):
+        if not alive[i]:
+            continue
+        hits.append((float(scores[i]), (int(xs[i]), int(ys[i]))))
+        if max_hits and len(hits) >= max_hits:
+            break
+        # IoU of equal-sized windows against every weaker candidate
+        inter = (np.clip(t_w - np.abs(xs[i + 1:] - xs[i]), 0, None) *
+                 np.clip(t_h - np.abs(ys[i + 1:] - ys[i]), 0, None))
+        alive[i + 1:] &= inter <= overlap * (2 * area - inter)
+    return hits
+
+
+def match_all(frame: np.ndarray, template: np.ndarray, threshold: float,
+              overlap: float = NMS_OVERLAP, max_hits: int = None, mask: np.ndarray = None) -> List[Match]:
+    """Every occurrence of the template scoring >= `threshold`, best first."""
+    res = match_template(frame, template, mask)
+    return non_max_suppression(res, threshold, template.shape, overlap, max_hits)
+
+
+MATCHERS = {
+    "exhaustive": match_exhaustive,
+    "pyramid": match_pyramid,
+}
+
+# Same strategies returning the best few windows (see `verify_color`)
+CANDIDATE_MATCHERS = {
+    "exhaustive": candidates_exhaustive,
+    "pyramid": candidates_pyramid,
+}
+
+DEFAULT_MATCH_MODE = "pyramid"
+
+
+def get_matcher(mode: str):
+    """Resolve a `match_mode` node param, falling back to the default mode."""
+    return MATCHERS.get(mode or DEFAULT_MATCH_MODE, MATCHERS[DEFAULT_MATCH_MODE])
+
+
+def get_candidate_matcher(mode: str):
+    """Like `get_matcher`, for the candidate-returning variant of the mode."""
+    return CANDIDATE_MATCHERS.get(mode or DEFAULT_MATCH_MODE, CANDIDATE_MATCHERS[DEFAULT_MATCH_MODE])
@@ -0,0 +1,465 @@
+"""
+OCR backends.
+
+A backend turns the BGR pixels of a screen region into text. InputDriver
+captures the region itself (through the capture backend or the screen
+watcher), so every engine works on any platform where it is installed.
+
+Backends:
+- "vision"     Apple Vision (macOS, pyobjc-framework-Vision)
+- "tesseract"  tesserocr when installed (engine stays loaded), else pytesseract
+- "stub"       deterministic text derived from the pixels, for headless tests and benchmarks
+
+Real engines run in a long-lived worker process (`OcrWorker`) by default: the
+engine is loaded once and kept between calls, and a slow or crashing engine
+never blocks or takes down the runner. Regions are passed through shared
+memory; only their offsets and shapes go over the pipe, and a batch of regions
+(`recognize_many`) is one round trip recognized on the worker's threads.
+
+Pick one with `create_ocr_backend()`; by default it reads AUTOFLOW_OCR
+("vision" on macOS, "tesseract" elsewhere) and AUTOFLOW_OCR_WORKER
+("1" by default, "0" runs the engine in-process). AUTOFLOW_OCR_STUB_DELAY
+adds a fixed latency to the stub backend, in seconds. `shared_ocr_backend()`
+is the one configured backend of the process: drivers use it by default, so
+creating another InputDriver does not start another worker.
+"""
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.infra.frames import Rect, fingerprint
+
+LANGUAGES = ("ko-KR", "en-US")  # Vision recognition languages
+LEVEL = "accurate"              # Vision recognition level
+TESSERACT_LANG = "kor+eng"
+
+WORKER_TIMEOUT = 30.0           # s per region before the worker is restarted
+MIN_SHARED_BYTES = 1 << 20      # The shared buffer starts at 1 MiB and grows as needed
+
+
+@dataclass(frozen=True)
+class Word:
+    text: str
+    rect: Rect               # (x, y, w, h) in pixels of the recognized image
+    confidence: float = 1.0  # 0..1
+
+
+def spread_words(text: str, rect: Rect, confidence: float = 1.0) -> List[Word]:
+    """Split one line of text into words with boxes proportional to their length inside `rect`."""
+    tokens = text.split()
+    total = sum(len(t) for t in tokens) + max(0, len(tokens) - 1)
+    if not tokens or total == 0:
+        return []
+    x, y, w, h = rect
+    words, offset = [], 0
+    for token in tokens:
+        x0 = x + w * offset // total
+        x1 = x + w * (offset + len(token)) // total
+        words.append(Word(token, (x0, y, max(1, x1 - x0), h), confidence))
+        offset += len(token) + 1
+    return words
+
+
+class OcrBackend:
+    name = "base"
+
+    @property
+    def settings(self) -> Tuple:
+        """Everything besides the pixels that changes the result (part of the OCR cache key)."""
+        return (self.name,)
+
+    def recognize(self, bgr: np.ndarray) -> str:
+        raise NotImplementedError
+
+    def words(self, bgr: np.ndarray) -> List[Word]:
+        """Words with their boxes. Backends without word boxes spread their text over the region."""
+        return spread_words(self.recognize(bgr), (0, 0, bgr.shape[1], bgr.shape[0]))
+
+    def recognize_many(self, regions: List[np.ndarray]) -> List[str]:
+        """Text of each region, recognized concurrently (backends are safe to call from several threads)."""
+        return _map(self.recognize, regions)
+
+    def words_many(self, regions: List[np.ndarray]) -> List[List[Word]]:
+        """Words of each region, recognized concurrently."""
+        return _map(self.words, regions)
+
+    def close(self):
+        pass
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Threads shared by all backends of this process for recognize_many."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr")
+        return _pool
+
+
+def _map(fn, regions: list) -> list:
+    if len(regions) <= 1:
+        return [fn(bgr) for bgr in regions]
+    return list(_executor().map(fn, regions))
+
+
+class VisionOcrBackend(OcrBackend):
+    """Apple Vision text recognition. The region is handed over PNG-encoded."""
+    name = "vision"
+
+    def __init__(self, languages: Tuple[str, ...] = LANGUAGES, level: str = LEVEL):
+        self.languages = tuple(languages)
+        self.level = level
+
+    @property
+    def settings(self) -> Tuple:
+        return (self.name, self.languages, self.level)
+
+    def recognize(self, bgr: np.ndarray) -> str:
+        return " ".join(candidate.string() for candidate in self._candidates(bgr))
+
+    def words(self, bgr: np.ndarray) -> List[Word]:
+        from Foundation import NSMakeRange
+
+        h, w = bgr.shape[:2]
+        words = []
+        for candidate in self._candidates(bgr):
+            line = candidate.string()
+            start = 0
+            for token in line.split():
+                start = line.index(token, start)
+                box, _ = candidate.boundingBoxForRange_error_(NSMakeRange(start, len(token)), None)
+                start += len(token)
+                if box is None:
+                    continue
+                # Normalized, origin bottom-left
+                (bx, by), (bw, bh) = box.boundingBox()
+                words.append(Word(token, (int(bx * w), int((1 - by - bh) * h), max(1, int(bw * w)),
+                                          max(1, int(bh * h))), float(candidate.confidence())))
+        return words
+
+    def _candidates(self, bgr: np.ndarray) -> list:
+        """Top recognition candidate of every text line Vision found."""
+        import Vision
+        from Foundation import NSData
+
+        ok, png = cv2.imencode(".png", bgr)
+        if not ok:
+            return []
+        data = NSData.dataWithBytes_length_(png.tobytes(), len(png))
+        candidates = []
+
+        def completion_handler(request, error):
+            if not error:
+                for obs in request.results():
+                    if obs.topCandidates_(1):
+                        candidates.append(obs.topCandidates_(1)[0])
+
+        request = Vision.VNRecognizeTextRequest.alloc().initWithCompletionHandler_(completion_handler)
+        level = (Vision.VNRequestRecognitionLevelAccurate if self.level == "accurate"
+                 else Vision.VNRequestRecognitionLevelFast)
+        request.setRecognitionLevel_(level)
+        request.setRecognitionLanguages_(list(self.languages))
+        handler = Vision.VNImageRequestHandler.alloc().initWithData_options_(data, None)
+        handler.performRequests_error_([request], None)
+        return candidates
+
+
+class TesseractOcrBackend(OcrBackend):
+    """
+    Tesseract. tesserocr keeps one engine loaded per thread for all calls;
+    without it pytesseract runs the tesseract executable per region.
+    """
+    name = "tesseract"
+
+    def __init__(self, lang: str = TESSERACT_LANG):
+        self.lang = lang
+        # A tesserocr engine must not be shared between threads
+        self._local = threading.local()
+        self._apis = []
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self) -> Tuple:
+        return (self.name, self.lang)
+
+    def recognize(self, bgr: np.ndarray) -> str:
+        image = self._image(bgr)
+        api = self._api()
+        if api is None:
+            import pytesseract
+            return pytesseract.image_to_string(image, lang=self.lang).strip()
+        api.SetImage(image)
+        return api.GetUTF8Text().strip()
+
+    def words(self, bgr: np.ndarray) -> List[Word]:
+        image = self._image(bgr)
+        api = self._api()
+        words = []
+        if api is None:
+            import pytesseract
+            data = pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+            for i, text in enumerate(data["text"]):
+                if text.strip() and float(data["conf"][i]) >= 0:
+                    rect = (data["left"][i], data["top"][i], data["width"][i], data["height"][i])
+                    words.append(Word(text.strip(), rect, float(data["conf"][i]) / 100))
+            return words
+
+        import tesserocr
+        api.SetImage(image)
+        api.Recognize()
+        level = tesserocr.RIL.WORD
+        for item in tesserocr.iterate_level(api.GetIterator(), level):
+            text = item.GetUTF8Text(level)
+            if text and text.strip():
+                x0, y0, x1, y1 = item.BoundingBox(level)
+                words.append(Word(text.strip(), (x0, y0, x1 - x0, y1 - y0), item.Confidence(level) / 100))
+        return words
+
+    @staticmethod
+    def _image(bgr: np.ndarray):
+        from PIL import Image
+        return Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+    def _api(self):
+        """This thread's tesserocr engine, or None when only pytesseract is installed."""
+        api = getattr(self._local, "api", None)
+        if api is None:
+            try:
+                import tesserocr
+            except ImportError:
+                # pytesseract: ensure tesseract is installed or path is set
+                # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+                return None
+            api = self._local.api = tesserocr.PyTessBaseAPI(lang=self.lang)
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def close(self):
+        with self._lock:
+            for api in self._apis:
+                api.End()
+            self._apis.clear()
+        self._local = threading.local()
+
+
+class StubOcrBackend(OcrBackend):
+    """
+    Deterministic stand-in: `texts` maps pixel fingerprints (see
+    frames.fingerprint) to text; any other region reads as
+    "stub:<w>x<h>:<fingerprint>". Words are the text spread over the region
+    (see spread_words). `delay` mimics an engine's latency.
+    """
+    name = "stub"
+
+    def __init__(self, texts: dict = None, delay: float = 0.0):
+        self.texts = texts if texts else {}
+        self.delay = delay
+
+    @property
+    def settings(self) -> Tuple:
+        return (self.name, tuple(sorted(self.texts.items())))
+
+    def recognize(self, bgr: np.ndarray) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        key = fingerprint(bgr)
+        return self.texts.get(key, f"stub:{bgr.shape[1]}x{bgr.shape[0]}:{key:08x}")
+
+
+BACKENDS = {
+    "vision": VisionOcrBackend,
+    "tesseract": TesseractOcrBackend,
+    "stub": StubOcrBackend,
+}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13: spawned workers share the parent's resource tracker,
+        # where the block is already registered, so attaching leaves it to the parent
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(conn, backend_name: str, options: dict):
+    """Worker process: build the engine once, then answer batches of regions (text or words) until told to stop."""
+    backend = BACKENDS[backend_name](**options)
+    attached: Optional[shared_memory.SharedMemory] = None
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            op, shm_name, layout = request
+            try:
+                if attached is None or attached.name != shm_name:
+                    if attached is not None:
+                        attached.close()
+                    attached = _attach(shm_name)
+                regions = [np.ndarray(shape, dtype=np.uint8, buffer=attached.buf, offset=offset)
+                           for offset, shape in layout]
+                recognize = backend.words_many if op == "words" else backend.recognize_many
+                conn.send((True, recognize(regions)))
+                del regions
+            except Exception as e:
+                conn.send((False, f"{type(e).__name__}: {e}"))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        backend.close()
+        if attached is not None:
+            attached.close()
+
+
+class OcrWorker(OcrBackend):
+    """
+    Runs another backend in a persistent worker process.
+
+    The process is started on first use and kept: the engine loads once.
+    Regions are copied into a shared memory block owned by this side; the
+    pipe only carries the block name and each region's offset and shape. A worker that
+    dies or exceeds `timeout` is restarted on the next call.
+    """
+    def __init__(self, backend_name: str, options: dict = None, timeout: float = WORKER_TIMEOUT):
+        self.backend_name = backend_name
+        self.options = options if options else {}
+        self.timeout = timeout
+        self.name = backend_name
+        self._settings = BACKENDS[backend_name](**self.options).settings
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._lock = threading.Lock()
+        self.starts = 0
+
+    @property
+    def settings(self) -> Tuple:
+        return self._settings
+
+    def recognize(self, bgr: np.ndarray) -> str:
+        return self.recognize_many([bgr])[0]
+
+    def words(self, bgr: np.ndarray) -> List[Word]:
+        return self.words_many([bgr])[0]
+
+    def recognize_many(self, regions: List[np.ndarray]) -> List[str]:
+        """All regions go to the worker in one round trip; it recognizes them concurrently."""
+        return self._request("text", regions)
+
+    def words_many(self, regions: List[np.ndarray]) -> List[List[Word]]:
+        return self._request("words", regions)
+
+    def _request(self, op: str, regions: List[np.ndarray]) -> list:
+        if not regions:
+            return []
+        layout, offset = [], 0
+        for bgr in regions:
+            layout.append((offset, bgr.shape))
+            offset += bgr.nbytes
+        with self._lock:
+            self._ensure_started()
+            if self._shm is None or self._shm.size < offset:
+                self._replace_buffer(max(MIN_SHARED_BYTES, offset))
+            for (start, shape), bgr in zip(layout, regions):
+                np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf, offset=start)[...] = bgr
+            try:
+                self._conn.send((op, self._shm.name, layout))
+                if not self._conn.poll(self.timeout * len(regions)):
+                    raise TimeoutError(f"no answer within {self.timeout * len(regions):g}s")
+                ok, result = self._conn.recv()
+            except (EOFError, OSError, TimeoutError) as e:
+                self._kill()
+                raise RuntimeError(f"OCR worker ({self.backend_name}) failed: {e}") from e
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def close(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                try:
+                    self._conn.send(None)
+                    self._process.join(timeout=2.0)
+                except (OSError, EOFError):
+                    pass
+            self._kill()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        self._kill()
+        self._conn, child = self._ctx.Pipe()
+        self._process = self._ctx.Process(target=_worker_main, args=(child, self.backend_name, self.options),
+                                          name=f"ocr-{self.backend_name}", daemon=True)
+        self._process.start()
+        child.close()
+        if not self.starts:
+            atexit.register(self.close)
+        self.starts += 1
+        print(f"[OCR] Started {self.backend_name} worker (pid {self._process.pid})")
+
+    def _replace_buffer(self, size: int):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+
+    def _kill(self):
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def create_ocr_backend(name: str = None, worker: bool = None) -> OcrBackend:
+    """Build the configured OCR backend (see module docstring for the environment variables)."""
+    default = "vision" if sys.platform == "darwin" else "tesseract"
+    name = (name or os.environ.get("AUTOFLOW_OCR", default)).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name} (choose from {', '.join(BACKENDS)})")
+    options = {}
+    if name == "stub":
+        options["delay"] = float(os.environ.get("AUTOFLOW_OCR_STUB_DELAY", 0.0))
+    if worker is None:
+        worker = os.environ.get("AUTOFLOW_OCR_WORKER", "1").lower() not in ("0", "false", "no", "off")
+    if worker:
+        return OcrWorker(name, options)
+    return BACKENDS[name](**options)
+
+
+_shared: Optional[OcrBackend] = None
+_shared_lock = threading.Lock()
+
+
+def shared_ocr_backend() -> OcrBackend:
+    """The configured backend, built once per process (its worker is closed at exit)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = create_ocr_backend()
+        return _shared
@@ -0,0 +1,285 @@
+import logging
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.infra.matcher import PYRAMID_MAX_FACTOR, PYRAMID_MIN_SIDE, downscale
+
+log = logging.getLogger(__name__)
+
+
+# Captures record the screen's devicePixelRatio in the name: capture_1a2b3c4d@2x.png
+_SCALE_SUFFIX = re.compile(r"@(\d+(?:\.\d+)?)x$")
+
+
+def template_scale_from_path(path: str) -> Optional[float]:
+    """Scale factor of the screen a template was captured on, or None if unknown."""
+    match = _SCALE_SUFFIX.search(os.path.splitext(os.path.basename(path))[0])
+    return float(match.group(1)) if match else None
+
+
+def scale_suffix(scale: float) -> str:
+    """
+    Filename suffix recording a capture scale. 1x is written too: a name
+    without one means "unknown" and is swept over the seen screen scales.
+    """
+    return f"@{scale:g}x"
+
+
+def load_template(path: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Decode an image file into (bgr, alpha). `alpha` is None unless the file
+    has an alpha channel; both are None if the file cannot be read.
+    """
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None, None
+    if img.dtype == np.uint16:
+        img = (img >> 8).astype(np.uint8)
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR), None
+    if img.shape[2] == 4:
+        return np.ascontiguousarray(img[:, :, :3]), np.ascontiguousarray(img[:, :, 3])
+    return img, None
+
+
+# Precomputed decode of a template, written next to it by AssetStore
+SIDECAR_EXT = ".npz"
+
+
+def gray_pyramid(gray: np.ndarray) -> Dict[int, np.ndarray]:
+    """Downscaled gray levels of a template by factor (what the pyramid matcher would compute)."""
+    levels = {}
+    factor = 2
+    while factor <= PYRAMID_MAX_FACTOR and min(gray.shape[:2]) // factor >= PYRAMID_MIN_SIDE:
+        levels[factor] = downscale(gray, factor)
+        factor *= 2
+    return levels
+
+
+def sidecar_path(path: str) -> str:
+    return os.path.splitext(path)[0] + SIDECAR_EXT
+
+
+def write_sidecar(path: str, bgr: np.ndarray, alpha: Optional[np.ndarray] = None):
+    """Store the decoded image, its gray version and pyramid levels next to `path`."""
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    arrays = {"bgr": bgr, "gray": gray}
+    if alpha is not None:
+        arrays["alpha"] = alpha
+    for factor, level in gray_pyramid(gray).items():
+        arrays[f"level_{factor}"] = level
+    target = sidecar_path(path)
+    tmp = target + ".tmp"
+    # Uncompressed: loading is a plain read, cheaper than decoding the PNG
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, target)
+
+
+def read_sidecar(path: str, mtime_ns: int) -> Optional[Dict[str, np.ndarray]]:
+    """Arrays of the sidecar of `path`, or None if missing, unreadable or older than the image."""
+    target = sidecar_path(path)
+    try:
+        if os.stat(target).st_mtime_ns < mtime_ns:
+            return None
+        with np.load(target) as data:
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def build_mask(shape, alpha: Optional[np.ndarray],
+               exclude: Optional[Tuple[int, int, int, int]]) -> Optional[np.ndarray]:
+    """
+    Matching mask (255 = compared, 0 = ignored) from PNG transparency and an
+    (x, y, w, h) exclusion rect in template pixels. None when every pixel counts.
+    """
+    mask = np.full(shape[:2], 255, dtype=np.uint8)
+    if alpha is not None:
+        mask[alpha == 0] = 0
+    if exclude:
+        x, y, w, h = exclude
+        mask[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = 0
+    if mask.all():
+        return None
+    if not mask.any():
+        log.warning("Mask hides the whole template; matching without it.")
+        return None
+    return mask
+
+
+@dataclass
+class CachedTemplate:
+    """
+    Decoded template image, ready for matching.
+
+    `ratio` is the resize applied to the file's pixels (1.0 = as captured);
+    `scale` is the capture screen's scale factor when the file name records it.
+    `mask` marks the pixels that take part in matching (None = all of them),
+    built from PNG transparency and the `exclude` rect (see `build_mask`).
+    `pyramid` holds the downscaled gray levels by factor (see `gray_pyramid`).
+    """
+    path: str
+    mtime_ns: int
+    bgr: np.ndarray
+    gray: np.ndarray
+    ratio: float = 1.0
+    scale: Optional[float] = None
+    mask: Optional[np.ndarray] = None
+    exclude: Optional[Tuple[int, int, int, int]] = None
+    pyramid: Dict[int, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def width(self) -> int:
+        return self.bgr.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.bgr.shape[0]
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def nbytes(self) -> int:
+        extra = sum(level.nbytes for level in self.pyramid.values())
+        return self.bgr.nbytes + self.gray.nbytes + extra + (self.mask.nbytes if self.mask is not None else 0)
+
+
+class TemplateCache:
+    """
+    Thread-safe LRU cache of decoded templates.
+
+    Entries are keyed by absolute path (plus resize ratio for rescaled
+    variants and the exclusion rect of masked ones) and validated against the file mtime, so re-capturing an image
+    under the same name reloads it automatically. Templates with an up to date
+    sidecar (see `write_sidecar`) are read from it instead of being decoded.
+    The cache is bounded by the total number of decoded bytes it holds.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, CachedTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sidecar_loads = 0
+
+    def get(self, path: str, ratio: float = 1.0,
+            exclude: Optional[Tuple[int, int, int, int]] = None) -> Optional[CachedTemplate]:
+        """
+        Return the decoded template for `path`, or None if it cannot be loaded.
+        With `ratio` != 1.0 the template is resized by that factor (cached too).
+        `exclude` is an (x, y, w, h) rect of the file's pixels left out of matching.
+        """
+        path = os.path.abspath(path)
+        ratio = round(ratio, 3)
+        exclude = tuple(exclude) if exclude else None
+        key = (path, ratio, exclude)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self.invalidate(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Decode / resize outside the lock so other templates stay available meanwhile
+        gray = pyramid = None
+        if ratio == 1.0:
+            sidecar = read_sidecar(path, mtime_ns)
+            if sidecar is not None:
+                bgr, gray, alpha = sidecar["bgr"], sidecar["gray"], sidecar.get("alpha")
+                pyramid = {int(name[len("level_"):]): level for name, level in sidecar.items()
+                           if name.startswith("level_")}
+                self.sidecar_loads += 1
+            else:
+                bgr, alpha = load_template(path)
+            if bgr is None:
+                return None
+            mask = build_mask(bgr.shape, alpha, exclude)
+        else:
+            base = self.get(path, exclude=exclude)
+            if base is None:
+                return None
+            width, height = round(base.width * ratio), round(base.height * ratio)
+            if width < 1 or height < 1:
+                return None
+            interpolation = cv2.INTER_AREA if ratio < 1.0 else cv2.INTER_LINEAR
+            bgr = cv2.resize(base.bgr, (width, height), interpolation=interpolation)
+            mask = None
+            if base.mask is not None:
+                mask = cv2.resize(base.mask, (width, height), interpolation=cv2.INTER_NEAREST)
+        if gray is None:
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+            pyramid = gray_pyramid(gray)
+        entry = CachedTemplate(
+            path=path,
+            mtime_ns=mtime_ns,
+            bgr=bgr,
+            gray=gray,
+            ratio=ratio,
+            scale=template_scale_from_path(path),
+            mask=mask,
+            exclude=exclude,
+            pyramid=pyramid,
+        )
+
+        with self._lock:
+            self._remove(key)
+            # Oversized templates are still returned, just never retained
+            if entry.nbytes <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += entry.nbytes
+                self._evict()
+        return entry
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drop one template with all its variants (or everything when `path` is None)."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                path = os.path.abspath(path)
+                for key in [k for k in self._entries if k[0] == path]:
+                    self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "sidecar_loads": self.sidecar_loads,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _evict(self):
+        # Least recently used entries live at the front of the OrderedDict
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self.evictions += 1
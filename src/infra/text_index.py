@@ -0,0 +1,238 @@
+"""
+Screen-wide text index for "click on text".
+
+`TextIndexer.index(frame)` OCRs a grabbed screen into a word-level index of
+bounding boxes (frame pixels). The frame is cut into overlapping tiles and
+only tiles whose pixels changed since the previous frame of the same screen
+are sent to the OCR backend, in one batch; a word belongs to the tile its
+center falls in, so a word straddling a tile edge is read whole from the
+neighbour's margin (words up to 2 * TEXT_TILE_MARGIN px wide). A search
+limited to a region only reads the tiles that region touches.
+
+Indexes are cached per (screen, frame fingerprint, tiles): on an unchanged screen a
+lookup costs a dict access, and `TextIndex.find` memoizes its results per
+query, so consecutive lookups of the same label take microseconds.
+
+Search is fuzzy: the query and the OCR'd text are compared case-insensitively
+on letters and digits only (difflib ratio), against single words and against runs
+of neighbouring words on one line, so "Save as" matches two OCR words.
+"""
+import threading
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from src.infra.frames import Rect, ScreenFrame, fingerprint
+from src.infra.match_cache import MatchResultCache
+from src.infra.ocr import OcrBackend, Word
+
+TEXT_TILE = 1024        # px per tile side
+TEXT_TILE_MARGIN = 160  # px of overlap read around each tile
+MIN_TEXT_SCORE = 0.8    # Default fuzzy similarity for a hit
+MAX_RUN = 4             # Longest run of neighbouring words compared with a query
+LINE_GAP = 1.5          # Words further apart than this many line heights are not joined into a run
+
+
+def normalize(text: str) -> str:
+    """Letters and digits only, case-folded: OCR spacing and stray punctuation do not count."""
+    return "".join(c for c in text.casefold() if c.isalnum())
+
+
+def similarity(a: str, b: str) -> float:
+    """difflib ratio of two normalized strings (1.0 = identical)."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+@dataclass(frozen=True)
+class TextHit:
+    text: str           # OCR'd text that matched (words joined by spaces)
+    rect: Rect          # Union of the words' boxes, frame pixels
+    score: float
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        x, y, w, h = self.rect
+        return (x + w / 2, y + h / 2)
+
+
+def _union(words: List[Word]) -> Rect:
+    x0 = min(w.rect[0] for w in words)
+    y0 = min(w.rect[1] for w in words)
+    x1 = max(w.rect[0] + w.rect[2] for w in words)
+    y1 = max(w.rect[1] + w.rect[3] for w in words)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def lines(words: List[Word]) -> List[List[Word]]:
+    """Group words into text lines (vertical centers within half a word height), left to right."""
+    result: List[List[Word]] = []
+    for word in sorted(words, key=lambda w: (w.rect[1] + w.rect[3] / 2, w.rect[0])):
+        cy = word.rect[1] + word.rect[3] / 2
+        if result:
+            last = result[-1][-1]
+            if abs(cy - (last.rect[1] + last.rect[3] / 2)) <= max(word.rect[3], last.rect[3]) / 2:
+                result[-1].append(word)
+                continue
+        result.append([word])
+    for line in result:
+        line.sort(key=lambda w: w.rect[0])
+    return result
+
+
+class TextIndex:
+    """Words of one frame with fuzzy lookup; results are memoized per query."""
+    def __init__(self, words: List[Word]):
+        self.words = words
+        # Runs of neighbouring words on one line: (normalized text, words)
+        self._runs: List[Tuple[str, List[Word]]] = []
+        for line in lines(words):
+            for i in range(len(line)):
+                for j in range(i, min(len(line), i + MAX_RUN)):
+                    if j > i:
+                        prev, word = line[j - 1], line[j]
+                        if word.rect[0] - (prev.rect[0] + prev.rect[2]) > LINE_GAP * max(prev.rect[3], word.rect[3]):
+                            break
+                    run = line[i:j + 1]
+                    self._runs.append((normalize("".join(w.text for w in run)), run))
+        self._results: Dict[Tuple[str, float], List[TextHit]] = {}
+        self._lock = threading.Lock()
+
+    def find(self, query: str, min_score: float = MIN_TEXT_SCORE) -> List[TextHit]:
+        """Every place the query reads at least `min_score` similar, best first (top-left first on ties)."""
+        key = (normalize(query), min_score)
+        with self._lock:
+            cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        target = key[0]
+        hits = []
+        for text, run in self._runs:
+            # Cheap bound first: the ratio can not exceed 2 * shorter / (sum of lengths)
+            if not text or 2 * min(len(text), len(target)) / (len(text) + len(target)) < min_score:
+                continue
+            score = similarity(target, text)
+            if score >= min_score:
+                hits.append(TextHit(" ".join(w.text for w in run), _union(run), score))
+        # The best run per place: drop hits overlapping a better one
+        hits.sort(key=lambda h: (-h.score, h.rect[1], h.rect[0]))
+        kept: List[TextHit] = []
+        for hit in hits:
+            if not any(_overlaps(hit.rect, k.rect) for k in kept):
+                kept.append(hit)
+        with self._lock:
+            self._results[key] = kept
+        return kept
+
+
+def _overlaps(a: Rect, b: Rect) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def tile_windows(height: int, width: int, tile: int = TEXT_TILE,
+                 margin: int = TEXT_TILE_MARGIN) -> List[Tuple[Rect, Rect]]:
+    """(own rect, read window) per tile; windows extend `margin` px past the tile, clipped to the frame."""
+    windows = []
+    for y in range(0, height, tile):
+        for x in range(0, width, tile):
+            own = (x, y, min(tile, width - x), min(tile, height - y))
+            x0, y0 = max(0, x - margin), max(0, y - margin)
+            x1, y1 = min(width, x + tile + margin), min(height, y + tile + margin)
+            windows.append((own, (x0, y0, x1 - x0, y1 - y0)))
+    return windows
+
+
+class TextIndexer:
+    """
+    Builds and caches TextIndex objects for grabbed frames.
+
+    Per screen, the words of every tile of the previous frame are kept with
+    the tile's pixel fingerprint; a new frame only re-reads changed tiles.
+    """
+    def __init__(self, backend: OcrBackend, max_frames: int = 8, tile: int = TEXT_TILE,
+                 margin: int = TEXT_TILE_MARGIN):
+        self.backend = backend
+        self.tile = tile
+        self.margin = margin
+        # (screen index, frame fingerprint, OCR settings, tiles read) -> TextIndex
+        self.cache = MatchResultCache(max_entries=max_frames)
+        # screen index -> {read window: (window fingerprint, words owned by the tile in frame pixels)}
+        self._tiles: Dict[int, Dict[Rect, Tuple[int, List[Word]]]] = {}
+        self._lock = threading.Lock()
+        self.tiles_read = 0
+
+    def index(self, frame: ScreenFrame, pixel_rect: Optional[Rect] = None) -> TextIndex:
+        """
+        Index of the whole frame, or only of the tiles touching `pixel_rect`
+        (every word centered in the rect is then in the index).
+        """
+        windows = tile_windows(frame.height, frame.width, self.tile, self.margin)
+        if pixel_rect is not None:
+            windows = [(own, window) for own, window in windows if _overlaps(own, pixel_rect)]
+        key = (frame.index, frame.fingerprint, self.backend.settings, tuple(own for own, _ in windows))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            previous = self._tiles.get(frame.index, {})
+        current: Dict[Rect, Tuple[int, List[Word]]] = {}
+        pending = []
+        for own, window in windows:
+            wx, wy, ww, wh = window
+            tile_fp = fingerprint(frame.bgr[wy:wy + wh, wx:wx + ww])
+            known = previous.get(window)
+            if known is not None and known[0] == tile_fp:
+                current[window] = known
+            else:
+                pending.append((own, window, tile_fp))
+
+        if pending:
+            views = [frame.bgr[w[1]:w[1] + w[3], w[0]:w[0] + w[2]] for _, w, _ in pending]
+            for (own, window, tile_fp), words in zip(pending, self.backend.words_many(views)):
+                current[window] = (tile_fp, self._owned(words, own, window))
+            self.tiles_read += len(pending)
+            print(f"[TextIndex] Screen {frame.index}: read {len(pending)}/{len(current)} tile(s)")
+
+        with self._lock:
+            if pixel_rect is None:
+                self._tiles[frame.index] = current
+            else:
+                # Tiles outside the region keep their last reading (checked by fingerprint on reuse)
+                self._tiles.setdefault(frame.index, {}).update(current)
+        index = TextIndex([word for _, words in current.values() for word in words])
+        self.cache.put(key, index)
+        return index
+
+    @staticmethod
+    def _owned(words: List[Word], own: Rect, window: Rect) -> List[Word]:
+        """Words of a read window moved to frame pixels, keeping those centered in the tile itself."""
+        result = []
+        for word in words:
+            x, y, w, h = word.rect
+            x, y = x + window[0], y + window[1]
+            cx, cy = x + w / 2, y + h / 2
+            if own[0] <= cx < own[0] + own[2] and own[1] <= cy < own[1] + own[3]:
+                result.append(Word(word.text, (x, y, w, h), word.confidence))
+        return result
+
+    def clear(self):
+        self.cache.clear()
+        with self._lock:
+            self._tiles.clear()
+
+
+def find_text(indexer: TextIndexer, frame: ScreenFrame, query: str, min_score: float = MIN_TEXT_SCORE,
+              pixel_rect: Optional[Rect] = None) -> Optional[TextHit]:
+    """Best hit of `query` on a frame, optionally only among words centered in `pixel_rect`."""
+    for hit in indexer.index(frame, pixel_rect).find(query, min_score):
+        if pixel_rect is None:
+            return hit
+        cx, cy = hit.center
+        if pixel_rect[0] <= cx < pixel_rect[0] + pixel_rect[2] and pixel_rect[1] <= cy < pixel_rect[1] + pixel_rect[3]:
+            return hit
+    return None
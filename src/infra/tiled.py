@@ -0,0 +1,96 @@
+"""
+Tile-parallel template matching for very large frames (5K/6K screens,
+several monitors stitched together).
+
+The response map is cut into the same blocks as the incremental matcher;
+each block is matched from its input window (block + template size - 1, so
+neighbouring tiles overlap by the template size minus one) on a persistent
+thread pool. OpenCV releases the GIL inside matchTemplate, so the workers run
+on all cores at once while reading the frame in place: nothing is copied or
+pickled, and each block's maximum is reduced in its worker.
+
+Exactness: the block grid depends only on the frame and template sizes, never
+on the number of workers or the order blocks finish in, so the result is
+bit-identical to computing the same blocks one after the other
+(`IncrementalMatcher.full_response`). Against a single full-frame
+matchTemplate call the scores differ only by OpenCV's float accumulation,
+as documented in incremental.py.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.infra.incremental import block_size, response_blocks
+from src.infra.matcher import VERIFY_TOP_K, Match, match_template, top_candidates
+
+TILED_MODE = "tiled"  # ImageFinder match mode backed by TiledMatcher
+
+# Smaller response maps are matched in one call: the fan-out would cost more than it saves
+MIN_TILED_PIXELS = 2_000_000
+
+
+class TiledMatcher:
+    """
+    `matcher(frame, template, mask=None)` behaves like `match_exhaustive`,
+    with the response map split into blocks matched on a thread pool that
+    lives as long as the matcher.
+    """
+    def __init__(self, max_workers: int = None, min_pixels: int = MIN_TILED_PIXELS):
+        self.max_workers = max_workers if max_workers else os.cpu_count() or 1
+        self.min_pixels = min_pixels
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, frame: np.ndarray, template: np.ndarray, mask: np.ndarray = None) -> Match:
+        res, maxima = self._respond(frame, template, mask)
+        if not maxima:
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            return max_val, max_loc
+        # Highest score; ties go to the first in row-major order, like minMaxLoc over the whole map
+        max_val, (y, x) = max(maxima, key=lambda m: (m[0], -m[1][0], -m[1][1]))
+        return max_val, (x, y)
+
+    def candidates(self, frame: np.ndarray, template: np.ndarray, k: int = VERIFY_TOP_K,
+                   mask: np.ndarray = None) -> List[Match]:
+        """The `k` best distinct windows, best first (see matcher.candidates_exhaustive)."""
+        res, _ = self._respond(frame, template, mask)
+        t_h, t_w = template.shape[:2]
+        return top_candidates(res, k, (max(1, t_w // 2), max(1, t_h // 2)))
+
+    def response(self, frame: np.ndarray, template: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+        return self._respond(frame, template, mask)[0]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tiled-match")
+            return self._pool
+
+    def _respond(self, frame, template, mask) -> Tuple[np.ndarray, List[Tuple[float, Tuple[int, int]]]]:
+        """Response map plus each block's (max, (y, x)); no maxima when matched in one call."""
+        t_h, t_w = template.shape[:2]
+        res_shape = (frame.shape[0] - t_h + 1, frame.shape[1] - t_w + 1)
+        if res_shape[0] * res_shape[1] < self.min_pixels:
+            return match_template(frame, template, mask), []
+
+        res = np.empty(res_shape, dtype=np.float32)
+
+        def run(block):
+            y0, y1, x0, x1 = block
+            # Blocks write disjoint slices of the shared map
+            res[y0:y1, x0:x1] = match_template(frame[y0:y1 + t_h - 1, x0:x1 + t_w - 1], template, mask)
+            _, max_val, _, (bx, by) = cv2.minMaxLoc(res[y0:y1, x0:x1])
+            return max_val, (y0 + by, x0 + bx)
+
+        maxima = list(self._executor().map(run, response_blocks(res_shape, block_size(template.shape))))
+        return res, maxima
@@ -0,0 +1,241 @@
+"""
+Background screen watcher.
+
+A daemon thread grabs every screen at `fps` into a small per-screen ring of
+preconverted frames (BGR, gray and fingerprint computed on the watcher
+thread, stamped with the capture time). Image nodes take the freshest frame
+instead of grabbing on the runner thread, so a poll costs only the match, and
+every consumer shares one capture.
+
+Frames handed out are leased: their buffers are not reused for new captures
+until the consumer is done (see `ScreenWatcher.snapshot`). The thread stops
+by itself after `idle_timeout` seconds without consumers and restarts on the
+next request.
+
+Enable with AUTOFLOW_WATCH_FPS=n (0, the default, keeps synchronous grabs);
+AUTOFLOW_WATCH_DEPTH=n sets the frames kept per screen (default 3).
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.infra.frames import Rect, ScreenFrame
+
+DEFAULT_FPS = 10.0
+DEFAULT_DEPTH = 3
+IDLE_TIMEOUT = 5.0  # s without consumers before the thread stops
+
+
+class LeasePool:
+    """
+    FramePool-compatible buffers for the watcher's backend.
+
+    Unlike FramePool's fixed round-robin, a buffer pair is only handed out
+    again once it was given back with `recycle`, i.e. once no ring slot and
+    no consumer holds the frame drawn into it.
+    """
+    def __init__(self):
+        self._free: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._lent: Dict[int, Tuple[int, Tuple[np.ndarray, np.ndarray]]] = {}  # id(gray) -> (screen, pair)
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.allocations = 0
+
+    def acquire(self, screen_index: int, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            self.frames += 1
+            free = self._free.setdefault(screen_index, [])
+            while free:
+                pair = free.pop()
+                # Buffers of an old resolution are dropped
+                if pair[0].shape[:2] == (height, width):
+                    break
+            else:
+                pair = (np.empty((height, width, 3), dtype=np.uint8), np.empty((height, width), dtype=np.uint8))
+                self.allocations += 2
+            self._lent[id(pair[1])] = (screen_index, pair)
+            return pair
+
+    def recycle(self, frame: ScreenFrame):
+        """Return the buffers a frame was drawn into."""
+        with self._lock:
+            lent = self._lent.pop(id(frame.gray_buffer), None)
+            if lent is not None:
+                screen_index, pair = lent
+                self._free.setdefault(screen_index, []).append(pair)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "allocations": self.allocations,
+                "allocations_per_frame": self.allocations / self.frames if self.frames else 0.0,
+                "lent": len(self._lent),
+            }
+
+
+@dataclass
+class _Slot:
+    frame: ScreenFrame
+    leases: int = 0
+    retired: bool = False  # Left the ring; buffers go back to the pool with the last lease
+
+
+class _WatchedSource:
+    """Screen source serving the watcher's freshest frame (see ImageFinder.find)."""
+    def __init__(self, watcher: "ScreenWatcher", index: int, logical_rect: Rect, newer_than: float,
+                 leases: List[Tuple[int, _Slot]]):
+        self.watcher = watcher
+        self.index = index
+        self.logical_rect = logical_rect
+        self.newer_than = newer_than
+        self._leases = leases
+
+    def grab(self) -> Optional[ScreenFrame]:
+        slot = self.watcher._lease(self.index, self.newer_than)
+        if slot is None:
+            return None
+        self._leases.append((self.index, slot))
+        return slot.frame
+
+
+class ScreenWatcher:
+    """
+    Captures all screens in the background into per-screen rings of `depth` frames.
+
+    `backend_factory(pool=...)` builds the capture backend the watcher owns;
+    it draws into the watcher's LeasePool so leased frames stay intact.
+    """
+    def __init__(self, backend_factory: Callable, fps: float = DEFAULT_FPS, depth: int = DEFAULT_DEPTH,
+                 idle_timeout: float = IDLE_TIMEOUT):
+        self.pool = LeasePool()
+        self.backend = backend_factory(pool=self.pool)
+        self.fps = fps
+        self.depth = max(1, depth)
+        self.idle_timeout = idle_timeout
+        self._rings: Dict[int, Deque[_Slot]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Bumped on every start/stop: a capture thread exits once its generation is stale
+        self._generation = 0
+        self._last_request = 0.0
+        self.captures = 0
+
+    @staticmethod
+    def from_env(backend_factory: Callable) -> Optional["ScreenWatcher"]:
+        """The configured watcher, or None when AUTOFLOW_WATCH_FPS is unset or 0."""
+        fps = float(os.environ.get("AUTOFLOW_WATCH_FPS", 0))
+        if fps <= 0:
+            return None
+        return ScreenWatcher(backend_factory, fps=fps, depth=int(os.environ.get("AUTOFLOW_WATCH_DEPTH", DEFAULT_DEPTH)))
+
+    @contextmanager
+    def snapshot(self, region: Optional[Rect] = None, newer_than: float = 0.0):
+        """
+        Yield screen sources (only those touching `region`) whose `grab()`
+        returns the freshest frame captured after `newer_than` (time.monotonic()).
+        Frames stay leased until the block exits.
+        """
+        leases: List[Tuple[int, _Slot]] = []
+        sources = [_WatchedSource(self, s.index, s.logical_rect, newer_than, leases)
+                   for s in self.backend.screen_sources(region)]
+        try:
+            yield sources
+        finally:
+            self._release(leases)
+
+    def start(self):
+        with self._cond:
+            self._last_request = time.monotonic()
+            if self._running:
+                return
+            self._running = True
+            self._generation += 1
+            self._thread = threading.Thread(target=self._run, args=(self._generation,),
+                                            name="screen-watcher", daemon=True)
+            self._thread.start()
+            print(f"[Watcher] Started at {self.fps:g} fps")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._generation += 1
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _lease(self, index: int, newer_than: float) -> Optional[_Slot]:
+        self.start()
+        # A capture newer than `newer_than` is waited for (about a second at most)
+        deadline = time.monotonic() + max(1.0, 3.0 / self.fps)
+        with self._cond:
+            while True:
+                ring = self._rings.get(index)
+                if ring and ring[-1].frame.timestamp > newer_than:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    if not ring:
+                        print(f"[Watcher] No frame of screen {index}")
+                        return None
+                    break
+                self._cond.wait(remaining)
+            slot = ring[-1]
+            slot.leases += 1
+            return slot
+
+    def _release(self, leases: List[Tuple[int, _Slot]]):
+        with self._cond:
+            for _, slot in leases:
+                slot.leases -= 1
+                if slot.retired and slot.leases == 0:
+                    self.pool.recycle(slot.frame)
+
+    def _publish(self, frame: ScreenFrame):
+        with self._cond:
+            ring = self._rings.setdefault(frame.index, deque())
+            ring.append(_Slot(frame))
+            while len(ring) > self.depth:
+                old = ring.popleft()
+                old.retired = True
+                if old.leases == 0:
+                    self.pool.recycle(old.frame)
+            self.captures += 1
+            self._cond.notify_all()
+
+    def _run(self, generation: int):
+        interval = 1.0 / self.fps
+        while True:
+            started = time.monotonic()
+            with self._cond:
+                if generation != self._generation:
+                    break
+                if started - self._last_request > self.idle_timeout:
+                    self._running = False
+                    self._generation += 1
+                    self._cond.notify_all()
+                    break
+            for source in self.backend.screen_sources():
+                try:
+                    frame = source.grab()
+                except Exception as e:
+                    print(f"[Watcher] Grab of screen {source.index} failed: {e}")
+                    continue
+                if frame is None:
+                    continue
+                # Derived data is computed here, off the consumers' threads
+                frame.gray
+                frame.fingerprint
+                self._publish(frame)
+            with self._cond:
+                if generation == self._generation:
+                    self._cond.wait(max(0.0, interval - (time.monotonic() - started)))
+        print("[Watcher] Stopped")
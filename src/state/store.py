@@ -53,9 +53,16 @@ class Store:
         self.state.selected_node_id = node_id
         self.notify("SELECTION", node_id)
 
-    def connect_nodes(self, source_id: str, target_id: str):
+    def connect_nodes(self, source_id: str, target_id: str, port: Optional[int] = None):
+        """Link the default output (port None) or an IMAGE_SWITCH case port to a target."""
         if source_id in self.state.nodes:
-            self.state.nodes[source_id].next_node_id = target_id
+            node = self.state.nodes[source_id]
+            if port is None:
+                node.next_node_id = target_id
+            else:
+                while len(node.case_node_ids) <= port:
+                    node.case_node_ids.append(None)
+                node.case_node_ids[port] = target_id
             self.notify("STRUCTURE")
             
     def get_node(self, node_id: str) -> Optional[ActionNode]:
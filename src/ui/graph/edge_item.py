@@ -7,7 +7,7 @@ class EdgeItem(QGraphicsPathItem):
     Draws a Bezier curve between two nodes (Source Output -> Target Input).
     Tracks nodes to update automatically on move.
     """
-    def __init__(self, source_item, target_item):
+    def __init__(self, source_item, target_item, port=None):
         super().__init__()
         self.setZValue(-1) # Behind nodes
         self.setFlag(QGraphicsPathItem.ItemIsSelectable)
@@ -15,6 +15,7 @@ class EdgeItem(QGraphicsPathItem):
         self.source_item = source_item
         self.target_item = target_item
         self.source_node_id = source_item.node_id
+        self.port = port # Output port of the source (None = default)
         
         # Style
         self._pen = QPen(QColor("#AAAAAA"))
@@ -32,8 +33,8 @@ class EdgeItem(QGraphicsPathItem):
         if not self.source_item or not self.target_item:
             return
             
-        # Source Output: Bottom Center
-        start = self.source_item.scenePos() + QPointF(self.source_item.width/2, self.source_item.height)
+        # Source Output: the edge's output port
+        start = self.source_item.scenePos() + self.source_item.output_port_pos(self.port)
         # Target Input: Top Center
         end = self.target_item.scenePos() + QPointF(self.target_item.width/2, 0)
         
@@ -8,6 +8,7 @@ class NodeItem(QGraphicsItem):
         self.node_id = node_data.id
         self.label_text = node_data.label
         self.type = node_data.type
+        self.params = node_data.params
         self.on_select_callback = on_select_callback
         self.on_move_callback = on_move_callback
         
@@ -46,19 +47,41 @@ class NodeItem(QGraphicsItem):
         self.input_port.setData(1, self.node_id)
         self.input_port.setZValue(1.0)
         
-        # Output Port (Bottom Center)
-        self.output_port = QGraphicsRectItem(self.width/2 - 10, self.height, 20, 10, self) # 20x10
-        self.output_port.setBrush(QBrush(QColor("#AAAAAA")))
-        self.output_port.setPen(QPen(Qt.NoPen))
-        self.output_port.setData(0, "port_out")
-        self.output_port.setData(1, self.node_id)
-        self.output_port.setZValue(1.0)
+        # Output Ports (Bottom): one centered default port, IMAGE_SWITCH adds one per template
+        # port None = default/next (timeout for IMAGE_SWITCH), int = switch case index
+        self.output_ports = {}
+        for port in self.output_port_ids():
+            out_port = QGraphicsRectItem(self.output_port_pos(port).x() - 10, self.height, 20, 10, self) # 20x10
+            out_port.setBrush(QBrush(QColor("#AAAAAA")))
+            out_port.setPen(QPen(Qt.NoPen))
+            out_port.setData(0, "port_out")
+            out_port.setData(1, self.node_id)
+            out_port.setData(2, port)
+            out_port.setZValue(1.0)
+            self.output_ports[port] = out_port
+        self.output_port = self.output_ports[None]
 
         self.edges = []
         
     def add_edge(self, edge):
         self.edges.append(edge)
 
+    def output_port_ids(self):
+        from src.domain.actions import output_ports
+        return output_ports(self.type, self.params)
+
+    def output_port_caption(self, port):
+        from src.domain.actions import ActionType
+        if self.type == ActionType.FOR_EACH_IMAGE:
+            return "반복" if port is not None else "완료"
+        return "T" if port is None else str(port + 1)
+
+    def output_port_pos(self, port=None):
+        """Where an output port meets the bottom of the node, in item coordinates."""
+        ports = self.output_port_ids()
+        slot = ports.index(port) if port in ports else len(ports) - 1
+        return QPointF(self.width * (slot + 1) / (len(ports) + 1), self.height)
+
     def boundingRect(self):
         return QRectF(0, -10, self.width, self.height + 20)
         
@@ -108,6 +131,12 @@ class NodeItem(QGraphicsItem):
             painter.setBrush(QColor("#FFEA00")) # Yellow
         elif self.type == ActionType.IMAGE_MATCH:
             painter.setBrush(QColor("#2979FF")) # Blue
+        elif self.type == ActionType.TEXT_MATCH:
+            painter.setBrush(QColor("#FF9100")) # Orange
+        elif self.type == ActionType.IMAGE_SWITCH:
+            painter.setBrush(QColor("#7C4DFF")) # Purple
+        elif self.type == ActionType.FOR_EACH_IMAGE:
+            painter.setBrush(QColor("#00BFA5")) # Teal
         else:
             painter.setBrush(QColor("#9E9E9E")) # Grey
             
@@ -117,6 +146,14 @@ class NodeItem(QGraphicsItem):
         painter.setPen(QColor("#FFFFFF"))
         painter.setFont(self._font)
         painter.drawText(QRectF(0, 0, self.width, self.height), Qt.AlignCenter, self.label_text)
+        
+        # 4. Port captions for multi-output nodes (switch: 1..N per template, T = timeout)
+        if len(self.output_ports) > 1:
+            painter.setPen(QColor("#AAAAAA"))
+            for port in self.output_ports:
+                x = self.output_port_pos(port).x()
+                painter.drawText(QRectF(x - 20, self.height - 18, 40, 16), Qt.AlignCenter,
+                                 self.output_port_caption(port))
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemSelectedChange:
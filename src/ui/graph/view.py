@@ -114,6 +114,7 @@ class GraphView(QGraphicsView):
         if item and item.data(0) == "port_out":
             self._is_linking = True
             self._link_start_node = item.data(1)
+            self._link_start_port = item.data(2) # None = default output
             self._link_start_pos = self.mapToScene(event.position().toPoint())
             
             # Create temp edge
@@ -175,7 +176,7 @@ class GraphView(QGraphicsView):
             if target_node_id:
                 print(f"DEBUG: Connecting to {target_node_id}")
                 if hasattr(self, 'on_connect_callback') and self.on_connect_callback:
-                    self.on_connect_callback(self._link_start_node, target_node_id)
+                    self.on_connect_callback(self._link_start_node, target_node_id, self._link_start_port)
             else:
                  print("DEBUG: No valid input port found nearby.")
             
@@ -1,7 +1,9 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLineEdit, 
-                               QSpinBox, QDoubleSpinBox, QLabel, QPushButton, QComboBox, QHBoxLayout)
+                               QSpinBox, QDoubleSpinBox, QLabel, QPushButton, QComboBox, QHBoxLayout,
+                               QCheckBox)
 from PySide6.QtCore import Qt
-from src.domain.actions import ActionNode, ActionType
+from src.domain.actions import (ActionNode, ActionType, MAX_OCR_REGIONS, MAX_SWITCH_CASES, ocr_region_count,
+                                switch_case_count)
 
 class InspectorWidget(QWidget):
     def __init__(self, on_update_callback, on_test_callback=None):
@@ -9,6 +11,7 @@ class InspectorWidget(QWidget):
         self.on_update_callback = on_update_callback
         self.on_test_callback = on_test_callback
         self.current_node_id = None
+        self._row_count = None # Repeated rows currently built (IMAGE_SWITCH templates, OCR_READ_MANY regions)
         
         # Cache for widgets: { "key": widget_obj }
         self.param_widgets = {}
@@ -54,13 +57,16 @@ class InspectorWidget(QWidget):
 
         # If same node, just update values (Prevent Focus Loss)
         # Exception: SCROLL and DRAG have complex derived UI, always rebuild to show captured values immediately
-        if self.current_node_id == node.id and node.type not in [ActionType.SCROLL, ActionType.DRAG]:
+        # IMAGE_SWITCH / OCR_READ_MANY rebuild only when their number of rows changed
+        same_layout = self._row_count == self._repeated_rows(node)
+        if self.current_node_id == node.id and node.type not in [ActionType.SCROLL, ActionType.DRAG] and same_layout:
             self._update_values(node)
             return
             
         # New Node Selection
         self._clear_form()
         self.current_node_id = node.id
+        self._row_count = self._repeated_rows(node)
         self.header.setText(f"{node.label} 속성")
         self.test_btn.show()
         
@@ -185,6 +191,70 @@ class InspectorWidget(QWidget):
              # Image Capture UI moved from WAIT
             self._add_image_capture_ui("이미지 캡쳐", "image_path", params.get("image_path", ""))
             self._add_double_spinbox("일치 정확도 (0~1)", "confidence", params.get("confidence", 0.9))
+            
+            # Matching strategy
+            match_mode_map = {"pyramid": "빠른 검색 (Pyramid)", "exhaustive": "정밀 검색 (Exhaustive)",
+                              "incremental": "변경 영역만 검색 (Incremental)",
+                              "tiled": "병렬 정밀 검색 (Tiled, 초고해상도 화면)",
+                              "feature": "특징점 검색 (Feature, 큰 이미지/일부 가려짐)"}
+            self.match_mode_reverse_map = {v: k for k, v in match_mode_map.items()}
+            curr_mode_kr = match_mode_map.get(params.get("match_mode", "pyramid"), "빠른 검색 (Pyramid)")
+            self._add_combobox("검색 방식", "match_mode", list(match_mode_map.values()), curr_mode_kr,
+                               map_back=True, map_dict=self.match_mode_reverse_map)
+            
+            # Search Region (0 width/height = whole screen)
+            self._add_coord_picker("검색 영역 시작", "region_x", "region_y",
+                                   params.get("region_x", 0), params.get("region_y", 0))
+            self._add_spinbox("검색 영역 폭", "region_w", params.get("region_w", 0))
+            self._add_spinbox("검색 영역 높이", "region_h", params.get("region_h", 0))
+            self._add_checkbox("마지막 위치 우선 검색", "search_near_last", params.get("search_near_last", True))
+            self._add_checkbox("모니터 동시 검색", "parallel_screens", params.get("parallel_screens", False))
+            self.form_layout.addRow(QLabel("<font color='gray'>Tip: 폭/높이가 0이면 전체 화면을 검색합니다. "
+                                           "특징점 검색은 큰 캡쳐(약 200px 이상)에 적합합니다.</font>"))
+            self._add_mask_editor(params)
+            self._add_anchor_ui(params)
+
+        elif node.type == ActionType.TEXT_MATCH:
+            self._add_line_edit("찾을 텍스트", "text", params.get("text", ""))
+            self._add_double_spinbox("일치 정도 (0~1)", "min_score", params.get("min_score", 0.8))
+            self._add_double_spinbox("제한 시간 (초)", "timeout", params.get("timeout", 5.0))
+            self._add_coord_picker("검색 영역 시작", "region_x", "region_y",
+                                   params.get("region_x", 0), params.get("region_y", 0))
+            self._add_spinbox("검색 영역 폭", "region_w", params.get("region_w", 0))
+            self._add_spinbox("검색 영역 높이", "region_h", params.get("region_h", 0))
+            self.form_layout.addRow(QLabel("<font color='gray'>Tip: 화면의 글자를 인식해 "
+                                           "가장 비슷한 텍스트로 마우스를 옮깁니다. "
+                                           "{변수명} 을 사용할 수 있고, "
+                                           "폭/높이가 0이면 전체 화면을 검색합니다.</font>"))
+
+        elif node.type == ActionType.IMAGE_SWITCH:
+            case_count = switch_case_count(params)
+            self._add_spinbox(f"분기 수 (최대 {MAX_SWITCH_CASES})", "case_count", case_count)
+            for i in range(case_count):
+                self._add_image_capture_ui(f"이미지 {i + 1}", f"image_path_{i}", params.get(f"image_path_{i}", ""))
+            self._add_double_spinbox("일치 정확도 (0~1)", "confidence", params.get("confidence", 0.9))
+            self._add_double_spinbox("제한 시간 (초)", "timeout", params.get("timeout", 5.0))
+            self.form_layout.addRow(QLabel("<font color='gray'>Tip: 먼저 나타난 이미지의 포트(1~N)로 이동하고, "
+                                           "시간이 지나면 T 포트로 이동합니다.</font>"))
+
+        elif node.type == ActionType.FOR_EACH_IMAGE:
+            self._add_image_capture_ui("이미지 캡쳐", "image_path", params.get("image_path", ""))
+            self._add_double_spinbox("일치 정확도 (0~1)", "confidence", params.get("confidence", 0.9))
+            sort_map = {"position": "위치 순 (위→아래)", "score": "정확도 순"}
+            self.sort_reverse_map = {v: k for k, v in sort_map.items()}
+            curr_sort_kr = sort_map.get(params.get("sort", "position"), "위치 순 (위→아래)")
+            self._add_combobox("순서", "sort", list(sort_map.values()), curr_sort_kr,
+                               map_back=True, map_dict=self.sort_reverse_map)
+            self._add_spinbox("최대 개수 (0 = 제한 없음)", "max_hits", params.get("max_hits", 0))
+            self._add_line_edit("저장할 변수명", "variable_name", params.get("variable_name", "hit"))
+            self._add_coord_picker("검색 영역 시작", "region_x", "region_y",
+                                   params.get("region_x", 0), params.get("region_y", 0))
+            self._add_spinbox("검색 영역 폭", "region_w", params.get("region_w", 0))
+            self._add_spinbox("검색 영역 높이", "region_h", params.get("region_h", 0))
+            self.form_layout.addRow(QLabel("<font color='gray'>Tip: 찾은 위치마다 마우스를 옮기고 "
+                                           "'반복' 포트를 실행합니다. "
+                                           "좌표는 {변수명_x}, {변수명_y} 로 사용할 수 있습니다.</font>"))
+            self._add_mask_editor(params)
 
         elif node.type == ActionType.VARIABLE_SET:
             self._add_line_edit("변수 이름", "variable_name", params.get("variable_name", "var"))
@@ -205,6 +275,19 @@ class InspectorWidget(QWidget):
             self._add_spinbox("가로 폭 (Width)", "w", params.get("w", 200))
             self._add_spinbox("세로 높이 (Height)", "h", params.get("h", 50))
 
+        elif node.type == ActionType.OCR_READ_MANY:
+            region_count = ocr_region_count(params)
+            self._add_spinbox(f"영역 수 (최대 {MAX_OCR_REGIONS})", "region_count", region_count)
+            for i in range(region_count):
+                self._add_line_edit(f"영역 {i + 1} 변수명", f"variable_name_{i}",
+                                    params.get(f"variable_name_{i}", f"ocr_result_{i + 1}"))
+                self._add_coord_picker(f"영역 {i + 1} 시작 위치", f"x_{i}", f"y_{i}",
+                                       params.get(f"x_{i}", 0), params.get(f"y_{i}", 0))
+                self._add_spinbox(f"영역 {i + 1} 가로 폭", f"w_{i}", params.get(f"w_{i}", 200))
+                self._add_spinbox(f"영역 {i + 1} 세로 높이", f"h_{i}", params.get(f"h_{i}", 50))
+            self.form_layout.addRow(QLabel("<font color='gray'>Tip: 화면을 한 번만 캡쳐해 모든 영역을 동시에 인식하고, "
+                                           "영역마다 지정한 변수에 저장합니다.</font>"))
+
     def _update_values(self, node):
         """Update widget values without rebuilding form."""
         # Label
@@ -235,6 +318,9 @@ class InspectorWidget(QWidget):
                     if widget.value() != float(val):
                         widget.setValue(float(val))
                 except: pass
+            elif isinstance(widget, QCheckBox):
+                if widget.isChecked() != bool(val):
+                    widget.setChecked(bool(val))
             elif isinstance(widget, QLabel):
                 # For Image Path preview label, usually we don't update text directly?
                 # Actually for path we might update text.
@@ -251,6 +337,15 @@ class InspectorWidget(QWidget):
                 widget.deleteLater()
 
     # --- Helper methods ---
+
+    @staticmethod
+    def _repeated_rows(node):
+        """Number of repeated row groups the form of `node` has (None for fixed forms)."""
+        if node.type == ActionType.IMAGE_SWITCH:
+            return switch_case_count(node.params)
+        if node.type == ActionType.OCR_READ_MANY:
+            return ocr_region_count(node.params)
+        return None
     
     def _add_key_capture_edit(self, label, key, value):
         from PySide6.QtGui import QKeySequence
@@ -418,6 +513,13 @@ class InspectorWidget(QWidget):
         self.form_layout.addRow(label, widget)
         self.param_widgets[key] = widget
 
+    def _add_checkbox(self, label, key, value):
+        widget = QCheckBox()
+        widget.setChecked(bool(value))
+        widget.toggled.connect(lambda val: self._on_param_change(key, val))
+        self.form_layout.addRow(label, widget)
+        self.param_widgets[key] = widget
+
     def _add_double_spinbox(self, label, key, value):
         widget = QDoubleSpinBox()
         widget.setRange(0, 99999)
@@ -469,6 +571,52 @@ class InspectorWidget(QWidget):
         
         self.form_layout.addRow(label_text, container)
 
+    def _add_mask_editor(self, params):
+        """Exclusion rect of the capture (template pixels) ignored while matching."""
+        import os
+
+        def open_editor():
+            from src.ui.mask_editor import MaskEditorDialog
+            # The capture may have changed since the form was built
+            node = self.window().store.get_node(self.current_node_id) if self.window() else None
+            current_params = node.params if node else params
+            image_path = current_params.get("image_path", "")
+            if not image_path or not os.path.exists(image_path):
+                return
+            current = None
+            if int(current_params.get("mask_w", 0)) > 0 and int(current_params.get("mask_h", 0)) > 0:
+                current = tuple(int(current_params.get(k, 0)) for k in ("mask_x", "mask_y", "mask_w", "mask_h"))
+            dialog = MaskEditorDialog(image_path, current, self)
+            if dialog.exec():
+                x, y, w, h = dialog.selected_rect if dialog.selected_rect else (0, 0, 0, 0)
+                self.on_update_callback(self.current_node_id, {"mask_x": x, "mask_y": y, "mask_w": w, "mask_h": h})
+                # Refresh UI
+                updated = self.window().store.get_node(self.current_node_id) if self.window() else None
+                if updated:
+                    self.set_node(updated)
+
+        btn = QPushButton("🩹 제외 영역 그리기 (Mask)")
+        btn.setStyleSheet("background-color: #3A3D41; color: white;")
+        btn.clicked.connect(open_editor)
+        self.form_layout.addRow(btn)
+        self._add_spinbox("제외 영역 X", "mask_x", params.get("mask_x", 0))
+        self._add_spinbox("제외 영역 Y", "mask_y", params.get("mask_y", 0))
+        self._add_spinbox("제외 영역 폭", "mask_w", params.get("mask_w", 0))
+        self._add_spinbox("제외 영역 높이", "mask_h", params.get("mask_h", 0))
+        self.form_layout.addRow(QLabel("<font color='gray'>Tip: 배경이 바뀌는 부분을 제외하면 "
+                                       "정확도를 낮추지 않아도 됩니다. 투명한 PNG 픽셀도 제외됩니다.</font>"))
+
+    def _add_anchor_ui(self, params):
+        """Optional anchor template; the target is searched only in a window offset from its center."""
+        self._add_image_capture_ui("기준 이미지 (선택)", "anchor_path", params.get("anchor_path", ""))
+        self._add_spinbox("기준 오프셋 X", "anchor_x", params.get("anchor_x", 0))
+        self._add_spinbox("기준 오프셋 Y", "anchor_y", params.get("anchor_y", 0))
+        self._add_spinbox("기준 검색 폭", "anchor_w", params.get("anchor_w", 0))
+        self._add_spinbox("기준 검색 높이", "anchor_h", params.get("anchor_h", 0))
+        self.form_layout.addRow(QLabel("<font color='gray'>Tip: 같은 버튼이 여러 개일 때, "
+                                       "유일한 라벨을 기준 이미지로 캡쳐하고 "
+                                       "라벨 중심에서의 오프셋(X, Y)과 검색 범위를 지정하세요.</font>"))
+
     def _open_snipping_tool(self, key, path_lbl, preview_lbl):
         from src.ui.snipping_tool import SnippingTool
         from PySide6.QtCore import QTimer
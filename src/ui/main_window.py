@@ -47,11 +47,15 @@ class MainWindow(QMainWindow):
             "키보드 입력 (Keyboard)": "KEYBOARD_INPUT",
             "대기 (Wait)": "WAIT",
             "이미지 찾아 이동 (Image)": "IMAGE_MATCH",
+            "텍스트 찾아 이동 (Text)": "TEXT_MATCH",
             "스크롤 (Scroll)": "SCROLL",
             "드래그 (Drag)": "DRAG",
+            "이미지 분기 (Switch)": "IMAGE_SWITCH",
+            "이미지마다 반복 (For Each)": "FOR_EACH_IMAGE",
             "논리 분기 (IF)": "IF_CONDITION",
             "변수 설정 (Set)": "VARIABLE_SET",
-            "문자 인식 (OCR)": "OCR_READ"
+            "문자 인식 (OCR)": "OCR_READ",
+            "여러 영역 문자 인식 (OCR)": "OCR_READ_MANY"
         }
         self.toolbox_list.addItems(self.toolbox_items.keys())
         self.toolbox_list.setDragEnabled(True) # Enable Drag
@@ -164,6 +168,12 @@ class MainWindow(QMainWindow):
         # 3. Params Changed: Update Inspector if selected. Update Node Label if changed.
         if event_type == "PARAMS":
             self._update_inspector()
+            # IMAGE_SWITCH output ports follow its template count: redraw the graph
+            from src.domain.actions import ActionType
+            node = self.store.get_node(payload) if payload else None
+            if node and node.type == ActionType.IMAGE_SWITCH:
+                self._render_scene()
+                return
             # If label changed, we might need to repaint node.
             # Ideally find specific item and call update()
             # For simplicity, if label is critical, we might need structure update or smart search.
@@ -225,6 +235,16 @@ class MainWindow(QMainWindow):
                 # Register edge with both nodes for updates
                 source_item.add_edge(edge)
                 target_item.add_edge(edge)
+            
+            # IMAGE_SWITCH / FOR_EACH_IMAGE: one edge per connected extra port
+            for port, target_id in enumerate(node.case_node_ids):
+                if target_id and target_id in node_items and port in node_items[node.id].output_ports:
+                    source_item = node_items[node.id]
+                    target_item = node_items[target_id]
+                    edge = EdgeItem(source_item, target_item, port)
+                    self.scene.addItem(edge)
+                    source_item.add_edge(edge)
+                    target_item.add_edge(edge)
 
     def on_toolbox_item_click(self, item):
         type_str = item.text()
@@ -277,8 +297,8 @@ class MainWindow(QMainWindow):
                     self.store.remove_node(item.node_id)
                 elif isinstance(item, EdgeItem):
                     # Disconnect
-                    # Update source node to next_node_id = None
-                    self.store.connect_nodes(item.source_node_id, None)
+                    # Update source node to next_node_id = None (or clear the switch case port)
+                    self.store.connect_nodes(item.source_node_id, None, item.port)
                 
         elif event.modifiers() & Qt.ControlModifier:
             if event.key() == Qt.Key_C:
@@ -314,37 +334,44 @@ class MainWindow(QMainWindow):
         super().keyPressEvent(event)
 
     def run_workflow(self):
+        from src.domain.plan import PlanError
         from src.domain.runner import WorkflowRunner
         from src.infra.input_driver import InputDriver
         from PySide6.QtCore import QThread, Signal
         
-        # Minimize Window only (do not hide, to ensure easy restoration)
-        self.showMinimized() 
-        
         # Instantiate Driver on Main Thread
         # This is CRITICAL for macOS pynput compatibility
         if not hasattr(self, 'global_driver'):
             self.global_driver = InputDriver()
+
+        # Compile on the main thread: the run works on this snapshot, so edits made meanwhile do not reach it
+        runner = WorkflowRunner(self.store, self.global_driver)
+        try:
+            plan = runner.compile()
+        except PlanError as e:
+            print(f"Run Error: {e}")
+            return
+        
+        # Minimize Window only (do not hide, to ensure easy restoration)
+        self.showMinimized() 
         
         class RunnerWorker(QThread):
             finished_run = Signal()
             
-            def __init__(self, store, driver):
+            def __init__(self, runner, plan):
                 super().__init__()
-                self.store = store
-                self.driver = driver
+                self.runner = runner
+                self.plan = plan
                 
             def run(self):
-                # Pass existing driver
-                runner = WorkflowRunner(self.store, self.driver)
                 try:
-                    runner.run()
+                    self.runner.run(plan=self.plan)
                 except Exception as e:
                     print(f"Run Error: {e}")
                 
                 self.finished_run.emit()
                 
-        self.worker = RunnerWorker(self.store, self.global_driver)
+        self.worker = RunnerWorker(runner, plan)
         self.worker.finished_run.connect(self._on_run_finished)
         self.worker.start()
         
@@ -407,10 +434,14 @@ class MainWindow(QMainWindow):
         # Run in main thread to avoid macOS threading issues (Trace Trap).
         # Use QTimer to allow UI to refresh (e.g. button click state) before running.
         from src.domain.runner import WorkflowRunner
+        from src.infra.input_driver import InputDriver
         from PySide6.QtCore import QTimer
         
         def _run():
-            runner = WorkflowRunner(self.store)
+            # Same driver as full runs: its caches and the OCR worker are not rebuilt per test
+            if not hasattr(self, 'global_driver'):
+                self.global_driver = InputDriver()
+            runner = WorkflowRunner(self.store, self.global_driver)
             try:
                 runner._execute_node(node)
                 print(f"Test Complete: {node.label}")
@@ -421,6 +452,12 @@ class MainWindow(QMainWindow):
         # Delay 100ms
         QTimer.singleShot(100, _run)
 
+    def closeEvent(self, event):
+        # Screen watcher thread and matching pools of the driver shared by runs and tests
+        if hasattr(self, 'global_driver'):
+            self.global_driver.close()
+        super().closeEvent(event)
+
     def run_quick_capture(self, mode: str, callback):
         """Run recorder process in a specific mode (scroll/drag) and callback with results."""
         self._quick_capture_callback = callback
@@ -0,0 +1,92 @@
+from PySide6.QtCore import QPoint, QRect, QSize, Qt
+from PySide6.QtGui import QPixmap
+from PySide6.QtWidgets import QDialog, QHBoxLayout, QLabel, QPushButton, QRubberBand, QVBoxLayout
+
+
+class _ImageCanvas(QLabel):
+    """
+    Shows the capture enlarged and lets the user drag one rectangle over it.
+    """
+    def __init__(self, pixmap: QPixmap, zoom: float, rect=None):
+        super().__init__()
+        self.zoom = zoom
+        self.image_size = pixmap.size()
+        self.setPixmap(pixmap.scaled(pixmap.size() * zoom, Qt.IgnoreAspectRatio, Qt.FastTransformation))
+        self.setFixedSize(self.pixmap().size())
+        self.setCursor(Qt.CrossCursor)
+
+        self.rubber_band = QRubberBand(QRubberBand.Rectangle, self)
+        self.origin = QPoint()
+        if rect:
+            x, y, w, h = rect
+            self.rubber_band.setGeometry(QRect(round(x * zoom), round(y * zoom), round(w * zoom), round(h * zoom)))
+            self.rubber_band.show()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.origin = event.pos()
+            self.rubber_band.setGeometry(QRect(self.origin, QSize()))
+            self.rubber_band.show()
+
+    def mouseMoveEvent(self, event):
+        if not self.origin.isNull():
+            self.rubber_band.setGeometry(QRect(self.origin, event.pos()).normalized() & self.rect())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.origin = QPoint()
+
+    def image_rect(self):
+        """Selected rect in image pixels, or None if nothing is selected."""
+        if self.rubber_band.isHidden():
+            return None
+        geo = self.rubber_band.geometry()
+        x0, y0 = int(geo.left() / self.zoom), int(geo.top() / self.zoom)
+        x1 = min(self.image_size.width(), round((geo.right() + 1) / self.zoom))
+        y1 = min(self.image_size.height(), round((geo.bottom() + 1) / self.zoom))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+class MaskEditorDialog(QDialog):
+    """
+    Draw the part of a captured template that IMAGE_MATCH should ignore
+    (e.g. wallpaper or a list highlight behind the target).
+    `selected_rect` holds the result in template pixels; None means no exclusion.
+    """
+    def __init__(self, image_path: str, rect=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("제외 영역 그리기")
+        self.selected_rect = rect
+
+        pixmap = QPixmap(image_path)
+        # Small captures are enlarged so a few pixels can still be selected
+        zoom = max(1.0, min(4.0, 400 / max(1, pixmap.width(), pixmap.height())))
+        self.canvas = _ImageCanvas(pixmap, zoom, rect)
+
+        hint = QLabel("<font color='gray'>무시할 부분을 드래그하세요. 투명한 PNG 픽셀은 자동으로 제외됩니다.</font>")
+        ok_btn = QPushButton("적용")
+        clear_btn = QPushButton("지우기")
+        cancel_btn = QPushButton("취소")
+        ok_btn.clicked.connect(self._apply)
+        clear_btn.clicked.connect(self._clear)
+        cancel_btn.clicked.connect(self.reject)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(clear_btn)
+        buttons.addStretch()
+        buttons.addWidget(cancel_btn)
+        buttons.addWidget(ok_btn)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(hint)
+        layout.addWidget(self.canvas, alignment=Qt.AlignCenter)
+        layout.addLayout(buttons)
+
+    def _apply(self):
+        self.selected_rect = self.canvas.image_rect()
+        self.accept()
+
+    def _clear(self):
+        self.selected_rect = None
+        self.accept()
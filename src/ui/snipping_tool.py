@@ -1,8 +1,6 @@
 from PySide6.QtWidgets import QWidget, QApplication, QRubberBand
 from PySide6.QtCore import Qt, QRect, Signal, QPoint
 from PySide6.QtGui import QPainter, QColor, QScreen, QPixmap
-import uuid
-import os
 
 class SnippingToolOverlay(QWidget):
     capture_done = Signal(str) # Path
@@ -61,6 +59,14 @@ class SnippingToolOverlay(QWidget):
 
 class SnippingTool(QWidget):
     image_captured = Signal(str)
+    _capture = None  # One capture backend (and frame pool) shared by every snip
+
+    @classmethod
+    def capture_backend(cls):
+        if cls._capture is None:
+            from src.infra.capture import create_backend
+            cls._capture = create_backend()
+        return cls._capture
 
     def __init__(self):
         super().__init__()
@@ -79,32 +85,31 @@ class SnippingTool(QWidget):
             ov.close()
         self.overlays.clear()
         
-        # Local coords in screen (Logical)
-        screen_geo = target_screen.geometry()
-        local_x = x - screen_geo.x()
-        local_y = y - screen_geo.y()
-        
-        # Device Pixel Ratio (e.g. 2.0 for Retina)
-        dpr = target_screen.devicePixelRatio()
-        
-        # Grab FULL screen (Physical Pixels)
-        # grabWindow(0) is the most reliable way to get the screen content
-        full_pixmap = target_screen.grabWindow(0)
-        
-        # Scale Coordinates to Physical
-        phy_x = int(local_x * dpr)
-        phy_y = int(local_y * dpr)
-        phy_w = int(w * dpr)
-        phy_h = int(h * dpr)
+        # Grab the screen under the selection's center through the configured capture
+        # backend (Qt by default, see src.infra.capture). Frames are in physical pixels.
+        region = (x, y, w, h)
+        cx, cy = x + w // 2, y + h // 2
+        sources = self.capture_backend().screen_sources((cx, cy, 1, 1))
+        frame = sources[0].grab() if sources else None
+        if frame is None:
+            print("[Snip] Failed to grab screen.")
+            return
         
-        # Crop
-        pixmap = full_pixmap.copy(phy_x, phy_y, phy_w, phy_h)
+        # Logical selection -> physical crop (handles Retina scaling)
+        rect = frame.logical_to_pixel_rect(region)
+        if rect is None:
+            return
+        phy_x, phy_y, phy_w, phy_h = rect
+        crop = frame.bgr[phy_y:phy_y + phy_h, phy_x:phy_x + phy_w]
         
-        # Save
-        if not os.path.exists("assets"):
-             os.makedirs("assets")
-             
-        filename = f"assets/capture_{uuid.uuid4().hex[:8]}.png"
-        pixmap.save(filename)
+        # Save: named by content (identical captures share one file). The screen's
+        # scale goes into the name (capture_xxxx@2x.png) so matching can resize
+        # the template for screens with a different devicePixelRatio
+        from src.infra.asset_store import AssetStore
+        try:
+            path = AssetStore().save(crop, frame.scale)
+        except OSError as e:
+            print(f"[Snip] Failed to save capture: {e}")
+            return
         
-        self.image_captured.emit(os.path.abspath(filename))
+        self.image_captured.emit(path)
@@ -0,0 +1,10 @@
+import cv2
+import numpy as np
+
+
+def textured_frame(w=640, h=400, seed=0, channels=3):
+    """Smooth random blobs (not per-pixel noise), so downscaled levels and crops keep the structure."""
+    rng = np.random.default_rng(seed)
+    shape = (h // 8, w // 8, channels) if channels > 1 else (h // 8, w // 8)
+    small = rng.integers(0, 255, size=shape, dtype=np.uint8)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_CUBIC)
@@ -0,0 +1,56 @@
+import json
+import os
+import numpy as np
+from src.infra.asset_store import AssetStore, main
+from src.infra.template_cache import TemplateCache, sidecar_path
+
+def _capture(seed, size=(48, 40)):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, size=(size[1], size[0], 3), dtype=np.uint8)
+
+def test_identical_captures_share_one_file(tmp_path):
+    store = AssetStore(str(tmp_path / "assets"))
+
+    first = store.save(_capture(0))
+    again = store.save(_capture(0))
+    retina = store.save(_capture(0), scale=2.0)
+
+    assert first == again and first.endswith("@1x.png")
+    assert retina != first and retina.endswith("@2x.png")
+    assert len(store.assets()) == 2
+    assert os.path.exists(sidecar_path(first))
+
+def test_template_cache_reads_sidecar(tmp_path):
+    store = AssetStore(str(tmp_path / "assets"))
+    img = _capture(1)
+    path = store.save(img)
+    cache = TemplateCache()
+
+    cached = cache.get(path)
+
+    assert cache.stats()["sidecar_loads"] == 1
+    assert np.array_equal(cached.bgr, img)
+    assert cached.pyramid[2].shape == (20, 24)
+
+    # A PNG newer than its sidecar is decoded again
+    os.utime(sidecar_path(path), ns=(0, 0))
+    cache.invalidate()
+    assert np.array_equal(cache.get(path).bgr, img)
+    assert cache.stats()["sidecar_loads"] == 1
+
+def test_gc_removes_only_unreferenced_assets(tmp_path):
+    root = tmp_path / "assets"
+    store = AssetStore(str(root))
+    kept = store.save(_capture(2))
+    dropped = store.save(_capture(3))
+    workflow = tmp_path / "flow.json"
+    workflow.write_text(json.dumps([{"type": "IMAGE_MATCH", "params": {"image_path": kept}}]))
+
+    # Listing only by default
+    assert main(["--root", str(root), "gc", str(workflow)]) == 0
+    assert os.path.exists(dropped)
+
+    assert store.collect_garbage([str(workflow)], delete=True) == [dropped]
+    assert store.assets() == [kept]
+    assert not os.path.exists(sidecar_path(dropped))
+    assert os.path.exists(sidecar_path(kept))
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+import pytest
+from helpers import textured_frame
+
+from src.infra.capture import FileCaptureBackend, create_backend
+from src.infra.image_finder import ImageFinder
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    # Screen 0: a two-frame sequence, screen 1: a single static frame
+    seq_dir = tmp_path / "screen0"
+    seq_dir.mkdir()
+    cv2.imwrite(str(seq_dir / "000.png"), textured_frame(320, 200, 1))
+    cv2.imwrite(str(seq_dir / "001.png"), textured_frame(320, 200, 2))
+    static = tmp_path / "screen1.png"
+    cv2.imwrite(str(static), textured_frame(640, 400, 3))
+    return str(seq_dir), str(static)
+
+def test_file_backend_layout_and_sequence(recorded):
+    backend = FileCaptureBackend(list(recorded), scale=2.0)
+
+    assert backend.screen_rects() == [(0, 0, 160, 100), (160, 0, 320, 200)]
+    first = backend.grab(0).bgr
+    second = backend.grab(0).bgr
+    third = backend.grab(0).bgr
+    assert not np.array_equal(first, second)
+    assert third is first # Loops over the sequence
+
+def test_screen_sources_filtered_by_region(recorded):
+    backend = FileCaptureBackend(list(recorded))
+
+    assert [s.index for s in backend.screen_sources()] == [0, 1]
+    assert [s.index for s in backend.screen_sources((400, 10, 50, 50))] == [1]
+
+def test_image_match_against_recorded_frames(recorded, tmp_path):
+    backend = FileCaptureBackend(list(recorded))
+    frame = backend.grab(1).bgr
+    template_path = str(tmp_path / "target.png")
+    cv2.imwrite(template_path, frame[50:110, 300:380])
+
+    pos = ImageFinder().find(template_path, backend.screen_sources())
+
+    # Screen 1 starts at logical x=320
+    assert pos == (320 + 340, 80)
+
+def test_create_backend(recorded):
+    assert isinstance(create_backend("file", files=list(recorded)), FileCaptureBackend)
+    with pytest.raises(ValueError):
+        create_backend("nope")
+    with pytest.raises(FileNotFoundError):
+        create_backend("file", files=["/does/not/exist/*.png"])
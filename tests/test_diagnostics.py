@@ -0,0 +1,47 @@
+import json
+import os
+import numpy as np
+from src.infra.diagnostics import MatchDiagnostics
+
+def _record(diag, path, score=0.5):
+    frame = np.random.default_rng(0).integers(0, 255, size=(60, 80, 3), dtype=np.uint8)
+    template = np.full((10, 10), 128, dtype=np.uint8)
+    diag.record(path, 0, frame, (0, 0, 80, 60), score, (3, 4), template)
+
+def test_disabled_by_default(tmp_path):
+    diag = MatchDiagnostics(directory=str(tmp_path))
+    _record(diag, "/a.png")
+
+    assert diag.records() == []
+    assert diag.dump("/a.png") is None
+    assert os.listdir(tmp_path) == []
+
+def test_ring_buffer_is_bounded():
+    diag = MatchDiagnostics(enabled=True, capacity=3)
+    for i in range(5):
+        _record(diag, "/a.png", score=i / 10)
+
+    scores = [r.score for r in diag.records()]
+    assert scores == [0.2, 0.3, 0.4]
+
+def test_dump_writes_frames_heatmaps_and_scores(tmp_path):
+    diag = MatchDiagnostics(enabled=True, directory=str(tmp_path))
+    _record(diag, "/a.png", score=0.42)
+    _record(diag, "/b.png")
+
+    out_dir = diag.dump("/a.png").result(timeout=5)
+
+    files = sorted(os.listdir(out_dir))
+    assert files == ["00_screen0_frame.png", "00_screen0_heatmap.png", "scores.json"]
+    with open(os.path.join(out_dir, "scores.json")) as f:
+        assert json.load(f)[0]["score"] == 0.42
+
+def test_dump_retention(tmp_path):
+    diag = MatchDiagnostics(enabled=True, directory=str(tmp_path), max_dumps=2)
+    for i in range(4):
+        _record(diag, f"/t{i}.png")
+        diag.dump(f"/t{i}.png").result(timeout=5)
+
+    kept = sorted(os.listdir(tmp_path))
+    assert len(kept) == 2
+    assert kept[-1].endswith("_t3")
@@ -0,0 +1,26 @@
+import numpy as np
+from src.infra.features import cell_score, offset_clusters
+
+def test_offset_clusters_rank_agreeing_votes():
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0, 200, size=(60, 2)).astype(np.float32)
+    dst = src + (120, 45)
+    dst[40:] = src[40:] + (300, 10)      # A duplicated panel gets fewer votes
+    dst[55:] = rng.uniform(0, 800, size=(5, 2))  # Noise
+
+    clusters = offset_clusters(src, dst)
+
+    assert clusters[0][0] == 40 and np.allclose(clusters[0][1], (120, 45))
+    assert clusters[1][0] == 15 and np.allclose(clusters[1][1], (300, 10))
+
+def test_cell_score_ignores_covered_quarter():
+    rng = np.random.default_rng(1)
+    template = rng.integers(0, 255, size=(80, 80), dtype=np.uint8)
+    covered = template.copy()
+    covered[:40, :40] = 30
+
+    assert cell_score(template, template) > 0.99
+    assert cell_score(template, covered) > 0.99
+    assert cell_score(template, rng.integers(0, 255, size=(80, 80), dtype=np.uint8)) < 0.3
+    # Flat templates carry no evidence
+    assert cell_score(np.full((80, 80), 128, np.uint8), template) == 0.0
@@ -0,0 +1,49 @@
+from src.infra.frames import FramePool, ScreenFrame, wrap_bits
+
+def test_wrap_bits_respects_row_padding():
+    width, height, channels, stride = 5, 3, 3, 16 # 15 bytes of pixels + 1 padding byte per row
+    raw = bytearray(stride * height)
+    for y in range(height):
+        for x in range(width):
+            raw[y * stride + x * channels:y * stride + x * channels + 3] = bytes((y, x, 7))
+
+    view = wrap_bits(raw, width, height, stride, channels)
+
+    assert view.shape == (3, 5, 3)
+    assert tuple(view[2, 4]) == (2, 4, 7)
+    # It is a view, not a copy
+    raw[0] = 99
+    assert view[0, 0, 0] == 99
+
+def test_pool_reuses_buffers_round_robin():
+    pool = FramePool(slots=2)
+    a = pool.acquire(0, 10, 20)
+    b = pool.acquire(0, 10, 20)
+    c = pool.acquire(0, 10, 20)
+
+    assert a[0] is not b[0] # Previous frame stays valid
+    assert c[0] is a[0]
+    for _ in range(10):
+        pool.acquire(0, 10, 20)
+
+    stats = pool.stats()
+    assert stats["allocations"] == 4 # Two slots x (bgr + gray)
+    assert stats["frames"] == 13
+
+def test_pool_reallocates_on_resolution_change():
+    pool = FramePool(slots=1)
+    pool.acquire(0, 10, 20)
+    bgr, gray = pool.acquire(0, 30, 40)
+
+    assert bgr.shape == (30, 40, 3)
+    assert gray.shape == (30, 40)
+    assert pool.stats()["allocations"] == 4
+
+def test_frame_gray_fills_pooled_buffer():
+    pool = FramePool()
+    bgr, gray = pool.acquire(0, 4, 6)
+    bgr[:] = 200
+    frame = ScreenFrame(index=0, bgr=bgr, gray_buffer=gray)
+
+    assert frame.gray is gray
+    assert int(gray[0, 0]) == 200
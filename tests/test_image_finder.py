@@ -0,0 +1,335 @@
+import cv2
+import numpy as np
+import pytest
+from helpers import textured_frame
+
+from src.infra.image_finder import Anchor, ImageFinder, MatchRequest, ScreenFrame
+
+
+@pytest.fixture
+def scene(tmp_path):
+    frame = textured_frame()
+    template = frame[100:150, 200:260].copy()
+    path = tmp_path / "target.png"
+    cv2.imwrite(str(path), template)
+    return frame, template, str(path)
+
+def test_find_returns_logical_center(scene):
+    frame, template, path = scene
+    finder = ImageFinder()
+    # Retina screen placed right of a 1920pt monitor
+    frames = [ScreenFrame(index=1, bgr=frame, origin=(1920, 0), scale=2.0)]
+
+    pos = finder.find(path, frames, confidence=0.9)
+
+    # Center pixel (230, 125) / 2.0 + origin
+    assert pos == (1920 + 115, 62)
+
+def test_gray_lookalike_is_rejected_by_color_check(scene):
+    frame, template, path = scene
+    # A colorless copy of the target earlier in scan order
+    frame[20:70, 40:100] = cv2.cvtColor(cv2.cvtColor(template, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+    finder = ImageFinder()
+
+    assert finder.find(path, [ScreenFrame(index=0, bgr=frame)], mode="exhaustive") == (230, 125)
+    assert finder.last_hits[path].score > 0.99
+
+def test_masked_template_ignores_dynamic_background(scene, tmp_path):
+    frame, template, _ = scene
+    # Captured over another wallpaper: the bottom rows no longer match the screen
+    capture = template.copy()
+    capture[35:] = textured_frame(seed=6)[:15, :60]
+    excluded_path = tmp_path / "excluded.png"
+    cv2.imwrite(str(excluded_path), capture)
+    alpha_path = tmp_path / "alpha.png"
+    alpha = np.full((50, 60), 255, dtype=np.uint8)
+    alpha[35:] = 0
+    cv2.imwrite(str(alpha_path), np.dstack([capture, alpha]))
+    finder = ImageFinder()
+    frames = [ScreenFrame(index=0, bgr=frame)]
+
+    assert finder.find(str(excluded_path), frames, near_last=False) is None
+    assert finder.find(str(excluded_path), frames, exclude=(0, 35, 60, 15)) == (230, 125)
+    assert finder.find(str(alpha_path), frames) == (230, 125)
+
+def test_region_limits_search(scene):
+    frame, template, path = scene
+    # Paste a second copy lower right; the region only covers that one
+    frame[300:350, 500:560] = template
+    finder = ImageFinder()
+    frames = [ScreenFrame(index=0, bgr=frame)]
+
+    pos = finder.find(path, frames, confidence=0.9, region=(450, 250, 150, 140))
+    assert pos == (530, 325)
+
+    assert finder.find(path, frames, confidence=0.9, region=(0, 0, 100, 100)) is None
+
+def test_near_last_hit_then_full_scan_fallback(scene):
+    frame, template, path = scene
+    finder = ImageFinder()
+
+    assert finder.find(path, [ScreenFrame(index=0, bgr=frame)]) == (230, 125)
+    assert finder.last_hits
+
+    # Target moved far away: the local window misses, the full scan still finds it
+    moved = textured_frame(seed=1)
+    moved[320:370, 40:100] = template
+    assert finder.find(path, [ScreenFrame(index=0, bgr=moved)]) == (70, 345)
+
+    # Gone entirely: last hit is forgotten
+    assert finder.find(path, [ScreenFrame(index=0, bgr=textured_frame(seed=2))]) is None
+    assert not finder.last_hits
+
+class CountingSource:
+    def __init__(self, frame):
+        self.index = frame.index
+        self.frame = frame
+        self.grabs = 0
+
+    def grab(self):
+        self.grabs += 1
+        return self.frame
+
+def test_last_screen_searched_first_with_early_exit(scene):
+    frame, template, path = scene
+    other = CountingSource(ScreenFrame(index=0, bgr=textured_frame(seed=3)))
+    target = CountingSource(ScreenFrame(index=1, bgr=frame, origin=(640, 0)))
+    finder = ImageFinder()
+
+    assert finder.find(path, [other, target], near_last=False) == (640 + 230, 125)
+    assert (other.grabs, target.grabs) == (1, 1)
+    assert finder.last_screens
+
+    # Next poll starts on screen 1 and never needs to grab screen 0
+    assert finder.find(path, [other, target], near_last=False) == (640 + 230, 125)
+    assert (other.grabs, target.grabs) == (1, 2)
+
+def test_parallel_scan_of_remaining_screens(scene):
+    frame, template, path = scene
+    screens = [ScreenFrame(index=i, bgr=textured_frame(seed=10 + i), origin=(640 * i, 0)) for i in range(3)]
+    screens.append(ScreenFrame(index=3, bgr=frame, origin=(640 * 3, 0)))
+    finder = ImageFinder(max_workers=2)
+    try:
+        assert finder.find(path, screens, parallel=True) == (640 * 3 + 230, 125)
+        assert finder.find(path, screens[:3], parallel=True) is None
+    finally:
+        finder.shutdown()
+
+def test_unchanged_frame_reuses_previous_result(scene):
+    frame, template, path = scene
+    finder = ImageFinder()
+    blank = textured_frame(seed=5)
+
+    assert finder.find(path, [ScreenFrame(index=0, bgr=blank)]) is None
+    assert finder.result_cache.stats()["hits"] == 0
+
+    # Same pixels, new grab: the miss is answered from the cache
+    assert finder.find(path, [ScreenFrame(index=0, bgr=blank.copy())]) is None
+    assert finder.result_cache.stats()["hits"] == 1
+
+    # Any pixel change invalidates it
+    changed = blank.copy()
+    changed[100:150, 200:260] = template
+    assert finder.find(path, [ScreenFrame(index=0, bgr=changed)]) == (230, 125)
+    assert finder.result_cache.stats()["hits"] == 1
+
+def test_incremental_mode_reuses_response_between_polls(scene):
+    frame, template, path = scene
+    finder = ImageFinder()
+    blank = textured_frame(seed=5)
+
+    assert finder.find(path, [ScreenFrame(index=0, bgr=blank)], mode="incremental") is None
+
+    # The target appears: only the changed blocks are re-matched
+    changed = blank.copy()
+    changed[100:150, 200:260] = template
+    assert finder.find(path, [ScreenFrame(index=0, bgr=changed)], mode="incremental", near_last=False) == (230, 125)
+    assert finder.incremental.stats()["incremental_updates"] >= 1
+
+def test_find_many_matches_templates_on_shared_grab(scene, tmp_path):
+    frame, template, path = scene
+    other = frame[300:340, 500:560].copy()
+    other_path = tmp_path / "other.png"
+    cv2.imwrite(str(other_path), other)
+    source = CountingSource(ScreenFrame(index=0, bgr=frame))
+    finder = ImageFinder()
+
+    try:
+        results = finder.find_many(
+            [MatchRequest(path), MatchRequest(str(other_path)), MatchRequest(path.replace("target", "missing"))],
+            [source],
+        )
+    finally:
+        finder.shutdown()
+
+    assert source.grabs == 1
+    assert results[path] == (230, 125)
+    assert results[str(other_path)] == (530, 320)
+    assert results[path.replace("target", "missing")] is None
+
+def test_find_many_parallel_screens_with_one_worker(scene, tmp_path):
+    frame, template, path = scene
+    other_path = tmp_path / "other.png"
+    cv2.imwrite(str(other_path), frame[300:340, 500:560])
+    # Both templates are only on the second screen: each batched find fans out to it
+    screens = [ScreenFrame(index=0, bgr=textured_frame(seed=9)), ScreenFrame(index=1, bgr=frame, origin=(640, 0))]
+    finder = ImageFinder(max_workers=1)
+
+    try:
+        results = finder.find_many([MatchRequest(path), MatchRequest(str(other_path))], screens, parallel=True)
+    finally:
+        finder.shutdown()
+
+    assert results == {path: (640 + 230, 125), str(other_path): (640 + 530, 320)}
+
+def test_find_many_shares_finder_state_across_threads(tmp_path):
+    frame = textured_frame(seed=11)
+    retina = ScreenFrame(index=1, bgr=cv2.resize(frame, (1280, 800)), origin=(640, 0), scale=2.0)
+    screens = [ScreenFrame(index=0, bgr=textured_frame(seed=12)), retina]
+    requests = []
+    for i in range(8):
+        path = tmp_path / f"t{i}.png"
+        cv2.imwrite(str(path), frame[40 * i:40 * i + 30, 50 * i:50 * i + 40])
+        requests.append(MatchRequest(str(path), near_last=False))
+    finder = ImageFinder(max_workers=4)
+
+    try:
+        for _ in range(3):
+            results = finder.find_many(requests, screens)
+            assert all(results[r.image_path] is not None for r in requests)
+    finally:
+        finder.shutdown()
+
+    # Every template learned its screen and ratio (1x captures shown on the 2x screen)
+    assert finder.screen_scales == {1.0, 2.0}
+    assert {finder.last_ratios[(r.image_path, 1)] for r in requests} == {2.0}
+
+def test_find_all_sorted_by_position(tmp_path):
+    frame = textured_frame()
+    box = np.full((20, 20, 3), 255, dtype=np.uint8)
+    box[3:-3, 3:-3] = 0
+    for x, y in [(300, 200), (40, 30), (500, 30), (40, 300)]:
+        frame[y:y + 20, x:x + 20] = box
+    path = tmp_path / "box.png"
+    cv2.imwrite(str(path), box)
+    finder = ImageFinder()
+
+    centers = finder.find_all(str(path), [ScreenFrame(index=0, bgr=frame, origin=(100, 0))])
+
+    assert centers == [(150, 40), (610, 40), (410, 210), (150, 310)]
+    assert finder.find_all(str(path), [ScreenFrame(index=0, bgr=frame)], region=(0, 0, 200, 100)) == [(50, 40)]
+
+def test_find_all_max_hits_keeps_best_before_position_sort(tmp_path):
+    box = np.full((20, 20, 3), 255, dtype=np.uint8)
+    box[3:-3, 3:-3] = 0
+    # Faded copies higher up on the first screen, exact ones lower on the second
+    faded = textured_frame(seed=1)
+    for x in (40, 300):
+        faded[30:50, x:x + 20] = box
+        faded[30:50, x:x + 3] = 150
+    exact = textured_frame(seed=2)
+    for y in (200, 300):
+        exact[y:y + 20, 100:120] = box
+    path = tmp_path / "box.png"
+    cv2.imwrite(str(path), box)
+    screens = [ScreenFrame(index=0, bgr=faded), ScreenFrame(index=1, bgr=exact, origin=(640, 0))]
+
+    assert len(ImageFinder().find_all(str(path), screens, confidence=0.8)) == 4
+    centers = ImageFinder().find_all(str(path), screens, confidence=0.8, max_hits=2)
+    assert centers == [(750, 210), (750, 310)]
+
+def _retina_capture(tmp_path, frame, name):
+    # The 60x50 target captured on a 2x screen: twice as many pixels
+    template = cv2.resize(frame[100:150, 200:260], (120, 100), interpolation=cv2.INTER_CUBIC)
+    path = tmp_path / name
+    cv2.imwrite(str(path), template)
+    return str(path)
+
+def test_recorded_capture_scale_picks_template_size(tmp_path):
+    frame = textured_frame()
+    path = _retina_capture(tmp_path, frame, "target@2x.png")
+    finder = ImageFinder()
+
+    assert finder.find(path, [ScreenFrame(index=0, bgr=frame)]) == (230, 125)
+    assert finder.last_hits[path].ratio == 0.5
+
+def test_1x_capture_matches_on_2x_only_screens(tmp_path):
+    from src.infra.asset_store import AssetStore
+    frame = textured_frame()
+    path = AssetStore(str(tmp_path)).save(frame[100:150, 200:260].copy(), scale=1.0)
+    retina = cv2.resize(frame, (1280, 800), interpolation=cv2.INTER_CUBIC)
+    finder = ImageFinder()
+
+    # No 1x screen was ever seen: only the recorded scale gives the ratio
+    assert finder.find(path, [ScreenFrame(index=0, bgr=retina, scale=2.0)]) == (230, 125)
+    assert finder.last_hits[path].ratio == 2.0
+
+def test_unknown_capture_scale_sweeps_seen_screen_scales(tmp_path):
+    frame = textured_frame()
+    path = _retina_capture(tmp_path, frame, "target.png")
+    finder = ImageFinder()
+    retina = ScreenFrame(index=1, bgr=textured_frame(w=320, h=200, seed=9), origin=(640, 0), scale=2.0)
+
+    # The 2x screen is seen while the target is shown on the 1x one
+    assert finder.find(path, [retina, ScreenFrame(index=0, bgr=frame)]) == (230, 125)
+    assert finder.last_ratios[(path, 0)] == 0.5
+
+def test_feature_mode_finds_partly_covered_template(tmp_path):
+    frame = textured_frame(w=800, h=600, seed=4)
+    template = frame[200:440, 300:620].copy()
+    path = tmp_path / "panel.png"
+    cv2.imwrite(str(path), template)
+    # Another window now covers a quarter of the panel
+    frame[200:320, 300:460] = 40
+    finder = ImageFinder()
+    frames = [ScreenFrame(index=0, bgr=frame)]
+
+    assert finder.find(str(path), frames, mode="pyramid", near_last=False) is None
+    assert finder.find(str(path), frames, mode="feature", near_last=False) == (460, 320)
+    assert finder.last_hits[str(path)].score > 0.9
+    assert finder.find(str(path), [ScreenFrame(index=0, bgr=textured_frame(w=800, h=600, seed=8))],
+                       mode="feature", near_last=False) is None
+
+def test_anchor_picks_target_next_to_unique_label(tmp_path):
+    frame = textured_frame()
+    button = np.full((20, 40, 3), 200, dtype=np.uint8)
+    button[5:15, 8:32] = 60
+    for y in (50, 150, 250):
+        frame[y:y + 20, 300:340] = button
+    # Unique label left of the middle button
+    label = frame[140:180, 100:180].copy()
+    title = frame[10:40, 420:520].copy()
+    paths = {}
+    for name, img in (("button", button), ("label", label), ("title", title)):
+        paths[name] = str(tmp_path / f"{name}.png")
+        cv2.imwrite(paths[name], img)
+    finder = ImageFinder()
+    frames = [ScreenFrame(index=0, bgr=frame)]
+    # Label center is (140, 160); search right of it
+    anchor = Anchor(paths["label"], offset=(100, -30, 150, 60))
+
+    assert finder.find(paths["button"], frames, anchor=anchor) == (320, 160)
+
+    # Same screen again: the anchor and target searches come from the result cache
+    finder.find(paths["button"], frames, anchor=anchor)
+    misses = finder.result_cache.stats()["misses"]
+    assert finder.find(paths["button"], frames, anchor=anchor) == (320, 160)
+    assert finder.result_cache.stats()["misses"] == misses
+
+    # Chained: the label is itself only searched below the title (center (470, 25))
+    chained = Anchor(paths["label"], offset=(100, -30, 150, 60),
+                     anchor=Anchor(paths["title"], offset=(-400, 100, 150, 100)))
+    assert finder.find(paths["button"], frames, anchor=chained) == (320, 160)
+
+    # No anchor on screen: no search at all
+    assert finder.find(paths["button"], [ScreenFrame(index=0, bgr=textured_frame(seed=7))], anchor=anchor) is None
+
+def test_tiled_mode_matches_exhaustive(scene):
+    frame, template, path = scene
+    finder = ImageFinder()
+    finder.tiled.min_pixels = 0
+    try:
+        assert finder.find(path, [ScreenFrame(index=0, bgr=frame)], mode="tiled") == (230, 125)
+        assert finder.last_hits[path].score > 0.99
+    finally:
+        finder.shutdown()
@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+import pytest
+from helpers import textured_frame
+
+from src.infra import matcher
+from src.infra.incremental import IncrementalMatcher, dirty_tiles
+
+
+def test_dirty_tiles_marks_only_changed_tiles():
+    prev = textured_frame(900, 600)
+    cur = prev.copy()
+    cur[130, 700, 2] ^= 1
+
+    dirty = dirty_tiles(prev, cur, tile=64)
+
+    assert dirty.shape == (10, 15)
+    assert dirty.sum() == 1 and dirty[2, 10]
+
+@pytest.mark.parametrize("channels", [3, 1])
+def test_incremental_matches_full_recompute(channels):
+    frame = textured_frame(900, 600)
+    if channels == 1:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    template = frame[400:460, 700:770].copy()
+    inc = IncrementalMatcher(tile=64)
+
+    first = inc(frame, template, key="s0")
+    assert first == (inc.response(frame, template, "s0").max(), (700, 400))
+
+    # A spinner in one corner and a toast sliding over the target
+    for step in range(3):
+        frame = frame.copy()
+        frame[20:50, 20:50] = 40 * step
+        frame[420 + step * 10:440 + step * 10, 690:760] = 255 - 30 * step
+        res = inc.response(frame, template, "s0").copy()
+
+        assert np.array_equal(res, inc.full_response(frame, template))
+        val, loc = inc(frame, template, key="s0")
+        ref_val, ref_loc = matcher.match_exhaustive(frame, template)
+        assert loc == ref_loc
+        assert abs(val - ref_val) <= matcher.PYRAMID_SCORE_TOLERANCE
+
+    stats = inc.stats()
+    assert stats["full_updates"] == 1
+    # Only the blocks around the two changed areas were recomputed
+    assert stats["blocks_recomputed"] < 3 * len(range(0, 541, 256)) * len(range(0, 831, 256))
+
+def test_new_template_starts_over():
+    frame = textured_frame(900, 600)
+    inc = IncrementalMatcher()
+    inc(frame, frame[0:40, 0:40].copy(), key="s0")
+    val, loc = inc(frame, frame[100:140, 300:340].copy(), key="s0")
+
+    assert loc == (300, 100)
+    assert inc.stats()["full_updates"] == 2
@@ -0,0 +1,28 @@
+import numpy as np
+from unittest.mock import MagicMock
+from src.infra.input_driver import InputDriver
+
+def test_ocr_cache_skips_recognition_of_unchanged_pixels():
+    driver = InputDriver(capture=MagicMock())
+    recognize = MagicMock(return_value="Ready")
+    region = np.full((20, 80, 3), 255, dtype=np.uint8)
+
+    assert driver._cached_ocr(("tesseract", "eng"), region, recognize) == "Ready"
+    assert driver._cached_ocr(("tesseract", "eng"), region.copy(), recognize) == "Ready"
+    assert recognize.call_count == 1
+
+    # Other pixels or other settings are recognized again
+    region[5, 5] = 0
+    driver._cached_ocr(("tesseract", "eng"), region, recognize)
+    driver._cached_ocr(("tesseract", "kor+eng"), region, recognize)
+    assert recognize.call_count == 3
+    assert driver.ocr_cache.stats() == {"hits": 1, "misses": 3, "entries": 3}
+
+def test_empty_text_is_cached_too():
+    driver = InputDriver(capture=MagicMock())
+    recognize = MagicMock(return_value="")
+    region = np.zeros((10, 10, 3), dtype=np.uint8)
+
+    driver._cached_ocr(("vision",), region, recognize)
+    assert driver._cached_ocr(("vision",), region, recognize) == ""
+    assert recognize.call_count == 1
@@ -0,0 +1,27 @@
+from src.infra.frames import fingerprint
+from src.infra.match_cache import MatchResultCache
+import numpy as np
+
+def test_lru_eviction_and_counters():
+    cache = MatchResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1 # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 2}
+
+def test_fingerprint_detects_single_pixel_change():
+    frame = np.zeros((40, 60, 3), dtype=np.uint8)
+    base = fingerprint(frame)
+    assert fingerprint(frame.copy()) == base
+
+    frame[39, 59, 2] = 1
+    assert fingerprint(frame) != base
+
+def test_fingerprint_of_views_matches_copies():
+    frame = np.arange(40 * 60 * 3, dtype=np.uint32).astype(np.uint8).reshape(40, 60, 3)
+    view = frame[5:25, 10:30]
+    assert fingerprint(view) == fingerprint(view.copy())
@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+import pytest
+from helpers import textured_frame
+
+from src.infra import matcher
+
+
+@pytest.mark.parametrize("x, y", [(37, 51), (400, 300), (0, 0), (561, 333)])
+def test_pyramid_matches_exhaustive(x, y):
+    frame = textured_frame()
+    template = frame[y:y + 60, x:x + 70].copy()
+
+    ref_val, ref_loc = matcher.match_exhaustive(frame, template)
+    val, loc = matcher.match_pyramid(frame, template)
+
+    assert ref_loc == (x, y)
+    assert loc == ref_loc
+    assert abs(val - ref_val) <= matcher.PYRAMID_SCORE_TOLERANCE
+
+def test_pyramid_small_template_falls_back():
+    frame = textured_frame()
+    template = frame[10:22, 10:40].copy()
+
+    assert matcher.pyramid_factor(template.shape) == 1
+    assert matcher.match_pyramid(frame, template) == matcher.match_exhaustive(frame, template)
+
+def test_get_matcher_defaults_to_pyramid():
+    assert matcher.get_matcher(None) is matcher.match_pyramid
+    assert matcher.get_matcher("unknown") is matcher.match_pyramid
+    assert matcher.get_matcher("exhaustive") is matcher.match_exhaustive
+
+def test_color_check_at_gray_candidates_matches_full_color_scores():
+    frame = textured_frame()
+    template = frame[120:170, 300:360].copy()
+    # Same luminance, no color: indistinguishable in gray
+    frame[20:70, 40:100] = cv2.cvtColor(cv2.cvtColor(template, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    candidates = matcher.candidates_pyramid(gray, cv2.cvtColor(template, cv2.COLOR_BGR2GRAY))
+    assert {loc for _, loc in candidates[:2]} == {(40, 20), (300, 120)}
+
+    val, loc = matcher.verify_color(frame, template, candidates)
+    full = cv2.matchTemplate(frame, template, matcher.MATCH_METHOD)
+    assert loc == (300, 120)
+    assert abs(val - full[120, 300]) < 1e-4
+    assert full[20, 40] < 0.9
+
+def test_masked_pyramid_ignores_changed_background():
+    frame = textured_frame(seed=4)
+    template = frame[200:260, 300:380].copy()
+    # The capture had a different background on its right half
+    template[:, 40:] = textured_frame(seed=5)[:60, :40]
+    mask = np.zeros(template.shape[:2], dtype=np.uint8)
+    mask[:, :40] = 255
+
+    assert matcher.match_exhaustive(frame, template)[0] < 0.9
+    ref_val, ref_loc = matcher.match_exhaustive(frame, template, mask)
+    val, loc = matcher.match_pyramid(frame, template, mask=mask)
+
+    assert ref_loc == loc == (300, 200)
+    assert ref_val > 0.99 and abs(val - ref_val) <= matcher.PYRAMID_SCORE_TOLERANCE
+
+def _grid_of_boxes(rows=6, cols=8):
+    frame = textured_frame(w=900, h=600)
+    box = np.full((24, 24, 3), 255, dtype=np.uint8)
+    box[2:-2, 2:-2] = 30
+    box[8:16, 8:16] = 200
+    positions = []
+    for r in range(rows):
+        for c in range(cols):
+            x, y = 20 + c * 110, 15 + r * 95
+            frame[y:y + 24, x:x + 24] = box
+            positions.append((x, y))
+    return frame, box, positions
+
+def test_match_all_returns_every_occurrence_once():
+    frame, box, positions = _grid_of_boxes()
+
+    hits = matcher.match_all(frame, box, 0.9)
+
+    assert sorted(loc for _, loc in hits) == sorted(positions)
+    scores = [score for score, _ in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert len(matcher.match_all(frame, box, 0.9, max_hits=5)) == 5
+
+def test_nms_collapses_overlapping_windows():
+    res = np.zeros((50, 50), dtype=np.float32)
+    res[10, 10], res[12, 11], res[40, 40] = 0.95, 0.97, 0.91
+
+    hits = matcher.non_max_suppression(res, 0.9, (20, 20))
+
+    # (11, 12) overlaps (10, 10) almost entirely and wins on score
+    assert hits == [(pytest.approx(0.97), (11, 12)), (pytest.approx(0.91), (40, 40))]
@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+import pytest
+from src.infra.capture import FileCaptureBackend
+from src.infra.frames import fingerprint
+from src.infra.input_driver import InputDriver
+from src.infra.ocr import OcrWorker, StubOcrBackend, create_ocr_backend
+
+def _screen(w=400, h=300):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, size=(h, w, 3), dtype=np.uint8)
+
+def test_stub_is_deterministic():
+    stub = StubOcrBackend()
+    region = _screen(80, 20)
+    assert stub.recognize(region) == stub.recognize(region.copy())
+    assert stub.recognize(region).startswith("stub:80x20:")
+
+    known = StubOcrBackend({fingerprint(region): "Ready"})
+    assert known.recognize(region) == "Ready"
+    assert known.settings != stub.settings
+
+def test_worker_round_trip_through_shared_memory():
+    region = _screen(120, 40)
+    worker = OcrWorker("stub")
+    try:
+        assert worker.recognize(region) == StubOcrBackend().recognize(region)
+        # Larger regions grow the shared buffer; the process is kept
+        large = _screen(1200, 900)
+        assert worker.recognize(large) == StubOcrBackend().recognize(large)
+        assert worker.recognize(region[5:25, 10:90]) == StubOcrBackend().recognize(region[5:25, 10:90])
+        assert worker.starts == 1
+    finally:
+        worker.close()
+
+def test_worker_restarts_after_crash():
+    worker = OcrWorker("stub")
+    try:
+        worker.recognize(_screen(10, 10))
+        worker._process.kill()
+        worker._process.join()
+        assert worker.recognize(_screen(10, 10)).startswith("stub:10x10:")
+        assert worker.starts == 2
+    finally:
+        worker.close()
+
+def test_create_from_env(monkeypatch):
+    monkeypatch.setenv("AUTOFLOW_OCR", "stub")
+    monkeypatch.setenv("AUTOFLOW_OCR_WORKER", "0")
+    assert isinstance(create_ocr_backend(), StubOcrBackend)
+    with pytest.raises(ValueError):
+        create_ocr_backend("nope")
+
+def test_drivers_share_one_default_backend(monkeypatch, tmp_path):
+    from src.infra import ocr
+    monkeypatch.setenv("AUTOFLOW_OCR", "stub")
+    monkeypatch.setattr(ocr, "_shared", None)
+    cv2.imwrite(str(tmp_path / "000.png"), _screen())
+    first = InputDriver(capture=FileCaptureBackend([str(tmp_path)]))
+    second = InputDriver(capture=FileCaptureBackend([str(tmp_path)]))
+
+    # One worker for both; closing a driver leaves it to the other
+    assert isinstance(first.ocr, OcrWorker) and first.ocr is second.ocr
+    first.close()
+    assert second.read_text_at(0, 0, 40, 20).startswith("stub:40x20:")
+    assert second.ocr.starts == 1
+    second.ocr.close()
+
+def test_driver_reads_region_of_captured_screen(tmp_path):
+    screen = _screen()
+    cv2.imwrite(str(tmp_path / "000.png"), screen)
+    driver = InputDriver(capture=FileCaptureBackend([str(tmp_path)]), ocr=StubOcrBackend())
+
+    text = driver.read_text_at(50, 60, 100, 30)
+    assert text == StubOcrBackend().recognize(screen[60:90, 50:150])
+    assert driver.read_text_at(50, 60, 100, 30) == text
+    assert driver.ocr_cache.stats()["hits"] == 1
+    assert driver.read_text_at(5000, 5000, 10, 10) == ""
+
+def test_worker_recognizes_batch_in_one_round_trip():
+    screen = _screen()
+    crops = [screen[10:40, 20:120], screen[100:130, 50:250], screen[200:260, 0:400]]
+    worker = OcrWorker("stub")
+    try:
+        assert worker.recognize_many(crops) == [StubOcrBackend().recognize(c) for c in crops]
+        assert worker.recognize_many([]) == []
+    finally:
+        worker.close()
+
+def test_driver_reads_regions_from_one_grab(tmp_path):
+    screen = _screen()
+    cv2.imwrite(str(tmp_path / "000.png"), screen)
+    capture = FileCaptureBackend([str(tmp_path)])
+    driver = InputDriver(capture=capture, ocr=StubOcrBackend())
+    stub = StubOcrBackend()
+    regions = {"name": (10, 20, 100, 30), "phone": (10, 60, 150, 30), "gone": (5000, 0, 10, 10)}
+
+    texts = driver.read_texts_at(regions)
+    assert texts == {
+        "name": stub.recognize(screen[20:50, 10:110]),
+        "phone": stub.recognize(screen[60:90, 10:160]),
+        "gone": "",
+    }
+    assert capture.pool.stats()["frames"] == 1
+
+    # Unchanged regions come from the cache, also for single reads
+    assert driver.read_texts_at(regions) == texts
+    assert driver.read_text_at(10, 20, 100, 30) == texts["name"]
+    assert driver.ocr_cache.stats()["hits"] == 3
@@ -1,6 +1,7 @@
 import pytest
 from src.state.store import Store
 from src.domain.actions import ActionNode, ActionType
+from src.domain.plan import PlanError
 from src.domain.runner import WorkflowRunner
 from unittest.mock import MagicMock
 
@@ -71,3 +72,267 @@ def test_workflow_branching_execution(setup_runner):
     result = runner._execute_node(node_if)
     next_id = node_if.true_node_id if result else node_if.false_node_id
     assert next_id == "false_path"
+
+def test_consecutive_image_nodes_share_one_grab(setup_runner):
+    runner, store, driver = setup_runner
+
+    # IMAGE_MATCH A --(default port)--> IMAGE_MATCH B
+    node_a = ActionNode(id="a", type=ActionType.IMAGE_MATCH, params={"image_path": "a.png", "parallel_screens": True})
+    node_b = ActionNode(id="b", type=ActionType.IMAGE_MATCH, params={"image_path": "b.png"})
+    node_a.next_node_id = "b"
+    store.add_node(node_a)
+    store.add_node(node_b)
+    driver.find_images.return_value = {"a.png": (1, 2), "b.png": (10, 20)}
+
+    runner.run("a")
+    assert [r.image_path for r in driver.find_images.call_args[0][0]] == ["a.png", "b.png"]
+    assert driver.find_images.call_args.kwargs["parallel"] is True
+    # B ran right after: answered from the batched grab
+    driver.find_image.assert_not_called()
+    assert [c.args for c in driver.move.call_args_list] == [(1, 2), (10, 20)]
+
+def test_single_node_test_does_not_look_ahead(setup_runner):
+    runner, store, driver = setup_runner
+    node_a = ActionNode(id="a", type=ActionType.IMAGE_MATCH, params={"image_path": "a.png"})
+    node_a.next_node_id = "b"
+    store.add_node(node_a)
+    store.add_node(ActionNode(id="b", type=ActionType.IMAGE_MATCH, params={"image_path": "b.png"}))
+    driver.find_image.return_value = (1, 2)
+
+    assert runner._execute_node(node_a) is True
+    driver.find_images.assert_not_called()
+    assert runner._prefetched == {}
+
+def test_branch_with_an_input_arm_is_not_batched(setup_runner):
+    runner, store, driver = setup_runner
+
+    # The True arm clicks before anything else: B is not matched on A's grab
+    node_a = ActionNode(id="a", type=ActionType.IMAGE_MATCH, params={"image_path": "a.png"})
+    node_a.true_node_id, node_a.false_node_id = "click", "b"
+    for node in (node_a, ActionNode(id="click", type=ActionType.CLICK),
+                 ActionNode(id="b", type=ActionType.IMAGE_MATCH, params={"image_path": "b.png"})):
+        store.add_node(node)
+    driver.find_image.return_value = (1, 2)
+
+    runner.run("a")
+    driver.find_images.assert_not_called()
+
+def test_if_chain_on_image_matches_is_batched(setup_runner):
+    runner, store, driver = setup_runner
+
+    # A -> IF found_a -> (True) B / (False) C: both arms are image nodes
+    node_a = ActionNode(id="a", type=ActionType.IMAGE_MATCH, params={"image_path": "a.png"})
+    node_if = ActionNode(id="if", type=ActionType.IF_CONDITION, params={"condition": "True"})
+    node_a.next_node_id = "if"
+    node_if.true_node_id, node_if.false_node_id = "b", "c"
+    for node in (node_a, node_if, ActionNode(id="b", type=ActionType.IMAGE_MATCH, params={"image_path": "b.png"}),
+                 ActionNode(id="c", type=ActionType.IMAGE_MATCH, params={"image_path": "c.png"})):
+        store.add_node(node)
+    driver.find_images.return_value = {"a.png": (1, 2), "b.png": (3, 4), "c.png": None}
+
+    runner.run("a")
+    assert [r.image_path for r in driver.find_images.call_args[0][0]] == ["a.png", "b.png", "c.png"]
+    driver.find_image.assert_not_called()
+    driver.move.assert_called_with(3, 4)
+
+def test_image_match_anchor_params(setup_runner):
+    runner, store, driver = setup_runner
+    node = ActionNode(type=ActionType.IMAGE_MATCH, params={
+        "image_path": "edit.png", "confidence": 0.8,
+        "anchor_path": "label.png", "anchor_x": 120, "anchor_y": -20, "anchor_w": 200, "anchor_h": 40,
+    })
+    driver.find_image.return_value = (300, 100)
+
+    assert runner._execute_node(node) is True
+    anchor = driver.find_image.call_args.kwargs["anchor"]
+    assert (anchor.image_path, anchor.offset, anchor.confidence) == ("label.png", (120, -20, 200, 40), 0.8)
+
+    # Without a window the anchor is ignored
+    node.params["anchor_w"] = 0
+    assert runner._image_request(node.params).anchor is None
+
+def test_image_switch_routes_to_first_template_found(setup_runner):
+    runner, store, driver = setup_runner
+
+    node_switch = ActionNode(id="switch", type=ActionType.IMAGE_SWITCH, params={
+        "case_count": 2, "image_path_0": "ok.png", "image_path_1": "error.png", "timeout": 0
+    })
+    node_switch.case_node_ids = ["on_ok", "on_error"]
+    node_switch.next_node_id = "on_timeout"
+    for node in (node_switch, ActionNode(id="on_ok"), ActionNode(id="on_error"), ActionNode(id="on_timeout")):
+        store.add_node(node)
+
+    # Only the error dialog is on screen: one batched grab, routed to the second port
+    driver.find_images.return_value = {"ok.png": None, "error.png": (5, 6)}
+    assert runner._execute_node(node_switch) == 1
+    assert len(driver.find_images.call_args[0][0]) == 2
+
+    driver.find_images.return_value = {"ok.png": None, "error.png": None}
+    assert runner._execute_node(node_switch) is None
+
+def test_image_switch_unconnected_case_does_not_take_timeout_port(setup_runner, capsys):
+    runner, store, driver = setup_runner
+
+    node_switch = ActionNode(id="switch", type=ActionType.IMAGE_SWITCH, params={
+        "case_count": 2, "image_path_0": "ok.png", "image_path_1": "error.png", "timeout": 0,
+        # Leftovers of an IMAGE_MATCH: they must not reach the case templates
+        "mask_w": 10, "mask_h": 10, "anchor_path": "label.png", "anchor_w": 50, "anchor_h": 50,
+    })
+    node_switch.case_node_ids = ["on_ok", ""]
+    node_switch.next_node_id = "on_timeout"
+    on_timeout = ActionNode(id="on_timeout", type=ActionType.MOUSE_MOVE, params={"x": 9, "y": 9})
+    for node in (node_switch, ActionNode(id="on_ok"), on_timeout):
+        store.add_node(node)
+    driver.find_images.return_value = {"ok.png": None, "error.png": (5, 6)}
+
+    runner.run("switch")
+    driver.move.assert_called_once_with(5, 6)
+    assert "case 2 matched but its port is not connected" in capsys.readouterr().out
+    assert all(r.exclude is None and r.anchor is None for r in driver.find_images.call_args[0][0])
+
+def test_image_switch_ports_survive_serialization():
+    node = ActionNode(type=ActionType.IMAGE_SWITCH)
+    store = Store()
+    store.add_node(node)
+    store.connect_nodes(node.id, "target", port=2)
+
+    assert node.case_node_ids == [None, None, "target"]
+    assert ActionNode.from_dict(node.to_dict()).case_node_ids == [None, None, "target"]
+
+def test_for_each_image_visits_every_hit(setup_runner):
+    runner, store, driver = setup_runner
+
+    node = ActionNode(id="each", type=ActionType.FOR_EACH_IMAGE,
+                      params={"image_path": "box.png", "variable_name": "box"})
+    driver.find_all_images.return_value = [(10, 20), (30, 40)]
+
+    assert runner._execute_node(node) is True
+    assert (runner.variables["box_x"], runner.variables["box_y"], runner.variables["box_index"]) == (10, 20, 0)
+    assert runner._execute_node(node) is True
+    driver.move.assert_called_with(30, 40)
+    assert runner.variables["box_count"] == 2
+
+    # Exhausted: leave through the default port and search again next time
+    assert runner._execute_node(node) is False
+    assert runner._execute_node(node) is True
+    assert driver.find_all_images.call_count == 2
+
+def test_ocr_stats_reported_by_runner(setup_runner):
+    runner, store, driver = setup_runner
+    driver.read_text_at.return_value = "42"
+    driver.ocr_cache.stats.return_value = {"hits": 3, "misses": 1, "entries": 1}
+    node = ActionNode(type=ActionType.OCR_READ, params={"variable_name": "value"})
+    store.add_node(node)
+
+    runner.run(node.id)
+
+    assert runner.variables["value"] == "42"
+    assert runner.ocr_stats()["hits"] == 3
+
+def test_ocr_read_many_writes_each_region(setup_runner):
+    runner, store, driver = setup_runner
+    driver.read_texts_at.return_value = {"name": "Kim", "phone": "010"}
+    node = ActionNode(type=ActionType.OCR_READ_MANY, params={
+        "region_count": 3,
+        "variable_name_0": "name", "x_0": 10, "y_0": 20, "w_0": 100, "h_0": 30,
+        "variable_name_1": "phone", "x_1": 10, "y_1": 60, "w_1": 100, "h_1": 30,
+        "variable_name_2": "unused", "w_2": 0,
+    })
+
+    assert runner._execute_node(node) is True
+    driver.read_texts_at.assert_called_once_with({"name": (10, 20, 100, 30), "phone": (10, 60, 100, 30)})
+    assert runner.variables["name"] == "Kim" and runner.variables["phone"] == "010"
+
+def test_text_match_moves_to_interpolated_label(setup_runner):
+    runner, store, driver = setup_runner
+    runner.variables["button"] = "Submit"
+    driver.find_text.return_value = (120, 340)
+    node = ActionNode(type=ActionType.TEXT_MATCH, params={"text": "{button}", "region_w": 0})
+
+    assert runner._execute_node(node) is True
+    driver.find_text.assert_called_once_with("Submit", region=None, min_score=0.8)
+    driver.move.assert_called_with(120, 340)
+
+def test_compiled_plan_runs_loops_and_ignores_later_edits(setup_runner):
+    runner, store, driver = setup_runner
+
+    # SET total = 0 -> LOOP x1000 --(True)--> SET total = total + 1 -> back to LOOP; done --> MOVE
+    node_init = ActionNode(id="init", type=ActionType.VARIABLE_SET, params={"variable_name": "total", "value": "0"})
+    node_loop = ActionNode(id="loop", type=ActionType.LOOP, params={"times": 1000})
+    node_add = ActionNode(id="add", type=ActionType.VARIABLE_SET,
+                          params={"variable_name": "total", "value": "total + 1"})
+    node_done = ActionNode(id="done", type=ActionType.MOUSE_MOVE, params={"x": 5, "y": 6})
+    node_init.next_node_id = "loop"
+    node_loop.true_node_id, node_loop.false_node_id = "add", "done"
+    node_add.next_node_id = "loop"
+    for node in (node_init, node_loop, node_add, node_done):
+        store.add_node(node)
+
+    plan = runner.compile("init")
+    assert [step.node_id for step in plan.steps] == ["init", "loop", "add", "done"]
+
+    # Edits after compiling do not reach the plan
+    node_add.params["value"] = "total + 100"
+    node_loop.false_node_id = None
+    runner.run(plan=plan)
+
+    assert runner.variables["total"] == 1000
+    driver.move.assert_called_once_with(5, 6)
+
+def test_loop_ports_fall_back_to_the_default_port(setup_runner):
+    runner, store, driver = setup_runner
+
+    # LOOP x2 with only a True port: the body runs twice, then the default port is taken
+    node_loop = ActionNode(id="loop", type=ActionType.LOOP, params={"times": 2})
+    node_body = ActionNode(id="body", type=ActionType.MOUSE_MOVE, params={"x": 1, "y": 1})
+    node_done = ActionNode(id="done", type=ActionType.MOUSE_MOVE, params={"x": 9, "y": 9})
+    node_loop.true_node_id, node_loop.next_node_id = "body", "done"
+    node_body.next_node_id = "loop"
+    # A LOOP without any port just continues on the default one
+    node_bare = ActionNode(id="bare", type=ActionType.LOOP, params={"times": 3})
+    node_bare.next_node_id = "done"
+    for node in (node_loop, node_body, node_done, node_bare):
+        store.add_node(node)
+
+    runner.run("loop")
+    assert [c.args for c in driver.move.call_args_list] == [(1, 1), (1, 1), (9, 9)]
+
+    driver.move.reset_mock()
+    runner.run("bare")
+    driver.move.assert_called_once_with(9, 9)
+
+def test_compile_rejects_invalid_params(setup_runner, capsys):
+    runner, store, driver = setup_runner
+    node = ActionNode(label="Bad wait", type=ActionType.WAIT, params={"seconds": "soon"})
+    store.add_node(node)
+
+    with pytest.raises(PlanError, match="Bad wait"):
+        runner.compile()
+    runner.run()
+    assert "Plan Error at Bad wait" in capsys.readouterr().out
+    driver.wait.assert_not_called()
+
+def test_compile_names_the_batched_node_with_invalid_params(setup_runner):
+    runner, store, driver = setup_runner
+    # B's bad confidence is read while compiling A (B joins A's grab)
+    node_a = ActionNode(id="a", label="Find A", type=ActionType.IMAGE_MATCH, params={"image_path": "a.png"})
+    node_b = ActionNode(id="b", label="Find B", type=ActionType.IMAGE_MATCH,
+                        params={"image_path": "b.png", "confidence": "high"})
+    node_a.next_node_id = "b"
+    store.add_node(node_a)
+    store.add_node(node_b)
+
+    with pytest.raises(PlanError) as error:
+        runner.compile("a")
+    assert error.value.label == "Find B"
+
+def test_constant_text_and_conditions_are_prepared_once(setup_runner):
+    runner, store, driver = setup_runner
+    node = ActionNode(type=ActionType.KEYBOARD_INPUT, params={"mode": "text", "text": "plain", "interval": 0})
+    run = runner._compile_node(node, store.get_node)
+    run()
+    driver.type_text.assert_called_with("plain", 0.0)
+
+    # Invalid expressions fail each time without stopping the run
+    node_if = ActionNode(type=ActionType.IF_CONDITION, params={"condition": "count >"})
+    assert runner._execute_node(node_if) is False
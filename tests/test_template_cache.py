@@ -0,0 +1,108 @@
+import os
+import cv2
+import numpy as np
+from src.infra.template_cache import TemplateCache
+
+def _write_png(path, value, size=(20, 10)):
+    w, h = size
+    img = np.full((h, w, 3), value, dtype=np.uint8)
+    cv2.imwrite(str(path), img)
+    return img
+
+def test_hit_and_miss_counters(tmp_path):
+    path = tmp_path / "button.png"
+    _write_png(path, 120)
+    cache = TemplateCache()
+
+    first = cache.get(str(path))
+    second = cache.get(str(path))
+
+    assert first is second
+    assert first.size == (20, 10)
+    assert first.gray.shape == (10, 20)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_mtime_change_reloads(tmp_path):
+    path = tmp_path / "button.png"
+    _write_png(path, 10)
+    cache = TemplateCache()
+    old = cache.get(str(path))
+
+    _write_png(path, 200)
+    # Force a distinct mtime even on coarse-grained filesystems
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    new = cache.get(str(path))
+    assert new is not old
+    assert int(new.bgr[0, 0, 0]) == 200
+    assert cache.stats()["entries"] == 1
+
+def test_evicts_least_recently_used_by_bytes(tmp_path):
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"t{i}.png"
+        _write_png(p, i * 50)
+        paths.append(str(p))
+
+    one_entry = 20 * 10 * 3 + 20 * 10
+    cache = TemplateCache(max_bytes=one_entry * 2)
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0]) # paths[1] becomes least recently used
+    cache.get(paths[2])
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+
+    cache.get(paths[0])
+    assert cache.stats()["hits"] == 2
+
+def test_missing_file_returns_none(tmp_path):
+    cache = TemplateCache()
+    assert cache.get(str(tmp_path / "nope.png")) is None
+
+def test_capture_scale_from_name_and_resized_variants(tmp_path):
+    from src.infra.template_cache import template_scale_from_path
+    assert template_scale_from_path("assets/capture_1a2b3c4d@2x.png") == 2.0
+    assert template_scale_from_path("assets/capture_1a2b3c4d@1.5x.png") == 1.5
+    assert template_scale_from_path("assets/capture_1a2b3c4d.png") is None
+
+    path = tmp_path / "button@2x.png"
+    cv2.imwrite(str(path), np.zeros((40, 60, 3), dtype=np.uint8))
+    cache = TemplateCache()
+
+    half = cache.get(str(path), 0.5)
+    assert (half.size, half.ratio, half.scale) == ((30, 20), 0.5, 2.0)
+    assert cache.get(str(path), 0.5) is half
+
+    cache.invalidate(str(path))
+    assert cache.stats()["entries"] == 0
+
+def test_mask_from_alpha_and_exclusion_rect(tmp_path):
+    path = tmp_path / "icon.png"
+    bgra = np.full((20, 40, 4), 200, dtype=np.uint8)
+    bgra[:, :10, 3] = 0  # Transparent left strip
+    cv2.imwrite(str(path), bgra)
+    cache = TemplateCache()
+
+    plain = cache.get(str(path))
+    assert plain.bgr.shape == (20, 40, 3)
+    assert plain.mask[:, :10].max() == 0 and plain.mask[:, 10:].min() == 255
+
+    excluded = cache.get(str(path), exclude=(30, 0, 10, 20))
+    assert excluded is not plain
+    assert excluded.mask[:, 10:30].min() == 255 and excluded.mask[:, 30:].max() == 0
+
+    # Rescaled variants carry the mask with them
+    half = cache.get(str(path), 0.5, (30, 0, 10, 20))
+    assert half.mask.shape == (10, 20)
+    assert half.mask[:, :5].max() == 0 and half.mask[:, 15:].max() == 0
+
+def test_opaque_template_has_no_mask(tmp_path):
+    path = tmp_path / "button.png"
+    _write_png(path, 120)
+    assert TemplateCache().get(str(path)).mask is None
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+from src.infra.capture import FileCaptureBackend
+from src.infra.frames import ScreenFrame, fingerprint
+from src.infra.input_driver import InputDriver
+from src.infra.ocr import OcrBackend, StubOcrBackend, Word
+from src.infra.text_index import TextIndex, TextIndexer, find_text, tile_windows
+
+class LabelOcr(OcrBackend):
+    """Reads the labels drawn into the frame by `_screen` (black boxes on white)."""
+    name = "labels"
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.calls = 0
+
+    def words(self, bgr):
+        self.calls += 1
+        return [Word(label, (x, y, w, h)) for label, (x, y, w, h) in self._visible(bgr)]
+
+    def _visible(self, bgr):
+        # Labels are identified by the gray level they were drawn with
+        found = []
+        for i, label in enumerate(self.labels):
+            ys, xs = np.nonzero(bgr[:, :, 0] == 10 + i)
+            if len(xs):
+                x, y = int(xs.min()), int(ys.min())
+                found.append((label, (x, y, int(xs.max()) - x + 1, int(ys.max()) - y + 1)))
+        return found
+
+def _screen(boxes, w=1600, h=1200):
+    img = np.full((h, w, 3), 255, dtype=np.uint8)
+    for i, (x, y, bw, bh) in enumerate(boxes):
+        img[y:y + bh, x:x + bw] = 10 + i
+    return img
+
+def test_fuzzy_lookup_joins_words_on_a_line():
+    index = TextIndex([
+        Word("Save", (100, 10, 40, 16)), Word("as...", (146, 10, 40, 16)),
+        Word("Cancel", (300, 10, 60, 16)), Word("Save", (100, 400, 40, 16)),
+    ])
+    hit = index.find("save as")[0]
+    assert hit.text == "Save as..." and hit.rect == (100, 10, 86, 16)
+    assert index.find("Cancle", 0.8)[0].text == "Cancel"
+    assert index.find("Delete") == []
+    # Memoized per query
+    assert index.find("save as") is index.find("save as")
+
+def test_only_changed_tiles_are_read_again():
+    labels = ["Open", "Close"]
+    ocr = LabelOcr(labels)
+    indexer = TextIndexer(ocr)
+    frame = ScreenFrame(0, _screen([(100, 100, 60, 20), (1300, 900, 70, 20)]))
+
+    index = indexer.index(frame)
+    tiles = len(tile_windows(frame.height, frame.width))
+    assert ocr.calls == tiles
+    close = index.find("close")[0]
+    assert close.rect == (1300, 900, 70, 20)
+
+    # Unchanged frame: cached index, no OCR
+    assert indexer.index(ScreenFrame(0, frame.bgr.copy())) is index
+    assert ocr.calls == tiles
+
+    # Moving one label re-reads only the tiles whose windows see the change
+    moved = ScreenFrame(0, _screen([(100, 100, 60, 20), (1300, 950, 70, 20)]))
+    assert indexer.index(moved).find("close")[0].rect == (1300, 950, 70, 20)
+    assert tiles == 4 and ocr.calls - tiles == 2
+
+def test_region_search_reads_only_the_tiles_it_touches():
+    ocr = LabelOcr(["Open", "Close"])
+    indexer = TextIndexer(ocr)
+    frame = ScreenFrame(0, _screen([(100, 100, 60, 20), (1300, 900, 70, 20)]))
+
+    hit = find_text(indexer, frame, "open", pixel_rect=(0, 0, 400, 300))
+    assert hit.rect == (100, 100, 60, 20) and ocr.calls == 1
+    assert find_text(indexer, frame, "close", pixel_rect=(0, 0, 400, 300)) is None
+    assert ocr.calls == 1
+
+    # A full search afterwards reuses the tile already read
+    assert find_text(indexer, frame, "close").rect == (1300, 900, 70, 20)
+    assert ocr.calls == len(tile_windows(frame.height, frame.width))
+
+def test_word_on_tile_edge_is_read_once_and_whole():
+    ocr = LabelOcr(["Straddle"])
+    index = TextIndexer(ocr).index(ScreenFrame(0, _screen([(990, 500, 80, 20)])))
+    assert [w.rect for w in index.words] == [(990, 500, 80, 20)]
+
+def test_driver_finds_text_in_logical_coordinates(tmp_path):
+    screen = np.full((300, 400, 3), 255, dtype=np.uint8)
+    cv2.imwrite(str(tmp_path / "000.png"), screen)
+    # The stub spreads known text over the whole (single tile) frame
+    ocr = StubOcrBackend({fingerprint(screen): "Apply OK"})
+    driver = InputDriver(capture=FileCaptureBackend([str(tmp_path)]), ocr=ocr)
+
+    x, y = driver.find_text("ok")
+    assert x > 200 and y == 150
+    assert driver.find_text("Apply", region=(0, 0, 200, 300)) is not None
+    assert driver.find_text("Apply", region=(300, 0, 100, 300)) is None
+    assert driver.text_indexer.cache.stats()["hits"] == 2
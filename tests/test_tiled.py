@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+from helpers import textured_frame
+
+from src.infra.incremental import IncrementalMatcher
+from src.infra.matcher import candidates_exhaustive, match_template
+from src.infra.tiled import TiledMatcher
+
+
+def test_blocks_are_bit_identical_for_any_worker_count():
+    frame = textured_frame(1200, 900, channels=1)
+    template = frame[400:460, 700:780].copy()
+    mask = np.full(template.shape, 255, dtype=np.uint8)
+    mask[:20] = 0
+    reference = IncrementalMatcher()
+
+    for m in (None, mask):
+        expected = reference.full_response(frame, template, mask=m)
+        for workers in (1, 3, 8):
+            matcher = TiledMatcher(max_workers=workers, min_pixels=0)
+            try:
+                assert np.array_equal(matcher.response(frame, template, m), expected)
+                _, max_val, _, max_loc = cv2.minMaxLoc(expected)
+                assert matcher(frame, template, m) == (max_val, max_loc)
+            finally:
+                matcher.shutdown()
+
+def test_ties_resolve_like_a_single_map():
+    frame = textured_frame(1200, 900, seed=1, channels=1)
+    template = frame[100:140, 100:150].copy()
+    # Identical copies in later blocks score (about) the same as the first
+    frame[700:740, 900:950] = template
+    frame[100:140, 1000:1050] = template
+    _, max_val, _, max_loc = cv2.minMaxLoc(IncrementalMatcher().full_response(frame, template))
+    matcher = TiledMatcher(max_workers=4, min_pixels=0)
+    try:
+        assert matcher(frame, template) == (max_val, max_loc)
+    finally:
+        matcher.shutdown()
+
+def test_small_frames_match_in_one_call():
+    frame = textured_frame(320, 200, seed=2, channels=1)
+    template = frame[50:90, 60:120].copy()
+    matcher = TiledMatcher(max_workers=4)
+
+    assert np.array_equal(matcher.response(frame, template), match_template(frame, template))
+    assert matcher.candidates(frame, template) == candidates_exhaustive(frame, template)
+    assert matcher._pool is None
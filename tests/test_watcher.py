@@ -0,0 +1,118 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+from helpers import textured_frame
+
+from src.infra.capture import FileCaptureBackend
+from src.infra.image_finder import ImageFinder
+from src.infra.watcher import ScreenWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    # One screen cycling through three different frames
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f"{i:03}.png"), textured_frame(320, 200, i))
+    w = ScreenWatcher(lambda pool: FileCaptureBackend([str(tmp_path)], pool=pool), fps=100, depth=2)
+    yield w
+    w.stop()
+
+def test_snapshot_serves_fresh_preconverted_frames(watcher):
+    with watcher.snapshot() as sources:
+        first = sources[0].grab()
+    assert first.timestamp > 0
+    # Gray and fingerprint were computed on the watcher thread
+    assert "gray" in first.__dict__ and "fingerprint" in first.__dict__
+
+    since = time.monotonic()
+    with watcher.snapshot(newer_than=since) as sources:
+        fresh = sources[0].grab()
+    assert fresh.timestamp > since
+
+class SlowFileBackend(FileCaptureBackend):
+    """File backend whose grabs take a while; records when the grab of each frame ran."""
+    def __init__(self, screens, pool=None):
+        super().__init__(screens, pool=pool)
+        self.grabs = {}  # frame value -> (grab start, grab end)
+        self.grabbing = threading.Event()
+
+    def _load(self, path):
+        img = super()._load(path)
+        time.sleep(0.1)
+        return img
+
+    def grab(self, index):
+        start = time.monotonic()
+        self.grabbing.set()
+        frame = super().grab(index)
+        self.grabbing.clear()
+        self.grabs[int(frame.bgr[0, 0, 0])] = (start, time.monotonic())
+        return frame
+
+def test_input_during_a_grab_waits_for_the_next_one(tmp_path):
+    # Every frame has its own value, so a served frame names its grab
+    for i in range(100):
+        cv2.imwrite(str(tmp_path / f"{i:03}.png"), np.full((20, 30, 3), i, dtype=np.uint8))
+    backends = []
+
+    def factory(pool):
+        backends.append(SlowFileBackend([str(tmp_path)], pool=pool))
+        return backends[-1]
+    watcher = ScreenWatcher(factory, fps=100, depth=2)
+    try:
+        with watcher.snapshot() as sources:
+            assert sources[0].grab() is not None
+        backend = backends[0]
+        # Input lands while a grab is running: that grab may predate it
+        assert backend.grabbing.wait(2.0)
+        time.sleep(0.02)
+        last_input = time.monotonic()
+        with watcher.snapshot(newer_than=last_input) as sources:
+            frame = sources[0].grab()
+        start, _ = backend.grabs[int(frame.bgr[0, 0, 0])]
+        assert start > last_input
+    finally:
+        watcher.stop()
+
+def test_leased_frame_is_not_overwritten(watcher):
+    with watcher.snapshot() as sources:
+        frame = sources[0].grab()
+        gray = frame.gray.copy()
+        captures = watcher.captures
+        while watcher.captures < captures + 10:
+            time.sleep(0.01)
+        assert np.array_equal(frame.gray, gray)
+
+    # Released frames go back to the pool: buffers stay bounded by the ring depth
+    time.sleep(0.05)
+    assert watcher.pool.stats()["allocations"] <= 2 * (watcher.depth + 2)
+
+def test_stops_when_idle(watcher):
+    watcher.idle_timeout = 0.05
+    with watcher.snapshot() as sources:
+        assert sources[0].grab() is not None
+    deadline = time.monotonic() + 2.0
+    while watcher._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not watcher._running
+
+    # The next consumer restarts it
+    with watcher.snapshot() as sources:
+        assert sources[0].grab() is not None
+
+def test_finder_matches_watched_frames(watcher, tmp_path):
+    template = textured_frame(320, 200, 1)[50:90, 100:160]
+    path = tmp_path / "target.png"
+    cv2.imwrite(str(path), template)
+    finder = ImageFinder()
+
+    # The target is on one of the cycling frames: poll until it is the freshest
+    pos = None
+    deadline = time.monotonic() + 2.0
+    while pos is None and time.monotonic() < deadline:
+        with watcher.snapshot() as sources:
+            pos = finder.find(str(path), sources, near_last=False)
+    assert pos == (130, 70)